@@ -3,6 +3,10 @@
  * Este código deve ser copiado manualmente para o Google Apps Script
 */
 
+var SERVER_URL = 'https://pamela-overmighty-roxann.ngrok-free.dev';
+var JOB_POLL_MINUTES = 1;
+
+// Agenda o scraping no servidor e retorna logo; o resultado é buscado por checkScrapingJob
 function executeScraping() {
   var spreadsheet = SpreadsheetApp.getActiveSpreadsheet();
   var sheet = spreadsheet.getActiveSheet();
@@ -10,11 +14,56 @@ function executeScraping() {
   // Capturar dados de pesquisa da linha 2
   var searchData = getSearchData(sheet);
   
-  // Enviar para servidor Python
-  var results = sendToPythonServer(searchData);
+  // Enviar para servidor Python (job em segundo plano)
+  var job = submitScrapingJob(searchData);
+  
+  var properties = PropertiesService.getDocumentProperties();
+  properties.setProperties({
+    'SCRAPING_JOB_ID': job.id,
+    'SCRAPING_SHEET_NAME': sheet.getName(),
+    'SCRAPING_SEARCH_DATA': JSON.stringify(searchData)
+  });
   
   // Limpar resultados anteriores (a partir da linha 6)
   clearPreviousResults(sheet);
+  sheet.getRange(6, 1).setValue('Pesquisa em andamento (job ' + job.id + ')...');
+  
+  scheduleJobCheck();
+  Logger.log('✅ Job de scraping criado: ' + job.id);
+}
+
+// Chamada pelo gatilho de tempo: consulta o job e preenche a planilha quando terminar
+function checkScrapingJob() {
+  var properties = PropertiesService.getDocumentProperties();
+  var jobId = properties.getProperty('SCRAPING_JOB_ID');
+  if (!jobId) {
+    removeJobCheckTriggers();
+    return;
+  }
+  
+  var spreadsheet = SpreadsheetApp.getActiveSpreadsheet();
+  var sheet = spreadsheet.getSheetByName(properties.getProperty('SCRAPING_SHEET_NAME')) || spreadsheet.getActiveSheet();
+  var job = getScrapingJob(jobId);
+  var progresso = job.progresso || {};
+  
+  if (job.status === 'pendente' || job.status === 'executando') {
+    sheet.getRange(6, 1).setValue('Pesquisa em andamento: ' + (progresso.processados || 0) + '/' +
+                                  (progresso.links_encontrados || 0) + ' anúncios processados, ' +
+                                  (progresso.aceitos || 0) + ' aceitos');
+    return;
+  }
+  
+  removeJobCheckTriggers();
+  properties.deleteProperty('SCRAPING_JOB_ID');
+  clearPreviousResults(sheet);
+  
+  if (job.status === 'erro') {
+    sheet.getRange(6, 1).setValue('Erro no scraping: ' + job.erro);
+    return;
+  }
+  
+  var results = getScrapingJobResults(jobId);
+  var searchData = JSON.parse(properties.getProperty('SCRAPING_SEARCH_DATA'));
   
   // Preencher novos resultados
   fillResults(sheet, results);
@@ -26,6 +75,22 @@ function executeScraping() {
   saveToHistory(spreadsheet, searchData, results);
 }
 
+function scheduleJobCheck() {
+  removeJobCheckTriggers();
+  ScriptApp.newTrigger('checkScrapingJob')
+    .timeBased()
+    .everyMinutes(JOB_POLL_MINUTES)
+    .create();
+}
+
+function removeJobCheckTriggers() {
+  ScriptApp.getProjectTriggers().forEach(function(trigger) {
+    if (trigger.getHandlerFunction() === 'checkScrapingJob') {
+      ScriptApp.deleteTrigger(trigger);
+    }
+  });
+}
+
 function getSearchData(sheet) {
   var dataRange = sheet.getRange(1, 1, 2, 10);
   var data = dataRange.getValues();
@@ -99,31 +164,44 @@ function parseValue(value) {
   return isNaN(num) ? value.trim() : num;
 }
 
-function sendToPythonServer(searchData) {
-  var serverUrl = 'https://pamela-overmighty-roxann.ngrok-free.dev'
+function callPythonServer(method, path, payload) {
+  var serverUrl = SERVER_URL;
   
   if (!serverUrl) {
     throw new Error('URL do servidor Python não configurada. Defina a propriedade PYTHON_SERVER_URL.');
   }
   
   var options = {
-    'method': 'POST',
+    'method': method,
     'headers': {
       'Content-Type': 'application/json',
     },
-    'payload': JSON.stringify(searchData),
     'muteHttpExceptions': true
   };
+  if (payload) {
+    options.payload = JSON.stringify(payload);
+  }
   
-  var response = UrlFetchApp.fetch(serverUrl + '/scrape', options);
+  var response = UrlFetchApp.fetch(serverUrl + path, options);
   var responseCode = response.getResponseCode();
   
-  if (responseCode !== 200) {
+  if (responseCode < 200 || responseCode >= 300) {
     throw new Error('Erro no servidor: ' + responseCode + ' - ' + response.getContentText());
   }
   
-  var results = JSON.parse(response.getContentText());
-  return results;
+  return JSON.parse(response.getContentText());
+}
+
+function submitScrapingJob(searchData) {
+  return callPythonServer('POST', '/jobs', searchData);
+}
+
+function getScrapingJob(jobId) {
+  return callPythonServer('GET', '/jobs/' + jobId);
+}
+
+function getScrapingJobResults(jobId) {
+  return callPythonServer('GET', '/jobs/' + jobId + '/results');
 }
 
 function clearPreviousResults(sheet) {
@@ -155,42 +233,59 @@ function fillResults(sheet, results) {
     headerRange.setFontWeight('bold');
   }
   
-  // Preencher dados
+  // Preencher dados (números chegam como número e campos ausentes como null)
   var rowData = [];
+  var priceFormats = [];
   for (var i = 0; i < results.length; i++) {
     var result = results[i];
     var row = [
-      result.url || '',
-      result.titulo || '',
-      result.preco || '',
-      result.localizacao || '',
-      result.ano || '',
-      result.fabricante || '',
-      result.modelo || '',
-      result.motor_1_left || '',
-      result.motor_2_left || '',
-      result.horas_totais || '',
-      result.motor_1_horas ? (result.motor_1_horas.horas || '') : '',
-      result.motor_1_horas ? (result.motor_1_horas.status || '') : '',
-      result.motor_2_horas ? (result.motor_2_horas.horas || '') : '',
-      result.motor_2_horas ? (result.motor_2_horas.status || '') : '',
-      result.motor_1_tbo || '',
-      result.motor_2_tbo || '',
-      result.vendedor || '',
-      result.telefone || ''
+      valueOrEmpty(result.url),
+      valueOrEmpty(result.titulo),
+      valueOrEmpty(result.preco),
+      valueOrEmpty(result.localizacao),
+      valueOrEmpty(result.ano),
+      valueOrEmpty(result.fabricante),
+      valueOrEmpty(result.modelo),
+      valueOrEmpty(result.motor_1_left),
+      valueOrEmpty(result.motor_2_left),
+      valueOrEmpty(result.horas_totais),
+      result.motor_1_horas ? valueOrEmpty(result.motor_1_horas.horas) : '',
+      result.motor_1_horas ? valueOrEmpty(result.motor_1_horas.status) : '',
+      result.motor_2_horas ? valueOrEmpty(result.motor_2_horas.horas) : '',
+      result.motor_2_horas ? valueOrEmpty(result.motor_2_horas.status) : '',
+      valueOrEmpty(result.motor_1_tbo),
+      valueOrEmpty(result.motor_2_tbo),
+      valueOrEmpty(result.vendedor),
+      valueOrEmpty(result.telefone)
     ];
     rowData.push(row);
+    // A moeda vai no formato da célula, para o preço continuar numérico (ordenável)
+    priceFormats.push([result.moeda ? '"' + result.moeda + ' "#,##0' : '#,##0']);
   }
   
   if (rowData.length > 0) {
     // Dados começam na LINHA 6 (5 + 1)
     var dataRange = sheet.getRange(6, 1, rowData.length, resultHeaders.length);
     dataRange.setValues(rowData);
+    sheet.getRange(6, 3, rowData.length, 1).setNumberFormats(priceFormats);
 
     formatMainSheetData(sheet, rowData.length, resultHeaders.length);
   }
 }
 
+// Valor do campo para a célula: null/undefined viram vazio, mas 0 continua 0
+function valueOrEmpty(value) {
+  return value === null || value === undefined ? '' : value;
+}
+
+// Preço com a moeda, para o histórico (que guarda tudo como texto)
+function formatPrice(result) {
+  if (result.preco === null || result.preco === undefined) {
+    return '';
+  }
+  return (result.moeda ? result.moeda + ' ' : '') + result.preco;
+}
+
 function debugResults(results) {
   Logger.log('=== 🔍 DEBUG RESULTS JSON ===');
   
@@ -243,24 +338,24 @@ function saveToHistory(spreadsheet, searchData, results) {
     var historyRow = [
       timestamp,                          // Data e hora da pesquisa
       searchCriteria,                     // Critérios de pesquisa usados
-      '\'' + (result.url || ''),                   // URL do resultado
-      '\'' + (result.titulo || ''),                // Título
-      '\'' + (result.preco || ''),                 // Preço
-      '\'' + (result.localizacao || ''),           // Localização
-      '\'' + (result.ano || ''),                   // Ano
-      '\'' + (result.fabricante || ''),            // Fabricante
-      '\'' + (result.modelo || ''),               // Modelo
-      '\'' + (result.motor_1_left || ''),         // Horas Restantes Motor 1
-      '\'' + (result.motor_2_left || ''),         // Horas Restantes Motor 2
-      '\'' + (result.horas_totais || ''),         // Horas Totais
-      '\'' + (result.motor_1_horas ? (result.motor_1_horas.horas || '') : ''),
-      '\'' + (result.motor_1_horas ? (result.motor_1_horas.status || '') : ''),
-      '\'' + (result.motor_2_horas ? (result.motor_2_horas.horas || '') : ''),
-      '\'' + (result.motor_2_horas ? (result.motor_2_horas.status || '') : ''),
-      '\'' + (result.motor_1_tbo || ''),          // Motor 1 TBO
-      '\'' + (result.motor_2_tbo || ''),          // Motor 2 TBO
-      '\'' + (result.vendedor || ''),             // Vendedor
-      '\'' + (result.telefone || '')              // Telefone
+      '\'' + valueOrEmpty(result.url),             // URL do resultado
+      '\'' + valueOrEmpty(result.titulo),          // Título
+      '\'' + formatPrice(result),                  // Preço (com a moeda)
+      '\'' + valueOrEmpty(result.localizacao),     // Localização
+      '\'' + valueOrEmpty(result.ano),             // Ano
+      '\'' + valueOrEmpty(result.fabricante),      // Fabricante
+      '\'' + valueOrEmpty(result.modelo),          // Modelo
+      '\'' + valueOrEmpty(result.motor_1_left),    // Horas Restantes Motor 1
+      '\'' + valueOrEmpty(result.motor_2_left),    // Horas Restantes Motor 2
+      '\'' + valueOrEmpty(result.horas_totais),    // Horas Totais
+      '\'' + (result.motor_1_horas ? valueOrEmpty(result.motor_1_horas.horas) : ''),
+      '\'' + (result.motor_1_horas ? valueOrEmpty(result.motor_1_horas.status) : ''),
+      '\'' + (result.motor_2_horas ? valueOrEmpty(result.motor_2_horas.horas) : ''),
+      '\'' + (result.motor_2_horas ? valueOrEmpty(result.motor_2_horas.status) : ''),
+      '\'' + valueOrEmpty(result.motor_1_tbo),     // Motor 1 TBO
+      '\'' + valueOrEmpty(result.motor_2_tbo),     // Motor 2 TBO
+      '\'' + valueOrEmpty(result.vendedor),        // Vendedor
+      '\'' + valueOrEmpty(result.telefone)         // Telefone
     ];
     
     // Adicionar linha ao histórico
@@ -336,12 +431,13 @@ function formatMainSheetData(sheet, numRows, numColumns) {
       rowRange.setBackground(color);
     }
     
-    // Formatar coluna de preço (coluna 3)
-    var priceRange = sheet.getRange(6, 3, numRows, 1);
-    priceRange.setNumberFormat('"R$ "#,##0.00');
+    // A coluna de preço (3) recebe o formato com a moeda de cada anúncio em fillResults
+    
+    // Ano sem separador de milhar
+    sheet.getRange(6, 5, numRows, 1).setNumberFormat('0');
     
     // Formatar colunas numéricas
-    var numericColumns = [5, 8, 9, 10, 11, 13, 15, 16]; // Ano, Horas Motor 1, Horas Motor 2, etc.
+    var numericColumns = [8, 9, 10, 11, 13, 15, 16]; // Horas Motor 1, Horas Motor 2, etc.
     numericColumns.forEach(function(col) {
       if (col <= numColumns) {
         var range = sheet.getRange(6, col, numRows, 1);
@@ -0,0 +1,283 @@
+"""
+    Benchmark offline da extração sobre o corpus de páginas salvas
+
+    Mede filter_html_data (páginas de anúncio ?print=1), get_listing_links
+    (páginas de busca) e _markdown_to_html com o FirecrawlApp substituído
+    por um stub que devolve o HTML do corpus: nenhuma requisição é feita.
+    Reporta percentis de latência por função, anúncios por segundo e pico
+    de memória, e compara com benchmarks/baseline.json.
+
+    Uso:
+        python benchmarks/bench_extracao.py                    # mede e compara com a baseline
+        python benchmarks/bench_extracao.py --salvar-baseline  # mede e grava a nova baseline
+        python benchmarks/bench_extracao.py --importar-cache scraped_data/html_cache.sqlite3
+
+    Sai com código 1 quando alguma métrica piora além da tolerância
+    (--tolerancia ou BENCH_TOLERANCIA, padrão 0.25 = 25%).
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from unittest.mock import patch
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_CORPUS = os.path.join(RAIZ, 'benchmarks', 'corpus')
+ARQUIVO_BASELINE = os.path.join(RAIZ, 'benchmarks', 'baseline.json')
+
+# Sem estado em disco: nada de cache, histórico ou orçamento compartilhado; o parse
+# roda na própria thread para medir o custo da extração e não o da troca entre processos
+for variavel in ('RATE_LIMIT_DB', 'HTML_CACHE_DB', 'CRAWL_LEDGER_DB'):
+    os.environ[variavel] = ''
+os.environ['PARSE_WORKERS'] = '0'
+# O arquivo de páginas e o repositório de anúncios são criados ao importar: num
+# diretório temporário, para o benchmark não deixar SQLite no diretório atual
+TEMPORARIO = tempfile.TemporaryDirectory(prefix='bench_extracao_', ignore_cleanup_errors=True)
+os.environ['PAGE_ARCHIVE_DIR'] = os.path.join(TEMPORARIO.name, 'arquivo_paginas')
+os.environ['LISTINGS_DB'] = os.path.join(TEMPORARIO.name, 'anuncios.sqlite3')
+sys.path.insert(0, os.path.join(RAIZ, 'src'))
+
+from web_scraping import FirecrawlScraper  # noqa: E402
+from utils.cache_buscas import CacheBuscas  # noqa: E402
+from utils.cache_html import tipo_pagina  # noqa: E402
+from utils.rate_limit import LimitadorRequisicoes  # noqa: E402
+
+URL_BUSCA = "https://www.controller.com/listings/search?Manufacturer=PIPER"
+
+# Métricas comparadas com a baseline: (chave, maior_e_melhor)
+METRICAS = [
+    ('filter_html_data.p50_ms', False),
+    ('filter_html_data.p90_ms', False),
+    ('get_listing_links.p50_ms', False),
+    ('_markdown_to_html.p50_ms', False),
+    ('anuncios_por_segundo', True),
+    ('pico_memoria_mb', False),
+]
+
+
+class _Resultado:
+    def __init__(self, html):
+        self.html = html
+        self.markdown = None
+
+
+class FirecrawlStub:
+    """Substitui o FirecrawlApp devolvendo as páginas do corpus"""
+
+    def __init__(self, paginas, *args, **kwargs):
+        self.paginas = paginas
+
+    def scrape(self, url, *args, **kwargs):
+        return _Resultado(self.paginas[url])
+
+
+def carregar_corpus(diretorio=DIRETORIO_CORPUS):
+    """Lê o corpus: {'anuncio': [html], 'busca': [html], 'markdown': [texto]}"""
+    corpus = {}
+    for tipo, extensao in (('anuncio', 'html'), ('busca', 'html'), ('markdown', 'md')):
+        arquivos = sorted(glob.glob(os.path.join(diretorio, tipo, f'*.{extensao}')))
+        corpus[tipo] = []
+        for caminho in arquivos:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                corpus[tipo].append(f.read())
+    return corpus
+
+
+def criar_scraper(paginas):
+    """Scraper sem rede, sem espera e sem caches"""
+    with patch('web_scraping.FirecrawlApp', lambda *a, **k: FirecrawlStub(paginas)):
+        return FirecrawlScraper(
+            api_key='benchmark',
+            limitador=LimitadorRequisicoes(requisicoes_por_minuto=10 ** 9, capacidade=10 ** 9),
+            cache=False,
+            buscas=CacheBuscas(ttl=0),
+            historico=False,
+        )
+
+
+def percentis(amostras):
+    """p50/p90/p99 e média em milissegundos"""
+    ordenadas = sorted(amostras)
+
+    def p(q):
+        return ordenadas[min(len(ordenadas) - 1, int(round(q * (len(ordenadas) - 1))))] * 1000
+
+    return {
+        'n': len(ordenadas),
+        'p50_ms': round(p(0.50), 3),
+        'p90_ms': round(p(0.90), 3),
+        'p99_ms': round(p(0.99), 3),
+        'media_ms': round(statistics.fmean(ordenadas) * 1000, 3),
+    }
+
+
+def _cronometrar(funcao, entradas, repeticoes):
+    amostras = []
+    for _ in range(repeticoes):
+        for entrada in entradas:
+            inicio = time.perf_counter()
+            funcao(entrada)
+            amostras.append(time.perf_counter() - inicio)
+    return amostras
+
+
+def executar(corpus, repeticoes=10):
+    """Roda o benchmark completo e devolve o relatório"""
+    urls_anuncio = [f"https://www.controller.com/listing/bench-{i}?print=1" for i in range(len(corpus['anuncio']))]
+    urls_busca = [URL_BUSCA] + [f"{URL_BUSCA}&page={p}" for p in range(2, len(corpus['busca']) + 1)]
+    paginas = dict(zip(urls_anuncio, corpus['anuncio']))
+    paginas.update(zip(urls_busca, corpus['busca']))
+    scraper = criar_scraper(paginas)
+
+    def rodar_busca(_):
+        scraper.buscas = CacheBuscas(ttl=0)
+        return scraper.get_listing_links(URL_BUSCA)
+
+    relatorio = {}
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        # Aquecimento (imports preguiçosos, regex compiladas sob demanda)
+        for url in urls_anuncio:
+            scraper.filter_html_data(url)
+
+        amostras = _cronometrar(scraper.filter_html_data, urls_anuncio, repeticoes)
+        relatorio['filter_html_data'] = percentis(amostras)
+        relatorio['anuncios_por_segundo'] = round(len(amostras) / sum(amostras), 2)
+
+        if corpus['busca']:
+            relatorio['get_listing_links'] = percentis(_cronometrar(rodar_busca, [None], repeticoes))
+            relatorio['links_por_busca'] = len(rodar_busca(None))
+
+        if corpus['markdown']:
+            relatorio['_markdown_to_html'] = percentis(
+                _cronometrar(scraper._markdown_to_html, corpus['markdown'], repeticoes)
+            )
+
+        # Pico de memória numa passada separada (o tracemalloc deixa tudo mais lento)
+        tracemalloc.start()
+        for url in urls_anuncio:
+            scraper.filter_html_data(url)
+        if corpus['busca']:
+            rodar_busca(None)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    relatorio['pico_memoria_mb'] = round(pico / (1024 * 1024), 2)
+
+    relatorio['corpus'] = {tipo: len(itens) for tipo, itens in corpus.items()}
+    relatorio['repeticoes'] = repeticoes
+    relatorio['ambiente'] = {'python': platform.python_version(), 'maquina': platform.machine()}
+    return relatorio
+
+
+def _valor(relatorio, chave):
+    atual = relatorio
+    for parte in chave.split('.'):
+        if not isinstance(atual, dict) or parte not in atual:
+            return None
+        atual = atual[parte]
+    return atual
+
+
+def comparar(relatorio, baseline, tolerancia=0.25):
+    """Lista as regressões (mensagens) em relação à baseline"""
+    regressoes = []
+    for chave, maior_e_melhor in METRICAS:
+        atual, referencia = _valor(relatorio, chave), _valor(baseline, chave)
+        if atual is None or not referencia:
+            continue
+        if maior_e_melhor:
+            piorou = atual < referencia * (1 - tolerancia)
+        else:
+            piorou = atual > referencia * (1 + tolerancia)
+        if piorou:
+            variacao = (atual - referencia) / referencia * 100
+            regressoes.append(f"{chave}: {atual} (baseline {referencia}, {variacao:+.1f}%)")
+    return regressoes
+
+
+def importar_cache(caminho_cache, diretorio=DIRETORIO_CORPUS):
+    """Copia as páginas do cache de HTML (scraping real) para o corpus"""
+    import hashlib
+    import sqlite3
+    import zlib
+
+    conn = sqlite3.connect(caminho_cache)
+    try:
+        linhas = conn.execute("SELECT chave, html FROM paginas").fetchall()
+    finally:
+        conn.close()
+
+    importadas = 0
+    for chave, html in linhas:
+        tipo = tipo_pagina(chave)
+        if tipo not in ('anuncio', 'busca'):
+            continue
+        nome = f"cache_{hashlib.sha1(chave.encode('utf-8')).hexdigest()[:12]}.html"
+        os.makedirs(os.path.join(diretorio, tipo), exist_ok=True)
+        with open(os.path.join(diretorio, tipo, nome), 'w', encoding='utf-8') as f:
+            f.write(zlib.decompress(html).decode('utf-8'))
+        importadas += 1
+    return importadas
+
+
+def imprimir(relatorio):
+    print("\n" + "=" * 60)
+    print("📊 BENCHMARK DE EXTRAÇÃO")
+    print("=" * 60)
+    for funcao in ('filter_html_data', 'get_listing_links', '_markdown_to_html'):
+        if funcao in relatorio:
+            r = relatorio[funcao]
+            print(f"⏱️  {funcao:<20} n={r['n']:<4} p50={r['p50_ms']:.2f}ms p90={r['p90_ms']:.2f}ms p99={r['p99_ms']:.2f}ms")
+    print(f"🚀 Anúncios por segundo: {relatorio['anuncios_por_segundo']}")
+    print(f"💾 Pico de memória: {relatorio['pico_memoria_mb']} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline da extração")
+    parser.add_argument('--repeticoes', type=int, default=10)
+    parser.add_argument('--baseline', default=ARQUIVO_BASELINE)
+    parser.add_argument('--salvar-baseline', action='store_true')
+    parser.add_argument('--tolerancia', type=float, default=float(os.getenv('BENCH_TOLERANCIA', '0.25')))
+    parser.add_argument('--importar-cache', metavar='HTML_CACHE_DB')
+    args = parser.parse_args(argv)
+
+    if args.importar_cache:
+        print(f"✅ {importar_cache(args.importar_cache)} páginas importadas para {DIRETORIO_CORPUS}")
+        return 0
+
+    relatorio = executar(carregar_corpus(), args.repeticoes)
+    imprimir(relatorio)
+
+    if args.salvar_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Baseline salva em: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("\n⚠️  Sem baseline para comparar. Rode com --salvar-baseline.")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressoes = comparar(relatorio, baseline, args.tolerancia)
+    if regressoes:
+        print(f"\n🚨 REGRESSÃO DE DESEMPENHO (tolerância {args.tolerancia:.0%}):")
+        for regressao in regressoes:
+            print(f"   ❌ {regressao}")
+        return 1
+
+    print(f"\n✅ Sem regressões em relação à baseline (tolerância {args.tolerancia:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""
+    Gera o corpus sintético do benchmark (determinístico, semente fixa)
+
+    As páginas imitam a estrutura das páginas de busca e de impressão
+    (?print=1) do controller.com: menus, scripts e blocos de especificação
+    com os rótulos que o motor de extração procura. Páginas reais podem ser
+    adicionadas com `python benchmarks/bench_extracao.py --importar-cache`.
+
+    Uso: python benchmarks/corpus/gerar_corpus.py
+"""
+
+import os
+import random
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+
+AERONAVES = [
+    ('PIPER', 'SENECA V', 2, 'Continental TSIO-360-RB', 1800),
+    ('PIPER', 'PA-28-181 ARCHER LX', 1, 'Lycoming O-360-A4M', 2000),
+    ('CESSNA', '182T SKYLANE', 1, 'Lycoming IO-540-AB1A5', 2000),
+    ('BEECHCRAFT', 'BARON G58', 2, 'Continental IO-550-C', 1900),
+    ('CIRRUS', 'SR22T G6', 1, 'Continental TSIO-550-K', 2000),
+    ('MOONEY', 'M20R OVATION', 1, 'Continental IO-550-G', 2000),
+    ('BEECHCRAFT', 'KING AIR C90GTX', 2, 'Pratt & Whitney PT6A-135A', 3600),
+    ('DIAMOND', 'DA42-VI', 2, 'Austro AE300', 1800),
+    ('PILATUS', 'PC-12/47E', 1, 'Pratt & Whitney PT6A-67P', 3500),
+    ('PIPER', 'M600/SLS', 1, 'Pratt & Whitney PT6A-42A', 3600),
+]
+CIDADES = ['Cham, Zug, Switzerland', 'Orlando, Florida', 'Wichita, Kansas', 'Toronto, Ontario', 'Sao Paulo, Brazil']
+VENDEDORES = ['Ralph Severin', 'Jane Smith', 'Aircraft Sales Inc.', 'John Doe', 'Carlos Pereira']
+
+
+def ruido(rng, blocos):
+    """Menus, scripts e rodapé que inflam a página como no site real"""
+    partes = []
+    for i in range(blocos):
+        itens = ''.join(f'<li class="nav-item"><a href="/category/{rng.randint(1, 999)}">Item {j}</a></li>' for j in range(12))
+        partes.append(f'<nav class="menu menu-{i}"><ul>{itens}</ul></nav>')
+        partes.append('<script>window.dataLayer=window.dataLayer||[];dataLayer.push({"event":"view","id":%d,"items":[%s]});</script>'
+                      % (rng.randint(1, 10**6), ','.join(str(rng.randint(1, 999)) for _ in range(40))))
+        partes.append(f'<div class="ad-slot" data-slot="{i}"><img src="/img/ad{i}.png" alt="Anuncie aqui"></div>')
+    return ''.join(partes)
+
+
+def pagina_anuncio(rng, indice):
+    fabricante, modelo, motores, motor, tbo = AERONAVES[indice % len(AERONAVES)]
+    ano = rng.randint(1975, 2023)
+    total = rng.randint(150, 9000)
+    preco = 'Call for Price' if indice % 7 == 3 else f'USD ${rng.randint(80, 4500) * 1000:,}'
+    specs = [f'<div class="spec"><span class="spec-label">Total Time:</span> {total:,}</div>']
+    for n in range(1, motores + 1):
+        status = rng.choice(['SMOH', 'SNEW', 'SFOH'])
+        specs.append(f'<div class="spec"><span class="spec-label">Engine {n} Time:</span> {rng.randint(5, tbo):,} {status}</div>')
+        if indice % 4:
+            specs.append(f'<div class="spec"><span class="spec-label">Engine {n} TBO:</span> {tbo:,}</div>')
+    specs.append(f'<div class="spec"><span class="spec-label">Engines:</span> {motor}</div>')
+    descricao = ' '.join(rng.choice(['Garmin', 'G1000', 'NXi', 'autopilot', 'fresh annual', 'no damage history',
+                                     'hangared', 'ADS-B', 'TKS', 'leather interior', 'air conditioning'])
+                         for _ in range(250))
+    return f"""<!DOCTYPE html>
+<html><head><title>{ano} {fabricante} {modelo} For Sale | Controller.com</title>
+<meta charset="utf-8"><link rel="stylesheet" href="/css/print.css"></head>
+<body class="print-view">
+{ruido(rng, 6)}
+<div class="listing-detail">
+<h1 class="detail-title">{ano} {fabricante} {modelo}</h1>
+<div class="listing-prices"><span class="price">{preco}</span></div>
+<div class="machine-location"><a href="https://www.google.com/maps/search/?api=1&query={CIDADES[indice % len(CIDADES)].replace(' ', '+')}">{CIDADES[indice % len(CIDADES)]}</a></div>
+<div class="specs">{''.join(specs)}</div>
+<div class="detail-description"><p>{descricao}</p></div>
+<div class="dealer-contact">Contact: {VENDEDORES[indice % len(VENDEDORES)]}<br/>Phone: <a href="tel:+1555{indice:04d}">+1 555 {indice:04d}</a></div>
+</div>
+{ruido(rng, 4)}
+</body></html>
+"""
+
+
+def pagina_busca(rng, pagina, total_paginas, por_pagina=28):
+    cartoes = []
+    for i in range(por_pagina):
+        fabricante, modelo, *_ = AERONAVES[(pagina * por_pagina + i) % len(AERONAVES)]
+        slug = f"{rng.randint(10**7, 10**8)}/{rng.randint(1975, 2023)}-{fabricante}-{modelo}".lower().replace(' ', '-').replace('/', '-', 1)
+        cartoes.append(
+            f'<div class="list-listing-card-wrapper"><a href="/listing/for-sale/{slug}" class="list-listing-title-link">'
+            f'{fabricante} {modelo}</a><div class="price">USD ${rng.randint(80, 4500) * 1000:,}</div>'
+            f'<div class="listing-specs">{ruido(rng, 1)}</div></div>'
+        )
+    paginacao = ''.join(f'<a href="/listings/search?Manufacturer=PIPER&page={p}">{p}</a>' for p in range(1, total_paginas + 1))
+    inicio = (pagina - 1) * por_pagina + 1
+    return f"""<!DOCTYPE html>
+<html><head><title>Aircraft For Sale | Controller.com</title></head>
+<body>
+{ruido(rng, 4)}
+<div class="search-results-count">{inicio} - {inicio + por_pagina - 1} of {total_paginas * por_pagina} Listings</div>
+<div class="list-container">{''.join(cartoes)}</div>
+<div class="pagination">{paginacao}</div>
+{ruido(rng, 2)}
+</body></html>
+"""
+
+
+def markdown_anuncio(rng, indice):
+    fabricante, modelo, *_ = AERONAVES[indice % len(AERONAVES)]
+    linhas = [f"# {fabricante} {modelo}\n", "## Specifications\n"]
+    linhas += [f"**Total Time:** {rng.randint(150, 9000)}  \n*Engine 1 Time:* {rng.randint(5, 2000)} SMOH\n" for _ in range(40)]
+    linhas += [f"![foto {i}](https://img.controller.com/{i}.jpg) [ver mais](https://www.controller.com/listing/{i})\n" for i in range(60)]
+    return ''.join(linhas)
+
+
+def main():
+    rng = random.Random(2357)
+    for subdir in ('anuncio', 'busca', 'markdown'):
+        os.makedirs(os.path.join(DIRETORIO, subdir), exist_ok=True)
+    for i in range(10):
+        with open(os.path.join(DIRETORIO, 'anuncio', f'anuncio_{i:02d}.html'), 'w', encoding='utf-8') as f:
+            f.write(pagina_anuncio(rng, i))
+    for pagina in range(1, 4):
+        with open(os.path.join(DIRETORIO, 'busca', f'busca_p{pagina}.html'), 'w', encoding='utf-8') as f:
+            f.write(pagina_busca(rng, pagina, 3))
+    for i in range(3):
+        with open(os.path.join(DIRETORIO, 'markdown', f'anuncio_{i:02d}.md'), 'w', encoding='utf-8') as f:
+            f.write(markdown_anuncio(rng, i))
+
+
+if __name__ == '__main__':
+    main()
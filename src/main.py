@@ -1,10 +1,26 @@
 import os
+import json
+import time
+import asyncio
 from dotenv import load_dotenv
-from web_scraping import FirecrawlScraper
+from web_scraping import (
+    AsyncFirecrawlScraper, DESCARTADO, cache_compartilhado, buscas_compartilhadas, historico_compartilhado,
+    executor_parse_compartilhado, arquivo_compartilhado,
+)
+from utils.cache_html import normalizar_url
+from utils.jobs import GerenciadorJobs, CONCLUIDO
+from utils.repositorio_anuncios import RepositorioAnuncios, ORDENACOES
+from utils.exportacao import FORMATOS, caminho_exportacao
+from utils.extracao import StatusMotor
+from utils import ranking
+from utils.referencias import registro
+from utils import metricas
 from sheets import exportar_para_google_sheets
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse, Response
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
 import logging
 
@@ -26,6 +42,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Jobs de scraping em segundo plano
+gerenciador_jobs = GerenciadorJobs(
+    max_workers=int(os.getenv('JOBS_WORKERS', '2')),
+    max_finalizados=int(os.getenv('JOBS_MAX_FINISHED', '100')),
+)
+
+def _criar_repositorio():
+    """Cria o repositório de anúncios consultado pelo GET /listings (LISTINGS_DB vazio desativa)"""
+    caminho = os.getenv('LISTINGS_DB', './scraped_data/anuncios.sqlite3')
+    if not caminho:
+        return None
+    return RepositorioAnuncios(caminho)
+
+repositorio_anuncios = _criar_repositorio()
+
+# Formatos aceitos em ?exportar= (Parquet, CSV ou NDJSON)
+PADRAO_EXPORTACAO = f"^({'|'.join(FORMATOS)})$"
+
+def destino_exportacao(formato: Optional[str] = None):
+    """(formato, caminho) da exportação pedida ou de EXPORT_FORMAT; (None, None) sem exportação"""
+    formato = formato or os.getenv('EXPORT_FORMAT', '')
+    if not formato:
+        return None, None
+    return formato, caminho_exportacao(formato, os.getenv('EXPORT_DIR') or './scraped_data/exportacoes')
+
+def abrir_exportacao(formato: Optional[str] = None):
+    """Exportador dos anúncios aceitos no formato pedido ou em EXPORT_FORMAT (vazio: sem exportação)"""
+    formato, caminho = destino_exportacao(formato)
+    return FORMATOS[formato](caminho) if formato else None
+
 # Modelos Pydantic
 class YearRange(BaseModel):
     min: Optional[str] = None
@@ -43,55 +89,90 @@ class SearchData(BaseModel):
     price: Optional[PriceRange] = None
     engine_left_time_min: Optional[str] = "0"
     engine_left_time_max: Optional[str] = "1000000000"
+    ordenar: Optional[str] = Field(None, pattern=f"^-?({'|'.join(ranking.ORDENACOES)})$")
+    limite: Optional[int] = Field(None, ge=1)
 
 class MotorHoras(BaseModel):
-    horas: Optional[str] = None
-    status: Optional[str] = None
+    horas: Optional[float] = None
+    status: Optional[StatusMotor] = None
 
 class ScrapingResult(BaseModel):
     url: Optional[str] = None
     titulo: Optional[str] = None
-    preco: Optional[str] = None
+    preco: Optional[float] = None
+    moeda: Optional[str] = None
     localizacao: Optional[str] = None
-    ano: Optional[str] = None
+    ano: Optional[int] = None
     fabricante: Optional[str] = None
     modelo: Optional[str] = None
-    motor_1_left: Optional[str] = None
-    motor_2_left: Optional[str] = None
-    horas_totais: Optional[str] = None
+    motor_1_left: Optional[float] = None
+    motor_2_left: Optional[float] = None
+    horas_totais: Optional[float] = None
     motor_1_horas: Optional[MotorHoras] = None
     motor_2_horas: Optional[MotorHoras] = None
-    motor_1_tbo: Optional[str] = None
-    motor_2_tbo: Optional[str] = None
+    motor_1_tbo: Optional[float] = None
+    motor_2_tbo: Optional[float] = None
+    motor_tbo_referencia: Optional[float] = None
     vendedor: Optional[str] = None
     telefone: Optional[str] = None
 
+class ResultadoBusca(BaseModel):
+    busca: SearchData
+    resultados: List[ScrapingResult]
+
+class JobStatus(BaseModel):
+    id: str
+    status: str
+    progresso: Dict[str, int]
+    criado_em: float
+    iniciado_em: Optional[float] = None
+    finalizado_em: Optional[float] = None
+    erro: Optional[str] = None
+    total_resultados: Optional[int] = None
+    arquivo_exportado: Optional[str] = None
+
+def montar_search_datas(search_data: SearchData) -> dict:
+    """Converte o modelo da requisição no dicionário usado pelo scraper"""
+    return {
+        'manufacturer': search_data.manufacturer,
+        'model': search_data.model,
+        'country': search_data.country,
+        'year': {
+            "min": search_data.year.min if search_data.year else None,
+            "max": search_data.year.max if search_data.year else None
+        },
+        'price': {
+            "min": search_data.price.min if search_data.price else None,
+            "max": search_data.price.max if search_data.price else None
+        },
+        'engine_left_time_min': search_data.engine_left_time_min,
+        'engine_left_time_max': search_data.engine_left_time_max,
+        'ordenar': search_data.ordenar,
+        'limite': search_data.limite,
+    }
+
 @app.post("/scrape", response_model=List[ScrapingResult])
-async def scrape_aircraft_data(search_data: SearchData):
+async def scrape_aircraft_data(search_data: SearchData, response: Response,
+                               exportar: Optional[str] = Query(None, pattern=PADRAO_EXPORTACAO)):
     """
-    Endpoint para realizar web scraping baseado nos dados de pesquisa
+    Endpoint para realizar web scraping baseado nos dados de pesquisa.
+    Com ?exportar=parquet|csv|ndjson (ou EXPORT_FORMAT) os resultados também
+    são gravados em EXPORT_DIR; o caminho vem no cabeçalho X-Export-File.
     """
     try:
         logger.info(f"Iniciando scraping com dados: {search_data}")
 
-        search_datas = {
-            'manufacturer': search_data.manufacturer,
-            'model': search_data.model,
-            'country': search_data.country,
-            'year': {
-                "min": search_data.year.min if search_data.year else None,
-                "max": search_data.year.max if search_data.year else None
-            },
-            'price': {
-                "min": search_data.price.min if search_data.price else None,
-                "max": search_data.price.max if search_data.price else None
-            },
-            'engine_left_time_min': search_data.engine_left_time_min,
-            'engine_left_time_max': search_data.engine_left_time_max
-        }
+        search_datas = montar_search_datas(search_data)
+        exportador = abrir_exportacao(exportar)
         
         # Aqui você chama sua função de scraping existente
-        results = await execute_scraping(search_datas)
+        try:
+            results = await execute_scraping(search_datas, exportador=exportador)
+        finally:
+            if exportador:
+                exportador.fechar()
+        if exportador:
+            response.headers['X-Export-File'] = exportador.caminho
         
         logger.info(f"Scraping concluído. {len(results)} resultados encontrados.")
         return results
@@ -100,52 +181,396 @@ async def scrape_aircraft_data(search_data: SearchData):
         logger.error(f"Erro durante scraping: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {str(e)}")
 
-async def execute_scraping(search_datas: dict) -> List[ScrapingResult]:
-    """Função principal para executar o processo de scraping."""
+@app.post("/scrape/batch", response_model=List[ResultadoBusca])
+async def scrape_aircraft_data_batch(buscas: List[SearchData], response: Response,
+                                     exportar: Optional[str] = Query(None, pattern=PADRAO_EXPORTACAO)):
+    """
+    Executa várias buscas de uma vez: cada anúncio que aparece em mais de
+    uma busca é buscado e extraído uma única vez e entregue a todas as
+    buscas cujo filtro ele atende. A resposta segue a ordem das buscas.
+    Com ?exportar=parquet|csv|ndjson (ou EXPORT_FORMAT) os anúncios aceitos
+    por alguma busca são gravados uma vez cada em um arquivo de EXPORT_DIR,
+    cujo caminho vem no cabeçalho X-Export-File.
+    """
+    max_buscas = int(os.getenv('BATCH_MAX_SEARCHES', '50'))
+    if len(buscas) > max_buscas:
+        raise HTTPException(status_code=400, detail=f"Máximo de {max_buscas} buscas por lote")
+
+    try:
+        logger.info(f"Iniciando scraping em lote com {len(buscas)} buscas")
+
+        exportador = abrir_exportacao(exportar)
+        try:
+            resultados = await execute_scraping_lote([montar_search_datas(busca) for busca in buscas],
+                                                     exportador=exportador)
+        finally:
+            if exportador:
+                exportador.fechar()
+        if exportador:
+            response.headers['X-Export-File'] = exportador.caminho
+
+        logger.info(f"Scraping em lote concluído. {sum(map(len, resultados))} resultados distribuídos.")
+        return [{'busca': busca, 'resultados': dados} for busca, dados in zip(buscas, resultados)]
+
+    except Exception as e:
+        logger.error(f"Erro durante scraping em lote: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro interno do servidor: {str(e)}")
+
+@app.post("/scrape/stream")
+async def scrape_aircraft_data_stream(search_data: SearchData, formato: str = Query("ndjson", pattern="^(ndjson|sse)$"),
+                                      exportar: Optional[str] = Query(None, pattern=PADRAO_EXPORTACAO)):
+    """
+    Versão em streaming do /scrape: cada anúncio é enviado assim que passa no
+    filtro da busca, e a resposta termina com um registro de resumo.
+    `ordenar` e `limite` não se aplicam (os anúncios saem na ordem de chegada).
+    Formatos: NDJSON (padrão) ou Server-Sent Events (?formato=sse).
+    Com ?exportar=parquet|csv|ndjson (ou EXPORT_FORMAT) cada anúncio aceito
+    também é gravado no arquivo de exportação, cujo caminho vai no resumo.
+    """
+    logger.info(f"Iniciando scraping em streaming com dados: {search_data}")
+    search_datas = montar_search_datas(search_data)
+    exportador = abrir_exportacao(exportar)
+
+    async def eventos():
+        progresso = novo_progresso()
+        inicio = time.monotonic()
+        try:
+            async for dados in iter_scraping(search_datas, progresso=progresso):
+                if exportador:
+                    exportador.escrever(dados)
+                resultado = ScrapingResult(**dados).model_dump()
+                yield formatar_evento('resultado', resultado, formato)
+            resumo = {**progresso, 'duracao_s': round(time.monotonic() - inicio, 2)}
+            if exportador:
+                exportador.fechar()
+                resumo['arquivo_exportado'] = exportador.caminho
+            yield formatar_evento('resumo', resumo, formato)
+        except Exception as e:
+            logger.error(f"Erro durante scraping em streaming: {str(e)}")
+            yield formatar_evento('erro', {'detalhe': str(e), **progresso}, formato)
+        finally:
+            if exportador:
+                exportador.fechar()
+
+    media_type = "text/event-stream" if formato == 'sse' else "application/x-ndjson"
+    return StreamingResponse(eventos(), media_type=media_type)
+
+def formatar_evento(tipo: str, dados: dict, formato: str) -> str:
+    """Serializa um evento do stream em NDJSON ou SSE"""
+    if formato == 'sse':
+        return f"event: {tipo}\ndata: {json.dumps(dados, ensure_ascii=False)}\n\n"
+    return json.dumps({'tipo': tipo, 'dados': dados}, ensure_ascii=False) + "\n"
+
+@app.post("/jobs", response_model=JobStatus, status_code=202)
+async def criar_job(search_data: SearchData, exportar: Optional[str] = Query(None, pattern=PADRAO_EXPORTACAO)):
+    """
+    Agenda o scraping em segundo plano e retorna o id do job imediatamente.
+    Com ?exportar=parquet|csv|ndjson (ou EXPORT_FORMAT) os resultados também
+    são gravados em EXPORT_DIR; o caminho vem em `arquivo_exportado`.
+    """
+    logger.info(f"Agendando job de scraping com dados: {search_data}")
+    search_datas = montar_search_datas(search_data)
+    formato, caminho = destino_exportacao(exportar)
+
+    def executar(progresso):
+        # Aberto só quando o job roda: o job pendente cancelado no desligamento não deixa arquivo aberto
+        exportador = FORMATOS[formato](caminho) if formato else None
+        try:
+            resultados = asyncio.run(execute_scraping(search_datas, progresso=progresso, exportador=exportador))
+        finally:
+            if exportador:
+                exportador.fechar()
+        if resultados is None:
+            raise RuntimeError("A chave FIRECRAWL_API_KEY não foi encontrada.")
+        return [ScrapingResult(**dados).model_dump() for dados in resultados]
+
+    job_id = gerenciador_jobs.submeter(executar, novo_progresso(), search_datas, arquivo_exportado=caminho)
+    return gerenciador_jobs.obter(job_id)
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def status_job(job_id: str):
+    """
+    Andamento do job: links encontrados, processados e aceitos
+    """
+    job = gerenciador_jobs.obter(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
+
+@app.get("/jobs/{job_id}/results", response_model=List[ScrapingResult])
+async def resultados_job(job_id: str):
+    """
+    Resultados de um job concluído
+    """
+    status, resultados = gerenciador_jobs.resultados(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    if status != CONCLUIDO:
+        raise HTTPException(status_code=409, detail=f"Job ainda não concluído (status: {status})")
+    return resultados
+
+@app.on_event("shutdown")
+def encerrar_jobs():
+    gerenciador_jobs.desligar(aguardar=False)
+    executor_parse_compartilhado.desligar()
+
+@app.get("/cache/stats")
+async def html_cache_stats() -> Dict[str, Any]:
+    """
+    Contadores de hits/misses e ocupação do cache de HTML, do cache de buscas,
+    do histórico de anúncios (modo incremental), do repositório de anúncios
+    e do arquivo de páginas brutas
+    """
+    extras = {
+        'buscas': buscas_compartilhadas.estatisticas(),
+        'historico': historico_compartilhado.estatisticas() if historico_compartilhado else {'ativo': False},
+        'anuncios': repositorio_anuncios.estatisticas() if repositorio_anuncios else {'ativo': False},
+        'arquivo': arquivo_compartilhado.estatisticas() if arquivo_compartilhado else {'ativo': False},
+    }
+    if not cache_compartilhado:
+        return {'ativo': False, **extras}
+    return {'ativo': True, **cache_compartilhado.estatisticas(), **extras}
+
+@app.get("/listings", response_model=List[ScrapingResult])
+async def consultar_anuncios(
+    fabricante: Optional[str] = None,
+    modelo: Optional[str] = Query(None, description="Trecho do modelo (ex.: BARON)"),
+    moeda: Optional[str] = None,
+    preco_min: Optional[float] = None,
+    preco_max: Optional[float] = None,
+    ano_min: Optional[int] = None,
+    ano_max: Optional[int] = None,
+    horas_totais_min: Optional[float] = None,
+    horas_totais_max: Optional[float] = None,
+    motor_restante_min: Optional[float] = Query(None, description="Menor tempo restante entre os motores"),
+    motor_restante_max: Optional[float] = None,
+    ordenar: str = Query('-atualizado_em', pattern=f"^-?({'|'.join(ORDENACOES + ranking.METRICAS)})$"),
+    limite: int = Query(100, ge=1, le=1000),
+    deslocamento: int = Query(0, ge=0),
+):
+    """
+    Consulta os anúncios já extraídos (repositório local, sem novo scraping)
+    por fabricante, modelo e faixas de preço, ano, horas totais e horas
+    restantes do motor. As métricas derivadas (preco_por_hora_restante,
+    vida_motor) são ordenadas em memória sobre todos os anúncios filtrados.
+    """
+    if repositorio_anuncios is None:
+        raise HTTPException(status_code=503, detail="Repositório de anúncios desativado (LISTINGS_DB)")
+    filtros = dict(
+        fabricante=fabricante, modelo=modelo, moeda=moeda,
+        preco_min=preco_min, preco_max=preco_max, ano_min=ano_min, ano_max=ano_max,
+        horas_totais_min=horas_totais_min, horas_totais_max=horas_totais_max,
+        motor_restante_min=motor_restante_min, motor_restante_max=motor_restante_max,
+    )
+    if ordenar.lstrip('-') not in ranking.METRICAS:
+        return await asyncio.to_thread(
+            repositorio_anuncios.consultar, **filtros, ordenar=ordenar, limite=limite, deslocamento=deslocamento,
+        )
+
+    candidatos = await asyncio.to_thread(repositorio_anuncios.consultar, **filtros, limite=None)
+    ranqueados = ranking.filtrar_e_ranquear(candidatos, {'ordenar': ordenar, 'limite': deslocamento + limite})
+    return ranqueados[deslocamento:]
+
+@app.get("/metrics")
+def metrics():
+    """
+    Métricas no formato do Prometheus (duração por etapa, retentativas e falhas)
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/referencias")
+async def resumo_referencias() -> Dict[str, int]:
+    """
+    Quantidade de países, fabricantes e modelos de motor carregados
+    """
+    return registro.resumo()
+
+@app.post("/referencias/recarregar")
+async def recarregar_referencias() -> Dict[str, int]:
+    """
+    Relê os arquivos de dados de referência sem reiniciar o servidor
+    """
+    logger.info("Recarregando dados de referência")
+    return registro.recarregar()
+
+def passa_filtro(dados: dict, search_datas: dict) -> bool:
+    """Verifica um único anúncio contra as restrições da busca (ver ranking.mascara)"""
+    return ranking.atende(dados, search_datas)
+
+def filtrar_lote(dados_anuncios: List[dict], search_datas: dict, progresso: dict) -> List[dict]:
+    """Filtra e ranqueia de uma vez os anúncios extraídos de uma busca"""
+    with metricas.medir(metricas.FILTRO):
+        aceitos = ranking.filtrar_e_ranquear(dados_anuncios, search_datas)
+    progresso['aceitos'] += len(aceitos)
+    metricas.anuncios_processados.labels('aceito').inc(len(aceitos))
+    metricas.anuncios_processados.labels('rejeitado').inc(len(dados_anuncios) - len(aceitos))
+    return aceitos
+
+def ranqueada(search_datas: dict) -> bool:
+    """Se a busca pede ranking (`ordenar`/`limite`), que só sai com todos os anúncios extraídos"""
+    return bool(search_datas.get('ordenar')) or search_datas.get('limite') is not None
+
+def novo_progresso() -> dict:
+    """Contadores de andamento de um scraping"""
+    return {'links_encontrados': 0, 'processados': 0, 'aceitos': 0, 'falhas': 0}
+
+async def guardar_anuncio(dados: dict) -> None:
+    """Grava o anúncio extraído no repositório local (falhas não interrompem o scraping)"""
+    if repositorio_anuncios is None:
+        return
+    try:
+        with metricas.medir(metricas.PERSISTENCIA):
+            await asyncio.to_thread(repositorio_anuncios.guardar, dados)
+    except Exception as e:
+        print(f"⚠️  Falha ao gravar o anúncio no repositório: {e}")
+
+async def iter_scraping(search_datas: dict, concorrencia: Optional[int] = None, progresso: Optional[dict] = None,
+                        filtrar: bool = True):
+    """Gera cada anúncio aceito assim que ele é extraído e passa no filtro.
+
+    Os links chegam das páginas de busca por uma tarefa e cada anúncio é
+    buscado assim que seu link aparece, com até `concorrencia` em paralelo;
+    o ritmo real é definido pelo orçamento de requisições por minuto que
+    todas as instâncias do scraper compartilham. Os campos decisivos da busca
+    são avaliados antes do parse de cada anúncio (ver filter_html_data), e os
+    descartados ali não são gravados nem contam como falha. Tudo roda no event loop
+    (AsyncFirecrawlScraper), sem bloquear as outras requisições da API.
+    `progresso` (ver novo_progresso) é atualizado durante a execução.
+    Com `filtrar=False` gera todo anúncio extraído e o filtro (e a contagem
+    de aceitos) fica com quem chama, em lote (ver filtrar_lote).
+    """
+    if progresso is None:
+        progresso = novo_progresso()
 
-    print("🚀 Iniciando o scraper de aeronaves...")
     api_key = os.getenv('FIRECRAWL_API_KEY')
-    
     if not api_key:
-        print("🚨 Erro: A chave FIRECRAWL_API_KEY não foi encontrada. Verifique o seu ficheiro .env.")
-        return
+        raise RuntimeError("A chave FIRECRAWL_API_KEY não foi encontrada. Verifique o seu ficheiro .env.")
+
+    if concorrencia is None:
+        concorrencia = int(os.getenv('SCRAPER_CONCURRENCY', '3'))
+    concorrencia = max(1, concorrencia)
 
     # Crie uma instância do nosso scraper
-    scraper = FirecrawlScraper(api_key)
+    scraper = AsyncFirecrawlScraper(api_key, concorrencia=concorrencia)
 
     # 1. Construa a URL de pesquisa
     search_url = scraper.build_search_url(search_datas)
 
     if not search_url:
-        return []
-    
-    # 2. Obtenha a lista de links de anúncios individuais da página de pesquisa
-    listing_links = scraper.get_listing_links(search_url)
+        return
 
-    dados_anuncios = []
+    links = asyncio.Queue()
+    saida = asyncio.Queue()
+    FIM = object()
 
-    # 3. Itere sobre cada link e processe-o
-    if not listing_links:
-        print("Nenhum link de anúncio encontrado para processar.")
-    else:
-        print(f"✅ Encontrados {len(listing_links)} links. A iniciar o scraping individual...")
-        for i, link in enumerate(listing_links, 1):
-            print("-" * 40)
-            print(f"🔍 A processar {i}/{len(listing_links)}: {link}")
+    # 2. Os links de todas as páginas da pesquisa chegam por uma tarefa
+    async def produzir_links():
+        try:
+            async for link in scraper.iter_listing_links_async(search_url, save_to_file=True):
+                links.put_nowait(link)
+        except Exception as e:
+            print(f"Erro no scraping: {e}")
+        finally:
+            links.put_nowait(FIM)
+
+    semaforo = asyncio.Semaphore(concorrencia)
+
+    # 3. Cada link é processado assim que chega, limitado pela concorrência configurada
+    async def processar(i, link):
+        aceito = None
+        try:
+            async with semaforo:
+                print("-" * 40)
+                print(f"🔍 A processar {i}: {link}")
+                dados = await scraper.filter_html_data_async(link, True, [search_datas])
 
-            dados = scraper.filter_html_data(link, save_to_file=True)
+            if dados == DESCARTADO:
+                metricas.anuncios_processados.labels('rejeitado').inc()
+                return
+
+            if not dados:
+                print(f"❌ Falha ao extrair dados ({i})")
+                progresso['falhas'] += 1
+                metricas.anuncios_processados.labels('falha').inc()
+                return
+
+            await guardar_anuncio(dados)
+
+            if not filtrar:
+                aceito = dados
+                return
+
+            with metricas.medir(metricas.FILTRO):
+                passou = passa_filtro(dados, search_datas)
+            if passou:
+                print(f"✅ Dados extraídos com sucesso ({i})")
+                progresso['aceitos'] += 1
+                aceito = dados
+            metricas.anuncios_processados.labels('aceito' if passou else 'rejeitado').inc()
+        except (TypeError, ValueError, KeyError) as e:
+            print(f"❌ Dados inválidos para o filtro da busca ({i}): {e}")
+            progresso['falhas'] += 1
+            metricas.falhas_extracao.labels('dados_invalidos').inc()
+            metricas.anuncios_processados.labels('falha').inc()
+        finally:
+            progresso['processados'] += 1
+            await saida.put(aceito)
+
+    async def despachar():
+        tarefas = []
+        try:
+            while (link := await links.get()) is not FIM:
+                progresso['links_encontrados'] += 1
+                tarefas.append(asyncio.create_task(processar(progresso['links_encontrados'], link)))
+            # Um anúncio cancelado ou com erro inesperado não impede o fim do stream
+            await asyncio.gather(*tarefas, return_exceptions=True)
+        finally:
+            saida.put_nowait(FIM)
+
+    produtor = asyncio.create_task(produzir_links())
+    despachante = asyncio.create_task(despachar())
+    try:
+        while (dados := await saida.get()) is not FIM:
             if dados:
+                yield dados
+    finally:
+        produtor.cancel()
+        despachante.cancel()
+        await asyncio.gather(produtor, despachante, return_exceptions=True)
 
-                min_engine_left_time = float(dados['motor_1_left'])
+async def execute_scraping(search_datas: dict, concorrencia: Optional[int] = None, progresso: Optional[dict] = None,
+                           exportador=None) -> List[ScrapingResult]:
+    """Função principal para executar o processo de scraping.
 
-                if dados['motor_2_horas']['status'] != 'Desconhecido':
-                    min_engine_left_time = min(min_engine_left_time, float(dados['motor_2_left']))
+    Com `exportador` (ver utils.exportacao) cada anúncio aceito é gravado
+    nele assim que passa no filtro; com `ordenar`/`limite` o ranking só
+    existe no fim e os aceitos são gravados de uma vez, na ordem do ranking.
+    Quem chama fecha o exportador.
+    """
 
-                if min_engine_left_time >= float(search_datas['engine_left_time_min']) and min_engine_left_time <= float(search_datas['engine_left_time_max']):
-                    dados_anuncios.append(dados)
-                    print(f"✅ Dados extraídos com sucesso ({i}/{len(listing_links)})")
-            else:
-                print(f"❌ Falha ao extrair dados ({i}/{len(listing_links)})")
+    print("🚀 Iniciando o scraper de aeronaves...")
+    api_key = os.getenv('FIRECRAWL_API_KEY')
+    
+    if not api_key:
+        print("🚨 Erro: A chave FIRECRAWL_API_KEY não foi encontrada. Verifique o seu ficheiro .env.")
+        return
+
+    if progresso is None:
+        progresso = novo_progresso()
+    if ranqueada(search_datas):
+        extraidos = [dados async for dados in iter_scraping(search_datas, concorrencia, progresso, filtrar=False)]
+        dados_anuncios = filtrar_lote(extraidos, search_datas, progresso)
+        if exportador:
+            exportador.escrever_todos(dados_anuncios)
+    else:
+        dados_anuncios = []
+        async for dados in iter_scraping(search_datas, concorrencia, progresso):
+            dados_anuncios.append(dados)
+            if exportador:
+                exportador.escrever(dados)
+
+    if not progresso['links_encontrados']:
+        print("Nenhum link de anúncio encontrado para processar.")
 
     print(f"\n✅ Processo concluído! {len(dados_anuncios)} anúncios processados com sucesso.")
 
@@ -178,34 +603,143 @@ async def execute_scraping(search_datas: dict) -> List[ScrapingResult]:
             print(f"📞 Telefone: {anuncio.get('telefone', 'N/A')}")
             print(f"🔗 URL: {anuncio.get('url', 'N/A')}")
 
-    import json
-    from datetime import datetime
-    
-    if dados_anuncios:
-        # Criar diretório de resultados se não existir
-        resultados_dir = './scraped_data/resultados'
-        os.makedirs(resultados_dir, exist_ok=True)
-        
-        # Nome do arquivo com timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"resultados_{search_datas['manufacturer']}_{search_datas['model'].replace(' ', '_')}_{timestamp}.json"
-        filepath = os.path.join(resultados_dir, filename)
-
-        # Salavmento na planilha
-        # exportar_para_google_sheets(search_datas, dados_anuncios)
-        
-        # Salvar em JSON
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(dados_anuncios, f, ensure_ascii=False, indent=2)
-        
-        print(f"\n💾 Todos os dados salvos em: {filepath}")
-    
     print(f"\n✅ Processo concluído! {len(dados_anuncios)} anúncios processados com sucesso.")
 
     return dados_anuncios
 
+async def execute_scraping_lote(lista_search_datas: List[dict], concorrencia: Optional[int] = None, progresso: Optional[dict] = None,
+                                exportador=None) -> List[List[dict]]:
+    """Executa várias buscas compartilhando as requisições dos anúncios.
+
+    As URLs de todas as buscas são montadas e seus links coletados ao mesmo
+    tempo (buscas com a mesma URL canônica coletam uma vez só). Cada anúncio
+    da união dos links é buscado e extraído uma única vez; no fim, uma única
+    tabela colunar com todos os registros é filtrada por busca e o anúncio é
+    entregue a toda busca que o listou e cujas restrições ele atende.
+    Devolve, na ordem das buscas, a lista de anúncios aceitos de cada uma
+    (na ordem em que apareceram nos resultados da busca, ou na do ranking
+    pedido em `ordenar`/`limite`). Com `exportador` cada anúncio aceito por
+    alguma busca é gravado nele uma única vez, assim que passa no filtro de
+    uma das buscas que o listaram; se alguma busca pede ranking, os aceitos
+    são gravados no fim. Quem chama fecha o exportador.
+    """
+    if progresso is None:
+        progresso = novo_progresso()
+
+    api_key = os.getenv('FIRECRAWL_API_KEY')
+    if not api_key:
+        raise RuntimeError("A chave FIRECRAWL_API_KEY não foi encontrada. Verifique o seu ficheiro .env.")
+
+    if concorrencia is None:
+        concorrencia = int(os.getenv('SCRAPER_CONCURRENCY', '3'))
+    concorrencia = max(1, concorrencia)
+
+    scraper = AsyncFirecrawlScraper(api_key, concorrencia=concorrencia)
+
+    # 1. URLs de pesquisa, agrupando as buscas que geram a mesma URL
+    buscas_por_url = {}
+    for i, search_datas in enumerate(lista_search_datas):
+        search_url = scraper.build_search_url(search_datas)
+        if search_url:
+            buscas_por_url.setdefault(normalizar_url(search_url), (search_url, []))[1].append(i)
+
+    semaforo = asyncio.Semaphore(concorrencia)
+    extracoes = {}
+    links_por_busca = [[] for _ in lista_search_datas]
+    buscas_por_link = {}
+    exportados = set()
+    exportar_na_hora = exportador is not None and not any(map(ranqueada, lista_search_datas))
+
+    def exportar_se_aceito(link, dados):
+        if link in exportados:
+            return
+        if any(ranking.atende(dados, lista_search_datas[i]) for i in buscas_por_link[link]):
+            exportados.add(link)
+            exportador.escrever(dados)
+
+    # 2. Cada anúncio da união dos links é extraído uma única vez
+    async def extrair(link):
+        try:
+            async with semaforo:
+                print("-" * 40)
+                print(f"🔍 A processar {progresso['links_encontrados']}: {link}")
+                # Só é descartado antes do parse o anúncio que nenhuma busca do lote aceitaria
+                dados = await scraper.filter_html_data_async(link, True, lista_search_datas)
+            if dados == DESCARTADO:
+                metricas.anuncios_processados.labels('rejeitado').inc()
+                return None
+            if not dados:
+                print(f"❌ Falha ao extrair dados: {link}")
+                progresso['falhas'] += 1
+                metricas.anuncios_processados.labels('falha').inc()
+            else:
+                await guardar_anuncio(dados)
+                if exportar_na_hora:
+                    exportar_se_aceito(link, dados)
+            return dados
+        except Exception as e:
+            # Um anúncio com erro não derruba o lote nem as extrações já concluídas
+            print(f"❌ Erro ao processar o anúncio {link}: {e}")
+            progresso['falhas'] += 1
+            metricas.anuncios_processados.labels('falha').inc()
+            return None
+        finally:
+            progresso['processados'] += 1
+
+    async def coletar(search_url, indices):
+        try:
+            async for link in scraper.iter_listing_links_async(search_url, save_to_file=True):
+                buscas_por_link.setdefault(link, []).extend(indices)
+                if link not in extracoes:
+                    progresso['links_encontrados'] += 1
+                    extracoes[link] = asyncio.create_task(extrair(link))
+                elif exportar_na_hora and extracoes[link].done() and extracoes[link].result():
+                    # Já extraído: pode passar no filtro desta busca e não no das anteriores
+                    exportar_se_aceito(link, extracoes[link].result())
+                for i in indices:
+                    links_por_busca[i].append(link)
+        except Exception as e:
+            print(f"Erro no scraping ({search_url}): {e}")
+
+    try:
+        await asyncio.gather(*(coletar(url, indices) for url, indices in buscas_por_url.values()))
+        await asyncio.gather(*extracoes.values())
+    finally:
+        for tarefa in extracoes.values():
+            tarefa.cancel()
+
+    # 3. Uma tabela com todos os anúncios extraídos, filtrada (e ranqueada) por busca
+    extraidos = {link: tarefa.result() for link, tarefa in extracoes.items() if tarefa.result()}
+    linha = {link: j for j, link in enumerate(extraidos)}
+    registros = list(extraidos.values())
+    tabela = ranking.tabela(registros)
+
+    aceitos = []
+    exportados_no_fim = set()
+    for search_datas, links in zip(lista_search_datas, links_por_busca):
+        posicoes = [linha[link] for link in links if link in linha]
+        with metricas.medir(metricas.FILTRO):
+            selecionadas = ranking.selecionar(tabela, search_datas, posicoes)
+        progresso['aceitos'] += len(selecionadas)
+        metricas.anuncios_processados.labels('aceito').inc(len(selecionadas))
+        metricas.anuncios_processados.labels('rejeitado').inc(len(posicoes) - len(selecionadas))
+        aceitos.append([registros[j] for j in selecionadas])
+        if exportador and not exportar_na_hora:
+            for j in selecionadas:
+                if j not in exportados_no_fim:
+                    exportados_no_fim.add(j)
+                    exportador.escrever(registros[j])
+
+    print(f"\n✅ Lote concluído! {len(lista_search_datas)} buscas, {len(extracoes)} anúncios únicos, "
+          f"{progresso['aceitos']} resultados distribuídos.")
+
+    return aceitos
+
 
 if __name__ == "__main__":
+    # Para desenvolvimento: com PARSE_WORKERS > 0 cada processo do parse
+    # reimporta este arquivo (ver ExecutorParse); em produção use
+    # `python -m uvicorn main:app --app-dir src`
     import uvicorn
     host = os.getenv('SERVER_HOST', '0.0.0.0')
     port = int(os.getenv('SERVER_PORT', 8000))
@@ -1,102 +1,230 @@
 """
     Arquivo para criação/atualização de planilhas locais
+
+    As planilhas são gravadas em streaming (openpyxl write-only): as linhas
+    não ficam na memória e a largura das colunas é medida enquanto elas são
+    escritas, então exportações grandes usam memória constante. O histórico
+    de execuções recebe cada nova execução no fim, sem carregar a pasta de
+    trabalho existente.
 """
 
+import json
 import os
-import pandas as pd
+import pickle
+import tempfile
 from datetime import datetime
 
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+DIRETORIO_PLANILHAS = './planilhas/'
+ABA_CONSOLIDADA = 'Dados Consolidados'
+ABA_HISTORICO = 'Histórico'
+
+COLUNAS_PESQUISA = (
+    'Fabricante', 'Modelo', 'País', 'Ano Mínimo', 'Ano Máximo', 'Preço Mínimo', 'Preço Máximo',
+)
+COLUNAS_AERONAVES = (
+    'URL', 'Título', 'Preço', 'Moeda', 'Localização', 'Ano', 'Fabricante', 'Modelo', 'Horas Totais',
+    'Motor 1 Horas', 'Motor 1 Status', 'Motor 2 Horas', 'Motor 2 Status', 'Motor 1 TBO', 'Motor 2 TBO',
+    'Vendedor', 'Telefone', 'Descrição',
+)
+COLUNAS_HISTORICO = ('Data da Pesquisa', 'Critérios') + COLUNAS_AERONAVES
+
+
+def linha_pesquisa(dados_pesquisa):
+    """Valores da linha com os dados da pesquisa, na ordem de COLUNAS_PESQUISA"""
+    ano = dados_pesquisa.get('year') or {}
+    preco = dados_pesquisa.get('price') or {}
+    return [
+        dados_pesquisa.get('manufacturer', ''),
+        dados_pesquisa.get('model', ''),
+        dados_pesquisa.get('country', ''),
+        ano.get('min', ''),
+        ano.get('max', ''),
+        preco.get('min', ''),
+        preco.get('max', ''),
+    ]
+
+
+def linha_aeronave(aeronave):
+    """Valores da linha de uma aeronave, na ordem de COLUNAS_AERONAVES"""
+    # Campos numéricos chegam tipados (None quando não encontrados) e vão como número para a planilha
+    motor_1 = aeronave.get('motor_1_horas') or {}
+    motor_2 = aeronave.get('motor_2_horas') or {}
+    return [
+        aeronave.get('url') or '',
+        aeronave.get('titulo') or '',
+        aeronave.get('preco'),
+        aeronave.get('moeda') or '',
+        aeronave.get('localizacao') or '',
+        aeronave.get('ano'),
+        aeronave.get('fabricante') or '',
+        aeronave.get('modelo') or '',
+        aeronave.get('horas_totais'),
+        motor_1.get('horas'),
+        motor_1.get('status') or '',
+        motor_2.get('horas'),
+        motor_2.get('status') or '',
+        aeronave.get('motor_1_tbo'),
+        aeronave.get('motor_2_tbo'),
+        aeronave.get('vendedor') or '',
+        aeronave.get('telefone') or '',
+        aeronave.get('descricao') or '',
+    ]
+
+
+class PlanilhaStreaming:
+    """Aba xlsx gravada em modo write-only, com a largura das colunas medida linha a linha
+
+    O write-only só aplica larguras definidas antes da primeira linha: as
+    linhas vão para um arquivo temporário enquanto as larguras são medidas
+    e são copiadas para a planilha em `salvar`.
+    """
+
+    def __init__(self, titulo):
+        self.titulo = titulo
+        self.larguras = []
+        self.linhas = 0
+        self._temporario = tempfile.TemporaryFile()
+
+    def acrescentar(self, valores, negrito=False):
+        valores = list(valores)
+        if len(valores) > len(self.larguras):
+            self.larguras.extend([0] * (len(valores) - len(self.larguras)))
+        for coluna, valor in enumerate(valores):
+            if valor is not None and valor != '':
+                self.larguras[coluna] = max(self.larguras[coluna], len(str(valor)))
+        pickle.dump((negrito, valores), self._temporario)
+        self.linhas += 1
+
+    def _linhas(self):
+        self._temporario.seek(0)
+        while True:
+            try:
+                yield pickle.load(self._temporario)
+            except EOFError:
+                return
+
+    def salvar(self, caminho):
+        """Grava a aba em `caminho`; o arquivo só é trocado depois de escrito por completo"""
+        try:
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet(self.titulo)
+            for coluna, largura in enumerate(self.larguras, start=1):
+                # Margem de segurança, como no ajuste automático
+                ws.column_dimensions[get_column_letter(coluna)].width = largura + 2
+
+            negrito = Font(bold=True)
+            for cabecalho, valores in self._linhas():
+                if cabecalho:
+                    valores = [self._celula(ws, valor, negrito) for valor in valores]
+                ws.append(valores)
+
+            fd, temporario = tempfile.mkstemp(suffix='.xlsx', dir=os.path.dirname(caminho) or '.')
+            os.close(fd)
+            try:
+                wb.save(temporario)
+                os.replace(temporario, caminho)
+            except Exception:
+                os.remove(temporario)
+                raise
+        finally:
+            self._temporario.close()
+        return caminho
+
+    @staticmethod
+    def _celula(ws, valor, fonte):
+        celula = WriteOnlyCell(ws, value=valor)
+        celula.font = fonte
+        return celula
+
+
+def _caminho_planilha(nome_arquivo, prefixo):
+    os.makedirs(DIRETORIO_PLANILHAS, exist_ok=True)
+    if nome_arquivo is None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        nome_arquivo = f"{prefixo}_{timestamp}.xlsx"
+    return os.path.join(DIRETORIO_PLANILHAS, nome_arquivo)
+
+
 def exportar_para_google_sheets(dados_pesquisa, resultados_aeronaves, nome_arquivo='resultados_aeronaves.xlsx'):
     """
     Exporta dados de pesquisa e resultados para planilha Excel
-    
+
     Args:
         dados_pesquisa (dict): Dados da pesquisa (Manufacturer, Model, etc)
-        resultados_aeronaves (list): Lista de dicionários com dados das aeronaves
+        resultados_aeronaves (iterable): Dicionários com dados das aeronaves (lista ou gerador)
         nome_arquivo (str): Nome do arquivo de saída (opcional)
     """
+    caminho_completo = _caminho_planilha(nome_arquivo, 'resultados_aeronaves')
 
-    if not os.path.exists('./planilhas/'):
-        os.makedirs('./planilhas/')
-    
-    if nome_arquivo is None:
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        nome_arquivo = f"resultados_aeronaves_{timestamp}.xlsx"
-
-    # Caminho completo do arquivo
-    caminho_completo = os.path.join('./planilhas/', nome_arquivo)
-
-    # Preparar dados da pesquisa para planilha
-    dados_pesquisa_lista = []
-
-    linha = {
-        'Fabricante': dados_pesquisa.get('manufacturer', ''),
-        'Modelo': dados_pesquisa.get('model', ''),
-        'País': dados_pesquisa.get('country', ''),
-        'Ano Mínimo': dados_pesquisa.get('year', {}).get('min', ''),
-        'Ano Máximo': dados_pesquisa.get('year', {}).get('max', ''),
-        'Preço Mínimo': dados_pesquisa.get('price', {}).get('min', ''),
-        'Preço Máximo': dados_pesquisa.get('price', {}).get('max', '')
-    }
-    dados_pesquisa_lista.append(linha)
-    
-    # Criar DataFrame com dados da pesquisa
-    df_pesquisa = pd.DataFrame(dados_pesquisa_lista)
-    
-    # Preparar dados das aeronaves para planilha
-    dados_planilha = []
-    
+    planilha = PlanilhaStreaming(ABA_CONSOLIDADA)
+    planilha.acrescentar(COLUNAS_PESQUISA, negrito=True)
+    planilha.acrescentar(linha_pesquisa(dados_pesquisa))
+    planilha.acrescentar([])
+    planilha.acrescentar(COLUNAS_AERONAVES, negrito=True)
     for aeronave in resultados_aeronaves:
-        linha = {
-            'URL': aeronave.get('url', ''),
-            'Título': aeronave.get('titulo', ''),
-            'Preço': aeronave.get('preco', ''),
-            'Localização': aeronave.get('localizacao', ''),
-            'Ano': aeronave.get('ano', ''),
-            'Fabricante': aeronave.get('fabricante', ''),
-            'Modelo': aeronave.get('modelo', ''),
-            'Horas Totais': aeronave.get('horas_totais', ''),
-            'Motor 1 Horas': aeronave.get('motor_1_horas', {}).get('horas', ''),
-            'Motor 1 Status': aeronave.get('motor_1_horas', {}).get('status', ''),
-            'Motor 2 Horas': aeronave.get('motor_2_horas', {}).get('horas', ''),
-            'Motor 2 Status': aeronave.get('motor_2_horas', {}).get('status', ''),
-            'Motor 1 TBO': aeronave.get('motor_1_tbo', ''),
-            'Motor 2 TBO': aeronave.get('motor_2_tbo', ''),
-            'Vendedor': aeronave.get('vendedor', ''),
-            'Telefone': aeronave.get('telefone', ''),
-            'Descrição': aeronave.get('descricao', '')
-        }
-        dados_planilha.append(linha)
-    
-    df_aeronaves = pd.DataFrame(dados_planilha)
-
-    with pd.ExcelWriter(caminho_completo, engine='openpyxl') as writer:
-        # Escrever primeiro DataFrame começando na linha 0
-        df_pesquisa.to_excel(writer, sheet_name='Dados Consolidados', index=False, startrow=0)
-        
-        # Calcular onde começar o segundo DataFrame
-        # Linha inicial + número de linhas do primeiro DataFrame + 1 linha vazia
-        start_row_second = len(df_pesquisa) + 2
-        
-        # Escrever segundo DataFrame começando na posição calculada
-        df_aeronaves.to_excel(writer, sheet_name='Dados Consolidados', index=False, startrow=start_row_second)
-
-        # Aplicar o ajuste automático
-        worksheet = writer.sheets['Dados Consolidados']
-        auto_ajustar_colunas(worksheet)
-    
+        planilha.acrescentar(linha_aeronave(aeronave))
+    planilha.salvar(caminho_completo)
+
     print(f"Planilha exportada com sucesso: {caminho_completo}")
     return caminho_completo
 
+
+def acrescentar_ao_historico(dados_pesquisa, resultados_aeronaves, nome_arquivo='historico_aeronaves.xlsx'):
+    """
+    Acrescenta uma execução ao fim da planilha de histórico (criada na primeira vez)
+
+    Um xlsx não pode ser estendido no lugar: as linhas já existentes são lidas
+    em modo read-only, uma a uma, e copiadas para a nova versão antes das
+    linhas desta execução. A memória não cresce com o tamanho do histórico.
+
+    Args:
+        dados_pesquisa (dict): Dados da pesquisa, gravados como JSON em cada linha
+        resultados_aeronaves (iterable): Dicionários com dados das aeronaves
+        nome_arquivo (str): Nome do arquivo de histórico (opcional)
+    """
+    caminho_completo = _caminho_planilha(nome_arquivo, 'historico_aeronaves')
+
+    planilha = PlanilhaStreaming(ABA_HISTORICO)
+    if os.path.exists(caminho_completo):
+        wb = load_workbook(caminho_completo, read_only=True)
+        try:
+            ws = wb[ABA_HISTORICO] if ABA_HISTORICO in wb.sheetnames else wb.active
+            for numero, valores in enumerate(ws.iter_rows(values_only=True)):
+                planilha.acrescentar(valores, negrito=numero == 0)
+        finally:
+            wb.close()
+    if not planilha.linhas:
+        planilha.acrescentar(COLUNAS_HISTORICO, negrito=True)
+
+    data_pesquisa = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    criterios = json.dumps(dados_pesquisa, ensure_ascii=False)
+    novas = 0
+    for aeronave in resultados_aeronaves:
+        planilha.acrescentar([data_pesquisa, criterios] + linha_aeronave(aeronave))
+        novas += 1
+    planilha.salvar(caminho_completo)
+
+    print(f"Histórico atualizado com {novas} aeronaves: {caminho_completo}")
+    return caminho_completo
+
+
 def auto_ajustar_colunas(worksheet):
     """
     Ajusta automaticamente a largura de todas as colunas
     baseada no maior conteúdo de cada coluna
+
+    Só para abas abertas em modo normal; as planilhas exportadas aqui já
+    saem com as larguras medidas pela PlanilhaStreaming.
     """
     for column in worksheet.columns:
         max_length = 0
         column_letter = column[0].column_letter
-        
+
         for cell in column:
             try:
                 # Considerar o cabeçalho também
@@ -106,7 +234,7 @@ def auto_ajustar_colunas(worksheet):
                         max_length = cell_length
             except:
                 pass
-        
+
         # Adicionar margem de segurança
         adjusted_width = (max_length + 2)
-        worksheet.column_dimensions[column_letter].width = adjusted_width
\ No newline at end of file
+        worksheet.column_dimensions[column_letter].width = adjusted_width
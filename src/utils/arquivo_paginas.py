@@ -0,0 +1,260 @@
+"""
+    Arquivo de páginas brutas: segmentos gzip só de acréscimo, com índice
+
+    Cada página salva vira um membro gzip independente (cabeçalho JSON numa
+    linha + HTML bruto, como num WARC) acrescentado ao segmento atual; o
+    segmento é trocado ao passar de `tamanho_segmento` bytes. O índice
+    SQLite guarda URL, data, segmento, posição e tamanho de cada registro,
+    e pode ser reconstruído a partir dos segmentos. Nada é sobrescrito: cada
+    versão de uma URL fica guardada, e uma página idêntica à última versão
+    da mesma URL não é gravada de novo. Formatar o HTML fica para a leitura:
+
+        python src/utils/arquivo_paginas.py --url URL --formatar
+        python src/utils/arquivo_paginas.py --reindexar
+"""
+
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+
+# Permite rodar o arquivo direto (leitura e reindexação pela linha de comando)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache_html import normalizar_url
+
+PREFIXO_SEGMENTO = 'segmento-'
+EXTENSAO_SEGMENTO = '.gz'
+
+
+def ler_registro(caminho_segmento, deslocamento, tamanho):
+    """(cabeçalho, HTML) de um registro; função de módulo para rodar em outros processos"""
+    with open(caminho_segmento, 'rb') as f:
+        f.seek(deslocamento)
+        cabecalho, _, conteudo = gzip.decompress(f.read(tamanho)).partition(b'\n')
+    return json.loads(cabecalho), conteudo.decode('utf-8')
+
+
+class ArquivoPaginas:
+    """Páginas brutas comprimidas em segmentos só de acréscimo, indexadas por URL e data"""
+
+    def __init__(self, diretorio, tamanho_segmento=64 * 1024 * 1024, nivel_compressao=6):
+        self.diretorio = diretorio
+        self.tamanho_segmento = tamanho_segmento
+        self.nivel_compressao = nivel_compressao
+        self.caminho_indice = os.path.join(diretorio, 'indice.sqlite3')
+        self._lock = threading.Lock()
+        self.gravadas = 0
+        self.repetidas = 0
+
+        os.makedirs(diretorio, exist_ok=True)
+        numeros = [self._numero_segmento(caminho) for caminho in self._segmentos()]
+        self._segmento = max(numeros, default=1)
+
+        conn = self._conectar()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS paginas ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " url TEXT NOT NULL,"
+                " salvo_em REAL NOT NULL,"
+                " segmento INTEGER NOT NULL,"
+                " deslocamento INTEGER NOT NULL,"
+                " tamanho INTEGER NOT NULL,"
+                " hash TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_paginas_url ON paginas (url, salvo_em)")
+        finally:
+            conn.close()
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho_indice, timeout=30, isolation_level=None)
+
+    def _segmentos(self):
+        return sorted(glob.glob(os.path.join(self.diretorio, f"{PREFIXO_SEGMENTO}*{EXTENSAO_SEGMENTO}")))
+
+    def _numero_segmento(self, caminho):
+        return int(os.path.basename(caminho)[len(PREFIXO_SEGMENTO):-len(EXTENSAO_SEGMENTO)])
+
+    def _caminho_segmento(self, numero):
+        return os.path.join(self.diretorio, f"{PREFIXO_SEGMENTO}{numero:06d}{EXTENSAO_SEGMENTO}")
+
+    def _ultimo_hash(self, conn, chave):
+        linha = conn.execute(
+            "SELECT hash FROM paginas WHERE url = ? ORDER BY salvo_em DESC, id DESC LIMIT 1", (chave,)
+        ).fetchone()
+        return linha[0] if linha else None
+
+    def guardar(self, url, html_content):
+        """Acrescenta a página ao arquivo; devolve False se for igual à última versão da URL"""
+        chave = normalizar_url(url)
+        conteudo = html_content.encode('utf-8')
+        hash_html = hashlib.sha256(conteudo).hexdigest()
+
+        conn = self._conectar()
+        try:
+            if self._ultimo_hash(conn, chave) == hash_html:
+                with self._lock:
+                    self.repetidas += 1
+                return False
+
+            salvo_em = time.time()
+            cabecalho = json.dumps({'url': url, 'salvo_em': salvo_em, 'hash': hash_html}, ensure_ascii=False)
+            registro = gzip.compress(cabecalho.encode('utf-8') + b'\n' + conteudo, self.nivel_compressao)
+
+            with self._lock:
+                caminho = self._caminho_segmento(self._segmento)
+                if os.path.exists(caminho) and os.path.getsize(caminho) >= self.tamanho_segmento:
+                    self._segmento += 1
+                    caminho = self._caminho_segmento(self._segmento)
+                segmento = self._segmento
+
+            # O_APPEND: cada registro vai inteiro para o fim, mesmo com outros processos gravando
+            fd = os.open(caminho, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, registro)
+                deslocamento = os.lseek(fd, 0, os.SEEK_CUR) - len(registro)
+            finally:
+                os.close(fd)
+
+            conn.execute(
+                "INSERT INTO paginas (url, salvo_em, segmento, deslocamento, tamanho, hash)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (chave, salvo_em, segmento, deslocamento, len(registro), hash_html),
+            )
+        finally:
+            conn.close()
+
+        with self._lock:
+            self.gravadas += 1
+        return True
+
+    def ler(self, url, ate=None):
+        """HTML da versão mais recente da URL (ou da última salva até o instante `ate`)"""
+        sql = "SELECT segmento, deslocamento, tamanho FROM paginas WHERE url = ?"
+        parametros = [normalizar_url(url)]
+        if ate is not None:
+            sql += " AND salvo_em <= ?"
+            parametros.append(ate)
+        conn = self._conectar()
+        try:
+            linha = conn.execute(sql + " ORDER BY salvo_em DESC, id DESC LIMIT 1", parametros).fetchone()
+        finally:
+            conn.close()
+        if linha is None:
+            return None
+        segmento, deslocamento, tamanho = linha
+        return ler_registro(self._caminho_segmento(segmento), deslocamento, tamanho)[1]
+
+    def versoes(self, url):
+        """Datas (epoch) das versões guardadas da URL, da mais antiga para a mais nova"""
+        conn = self._conectar()
+        try:
+            linhas = conn.execute(
+                "SELECT salvo_em FROM paginas WHERE url = ? ORDER BY salvo_em, id", (normalizar_url(url),)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [linha[0] for linha in linhas]
+
+    def registros(self):
+        """Localização (URL, caminho do segmento, posição, tamanho) da versão mais recente
+        de cada URL, na ordem em que estão nos segmentos (leitura sequencial)"""
+        conn = self._conectar()
+        try:
+            linhas = conn.execute(
+                "SELECT url, segmento, deslocamento, tamanho FROM ("
+                " SELECT *, ROW_NUMBER() OVER (PARTITION BY url ORDER BY salvo_em DESC, id DESC) AS ordem"
+                " FROM paginas)"
+                " WHERE ordem = 1 ORDER BY segmento, deslocamento"
+            ).fetchall()
+        finally:
+            conn.close()
+        return [
+            (url, self._caminho_segmento(segmento), deslocamento, tamanho)
+            for url, segmento, deslocamento, tamanho in linhas
+        ]
+
+    def reindexar(self):
+        """Reconstrói o índice lendo os segmentos (ex.: após perder o arquivo do índice)"""
+        linhas = []
+        for caminho in self._segmentos():
+            segmento = self._numero_segmento(caminho)
+            with open(caminho, 'rb') as f:
+                dados = memoryview(f.read())
+            deslocamento = 0
+            while deslocamento < len(dados):
+                # Cada membro gzip é descomprimido sozinho; o que sobra é o próximo registro
+                descompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                conteudo = descompressor.decompress(dados[deslocamento:])
+                tamanho = len(dados) - deslocamento - len(descompressor.unused_data)
+                cabecalho = json.loads(conteudo.partition(b'\n')[0])
+                linhas.append((
+                    normalizar_url(cabecalho['url']), cabecalho['salvo_em'], segmento,
+                    deslocamento, tamanho, cabecalho['hash'],
+                ))
+                deslocamento += tamanho
+
+        conn = self._conectar()
+        try:
+            conn.execute("BEGIN")
+            conn.execute("DELETE FROM paginas")
+            conn.executemany(
+                "INSERT INTO paginas (url, salvo_em, segmento, deslocamento, tamanho, hash)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                sorted(linhas, key=lambda linha: linha[1]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return len(linhas)
+
+    def estatisticas(self):
+        """Páginas e URLs no índice, bytes em disco e gravações deste processo"""
+        conn = self._conectar()
+        try:
+            paginas, urls = conn.execute("SELECT COUNT(*), COUNT(DISTINCT url) FROM paginas").fetchone()
+        finally:
+            conn.close()
+        segmentos = self._segmentos()
+        return {
+            'paginas': paginas,
+            'urls': urls,
+            'segmentos': len(segmentos),
+            'bytes': sum(os.path.getsize(caminho) for caminho in segmentos),
+            'gravadas': self.gravadas,
+            'repetidas': self.repetidas,
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Arquivo de páginas brutas")
+    parser.add_argument('--diretorio', default=os.getenv('PAGE_ARCHIVE_DIR') or './scraped_data/arquivo_paginas')
+    acao = parser.add_mutually_exclusive_group(required=True)
+    acao.add_argument('--url', help="imprime a versão mais recente da página")
+    acao.add_argument('--reindexar', action='store_true', help="reconstrói o índice a partir dos segmentos")
+    parser.add_argument('--formatar', action='store_true', help="formata o HTML (prettify) ao imprimir")
+    args = parser.parse_args()
+
+    arquivo = ArquivoPaginas(args.diretorio)
+    if args.reindexar:
+        print(f"✅ {arquivo.reindexar()} páginas indexadas em {arquivo.caminho_indice}")
+    else:
+        html_content = arquivo.ler(args.url)
+        if html_content is None:
+            sys.exit(f"❌ Página não encontrada no arquivo: {args.url}")
+        if args.formatar:
+            from bs4 import BeautifulSoup
+            html_content = BeautifulSoup(html_content, 'html.parser').prettify()
+        print(html_content)
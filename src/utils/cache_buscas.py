@@ -0,0 +1,303 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+
+from utils.cache_html import normalizar_url
+
+
+class ColetaIncompleta(Exception):
+    """Levantada por `produzir()` ao fim de uma coleta em que alguma página falhou
+
+    Os links já emitidos valem para quem está lendo, mas a busca não vai
+    para o cache: a próxima busca igual coleta de novo.
+    """
+
+
+class _LiderCancelado(Exception):
+    """O líder da chamada foi cancelado: quem esperava por ele tenta de novo"""
+
+
+class SingleFlight:
+    """Junta chamadas simultâneas com a mesma chave numa única execução
+
+    A primeira chamada executa a função; as que chegam enquanto ela está em
+    andamento esperam e recebem o mesmo resultado (ou a mesma exceção). Se
+    a corrotina líder for cancelada (ex.: cliente do stream desconectou),
+    o cancelamento não passa para quem espera: a próxima vira líder e
+    executa a função de novo.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_voo = {}
+        self.coalescidas = 0
+
+    def _entrar(self, chave):
+        """(futuro, é líder) da chave; um futuro já resolvido não é reaproveitado"""
+        with self._lock:
+            futuro = self._em_voo.get(chave)
+            lider = futuro is None or futuro.done()
+            if lider:
+                futuro = self._em_voo[chave] = Future()
+            else:
+                self.coalescidas += 1
+            return futuro, lider
+
+    def _sair(self, chave, futuro):
+        with self._lock:
+            if self._em_voo.get(chave) is futuro:
+                del self._em_voo[chave]
+
+    def executar(self, chave, funcao, *args, **kwargs):
+        while True:
+            futuro, lider = self._entrar(chave)
+            if not lider:
+                try:
+                    return futuro.result()
+                except _LiderCancelado:
+                    continue
+
+            try:
+                resultado = funcao(*args, **kwargs)
+                futuro.set_result(resultado)
+                return resultado
+            except BaseException as e:
+                futuro.set_exception(e)
+                raise
+            finally:
+                self._sair(chave, futuro)
+
+    async def executar_async(self, chave, funcao, *args, **kwargs):
+        """Versão assíncrona: `funcao` é uma corrotina e a espera não bloqueia o event loop
+
+        Usa o mesmo registro de chamadas em andamento da versão síncrona, então
+        threads e corrotinas pedindo a mesma chave também são juntadas.
+        """
+        while True:
+            futuro, lider = self._entrar(chave)
+            if not lider:
+                try:
+                    # shield: quem espera e é cancelado não cancela o futuro dos outros
+                    return await asyncio.shield(asyncio.wrap_future(futuro))
+                except _LiderCancelado:
+                    continue
+
+            try:
+                resultado = await funcao(*args, **kwargs)
+                futuro.set_result(resultado)
+                return resultado
+            except asyncio.CancelledError:
+                futuro.set_exception(_LiderCancelado())
+                raise
+            except BaseException as e:
+                futuro.set_exception(e)
+                raise
+            finally:
+                self._sair(chave, futuro)
+
+
+class _ColetaLinks:
+    """Links de uma busca em andamento, lidos por todos os interessados conforme chegam"""
+
+    def __init__(self):
+        self.links = []
+        self.concluida = False
+        self.erro = None
+        self._condicao = threading.Condition()
+        self._esperas_async = []
+
+    def _notificar(self):
+        self._condicao.notify_all()
+        for loop, evento in self._esperas_async:
+            loop.call_soon_threadsafe(evento.set)
+
+    def adicionar(self, link):
+        with self._condicao:
+            self.links.append(link)
+            self._notificar()
+
+    def concluir(self, erro=None):
+        with self._condicao:
+            self.erro = erro
+            self.concluida = True
+            self._notificar()
+
+    def iterar(self):
+        i = 0
+        while True:
+            with self._condicao:
+                self._condicao.wait_for(lambda: i < len(self.links) or self.concluida)
+                novos = self.links[i:]
+                concluida, erro = self.concluida, self.erro
+            i += len(novos)
+            yield from novos
+            if concluida and i >= len(self.links):
+                if erro is not None:
+                    raise erro
+                return
+
+    async def iterar_async(self):
+        """Como iterar(), mas espera os próximos links num asyncio.Event"""
+        espera = (asyncio.get_running_loop(), asyncio.Event())
+        with self._condicao:
+            self._esperas_async.append(espera)
+        try:
+            i = 0
+            while True:
+                with self._condicao:
+                    novos = self.links[i:]
+                    concluida, erro = self.concluida, self.erro
+                    if not novos and not concluida:
+                        espera[1].clear()
+                if not novos and not concluida:
+                    await espera[1].wait()
+                    continue
+                i += len(novos)
+                for link in novos:
+                    yield link
+                if concluida and i >= len(self.links):
+                    if erro is not None:
+                        raise erro
+                    return
+        finally:
+            with self._condicao:
+                self._esperas_async.remove(espera)
+
+
+class CacheBuscas:
+    """Cache dos links de cada busca (pela URL canônica) com TTL e single-flight
+
+    Buscas idênticas feitas ao mesmo tempo compartilham uma única coleta,
+    que roda numa thread própria: quem chega depois recebe os links já
+    encontrados e os próximos conforme forem aparecendo. Coletas completas
+    (sem erro nem ColetaIncompleta) e com resultados ficam em cache por
+    `ttl` segundos (0 desativa o cache, mantendo a junção das buscas
+    simultâneas); as entradas vencidas saem a cada nova entrada.
+    """
+
+    def __init__(self, ttl=15 * 60):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entradas = {}
+        self._em_andamento = {}
+        self._tarefas = set()
+        self.hits = 0
+        self.misses = 0
+        self.coalescidas = 0
+
+    def iterar(self, search_url, produzir, variante=None):
+        """Gera os links da busca, vindos do cache, de uma coleta em andamento ou de `produzir()`"""
+        chave = (normalizar_url(search_url), variante)
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada and time.time() - entrada[0] <= self.ttl:
+                self.hits += 1
+                links = list(entrada[1])
+                coleta = None
+            else:
+                self._entradas.pop(chave, None)
+                coleta = self._em_andamento.get(chave)
+                if coleta is not None:
+                    self.coalescidas += 1
+                else:
+                    self.misses += 1
+                    coleta = self._em_andamento[chave] = _ColetaLinks()
+                    threading.Thread(target=self._coletar, args=(chave, coleta, produzir), daemon=True).start()
+
+        if coleta is None:
+            print(f"⚡ Links da busca servidos do cache: {search_url}")
+            yield from links
+        else:
+            yield from coleta.iterar()
+
+    async def iterar_async(self, search_url, produzir, variante=None):
+        """Versão assíncrona de iterar(): `produzir()` é um gerador assíncrono
+
+        A coleta roda como uma tarefa no event loop atual (e não numa thread);
+        quem chega enquanto ela está em andamento, de qualquer thread ou
+        event loop, recebe os mesmos links.
+        """
+        chave = (normalizar_url(search_url), variante)
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada and time.time() - entrada[0] <= self.ttl:
+                self.hits += 1
+                links = list(entrada[1])
+                coleta = None
+            else:
+                self._entradas.pop(chave, None)
+                coleta = self._em_andamento.get(chave)
+                if coleta is not None:
+                    self.coalescidas += 1
+                else:
+                    self.misses += 1
+                    coleta = self._em_andamento[chave] = _ColetaLinks()
+                    tarefa = asyncio.ensure_future(self._coletar_async(chave, coleta, produzir))
+                    self._tarefas.add(tarefa)
+                    tarefa.add_done_callback(self._tarefas.discard)
+
+        if coleta is None:
+            print(f"⚡ Links da busca servidos do cache: {search_url}")
+            for link in links:
+                yield link
+        else:
+            async for link in coleta.iterar_async():
+                yield link
+
+    async def _coletar_async(self, chave, coleta, produzir):
+        erro = None
+        completa = True
+        try:
+            async for link in produzir():
+                coleta.adicionar(link)
+        except ColetaIncompleta:
+            completa = False
+        except asyncio.CancelledError:
+            # Event loop encerrado no meio da coleta: libera quem está esperando
+            erro = RuntimeError("Coleta de links cancelada")
+            raise
+        except Exception as e:
+            erro = e
+        finally:
+            self._finalizar(chave, coleta, erro, completa)
+
+    def _coletar(self, chave, coleta, produzir):
+        erro = None
+        completa = True
+        try:
+            for link in produzir():
+                coleta.adicionar(link)
+        except ColetaIncompleta:
+            completa = False
+        except Exception as e:
+            erro = e
+        self._finalizar(chave, coleta, erro, completa)
+
+    def _finalizar(self, chave, coleta, erro, completa=True):
+        with self._lock:
+            del self._em_andamento[chave]
+            if erro is None and completa and coleta.links and self.ttl > 0:
+                agora = time.time()
+                # Buscas variadas não acumulam entradas vencidas
+                self._entradas = {
+                    outra: entrada for outra, entrada in self._entradas.items() if agora - entrada[0] <= self.ttl
+                }
+                self._entradas[chave] = (agora, list(coleta.links))
+        coleta.concluir(erro)
+
+    def estatisticas(self):
+        """Contadores de uso do cache de buscas"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalescidas': self.coalescidas,
+                'entradas': len(self._entradas),
+                'em_andamento': len(self._em_andamento),
+            }
+
+    def limpar(self):
+        """Remove as buscas em cache (as coletas em andamento continuam)"""
+        with self._lock:
+            self._entradas.clear()
@@ -0,0 +1,165 @@
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+# TTL padrão por tipo de página (segundos): buscas mudam rápido, anúncios pouco
+TTL_PADRAO = {
+    'busca': 15 * 60,
+    'anuncio': 24 * 60 * 60,
+    'outro': 60 * 60,
+}
+
+
+def normalizar_url(url):
+    """Normaliza a URL para servir de chave no cache
+
+    Esquema e domínio em minúsculas, sem fragmento, sem barra final e com
+    os parâmetros da query ordenados.
+    """
+    parsed = urlparse(url.strip())
+    caminho = parsed.path.rstrip('/') or '/'
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((parsed.scheme.lower(), parsed.netloc.lower(), caminho, '', query, ''))
+
+
+def tipo_pagina(url):
+    """Classifica a URL em página de busca, de anúncio ou outra"""
+    caminho = urlparse(url).path.lower()
+    if '/listings/search' in caminho:
+        return 'busca'
+    if '/listing/' in caminho:
+        return 'anuncio'
+    return 'outro'
+
+
+class CacheHTML:
+    """Cache read-through de HTML em disco (SQLite), com TTL e despejo LRU
+
+    O HTML é guardado comprimido; quando o total passa de `tamanho_maximo`
+    bytes, as entradas acessadas há mais tempo são removidas primeiro.
+    """
+
+    def __init__(self, caminho, tamanho_maximo=200 * 1024 * 1024, ttl=None):
+        self.caminho = caminho
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = dict(TTL_PADRAO)
+        if ttl:
+            self.ttl.update(ttl)
+
+        self.hits = 0
+        self.misses = 0
+        self.despejos = 0
+        self._lock = threading.Lock()
+
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        conn = self._conectar()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS paginas ("
+                " chave TEXT PRIMARY KEY,"
+                " tipo TEXT NOT NULL,"
+                " html BLOB NOT NULL,"
+                " tamanho INTEGER NOT NULL,"
+                " criado_em REAL NOT NULL,"
+                " ultimo_acesso REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_paginas_acesso ON paginas (ultimo_acesso)")
+        finally:
+            conn.close()
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+
+    def _contar(self, campo):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+    def obter(self, url):
+        """Retorna o HTML em cache ou None se ausente/expirado"""
+        chave = normalizar_url(url)
+        agora = time.time()
+        conn = self._conectar()
+        try:
+            row = conn.execute(
+                "SELECT tipo, html, criado_em FROM paginas WHERE chave = ?", (chave,)
+            ).fetchone()
+            if row is None:
+                self._contar('misses')
+                return None
+
+            tipo, html, criado_em = row
+            if agora - criado_em > self.ttl.get(tipo, TTL_PADRAO['outro']):
+                conn.execute("DELETE FROM paginas WHERE chave = ?", (chave,))
+                self._contar('misses')
+                return None
+
+            conn.execute("UPDATE paginas SET ultimo_acesso = ? WHERE chave = ?", (agora, chave))
+            self._contar('hits')
+            return zlib.decompress(html).decode('utf-8')
+        finally:
+            conn.close()
+
+    def guardar(self, url, html_content):
+        """Guarda o HTML e aplica o despejo por tamanho"""
+        chave = normalizar_url(url)
+        dados = zlib.compress(html_content.encode('utf-8'))
+        agora = time.time()
+        conn = self._conectar()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO paginas (chave, tipo, html, tamanho, criado_em, ultimo_acesso)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (chave, tipo_pagina(url), dados, len(dados), agora, agora),
+            )
+            self._despejar(conn)
+        finally:
+            conn.close()
+
+    def _despejar(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM paginas").fetchone()[0]
+        if total <= self.tamanho_maximo:
+            return
+
+        for chave, tamanho in conn.execute(
+            "SELECT chave, tamanho FROM paginas ORDER BY ultimo_acesso ASC"
+        ).fetchall():
+            if total <= self.tamanho_maximo:
+                break
+            conn.execute("DELETE FROM paginas WHERE chave = ?", (chave,))
+            total -= tamanho
+            self._contar('despejos')
+
+    def estatisticas(self):
+        """Contadores de uso e ocupação do cache"""
+        conn = self._conectar()
+        try:
+            entradas, tamanho = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM paginas"
+            ).fetchone()
+        finally:
+            conn.close()
+
+        consultas = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'taxa_acerto': self.hits / consultas if consultas else 0.0,
+            'despejos': self.despejos,
+            'entradas': entradas,
+            'tamanho_bytes': tamanho,
+            'tamanho_maximo_bytes': self.tamanho_maximo,
+        }
+
+    def limpar(self):
+        """Remove todas as entradas"""
+        conn = self._conectar()
+        try:
+            conn.execute("DELETE FROM paginas")
+        finally:
+            conn.close()
@@ -1,7 +1,11 @@
-def engine_left_time(total_time: str, current_time: str) -> str:
-    total_time_as_float = float(total_time.strip())
-    current_time_as_float = float(current_time.strip())
+from typing import Optional
 
-    result = total_time_as_float - current_time_as_float
 
-    return f"{result:.2f}"
\ No newline at end of file
+def engine_left_time(total_time: Optional[float], current_time: Optional[float]) -> Optional[float]:
+    """Horas restantes até o TBO, ou None se faltar algum dos valores"""
+    if total_time is None or current_time is None:
+        return None
+
+    result = float(total_time) - float(current_time)
+
+    return round(result, 2)
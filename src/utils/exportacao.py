@@ -0,0 +1,214 @@
+"""
+    Exportação dos anúncios em formatos para análise: Parquet, CSV e NDJSON
+
+    Todos os formatos usam a mesma tabela plana e tipada (COLUNAS): as horas
+    de cada motor viram duas colunas (horas e status) e campo ausente é nulo.
+    A API grava cada anúncio assim que ele passa no filtro da busca; só com
+    `ordenar`/`limite` os aceitos são gravados no fim, na ordem do ranking.
+    CSV e NDJSON vão para o disco a cada linha, e o Parquet grava um row
+    group a cada `tamanho_grupo` linhas (o arquivo fica legível ao ser fechado).
+    Parquet precisa do pyarrow. Para exportar todo o repositório de anúncios:
+
+        python src/utils/exportacao.py --formato parquet
+"""
+
+import abc
+import argparse
+import csv
+import json
+import os
+import sys
+import uuid
+from datetime import datetime
+
+# Permite rodar o arquivo direto (exportação do repositório)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.repositorio_anuncios import RepositorioAnuncios
+
+# Colunas exportadas e seus tipos ('texto', 'real' ou 'inteiro')
+COLUNAS = (
+    ('url', 'texto'),
+    ('titulo', 'texto'),
+    ('preco', 'real'),
+    ('moeda', 'texto'),
+    ('localizacao', 'texto'),
+    ('ano', 'inteiro'),
+    ('fabricante', 'texto'),
+    ('modelo', 'texto'),
+    ('horas_totais', 'real'),
+    ('motor_1_horas', 'real'),
+    ('motor_1_status', 'texto'),
+    ('motor_1_left', 'real'),
+    ('motor_1_tbo', 'real'),
+    ('motor_2_horas', 'real'),
+    ('motor_2_status', 'texto'),
+    ('motor_2_left', 'real'),
+    ('motor_2_tbo', 'real'),
+    ('motor_tbo_referencia', 'real'),
+    ('vendedor', 'texto'),
+    ('telefone', 'texto'),
+)
+NOMES_COLUNAS = tuple(nome for nome, _ in COLUNAS)
+
+
+def linha(registro):
+    """Registro tipado (ver extracao.normalizar_registro) como linha plana da exportação"""
+    valores = {nome: registro.get(nome) for nome in NOMES_COLUNAS}
+    for motor in ('motor_1', 'motor_2'):
+        horas = registro.get(f'{motor}_horas') or {}
+        status = horas.get('status')
+        valores[f'{motor}_horas'] = horas.get('horas')
+        # StatusMotor chega como enum na extração e como texto vindo do repositório
+        valores[f'{motor}_status'] = getattr(status, 'value', status)
+    return valores
+
+
+class Exportador(abc.ABC):
+    """Grava linhas num arquivo de exportação; use como gerenciador de contexto"""
+    formato = None
+    extensao = None
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.linhas = 0
+        self.fechado = False
+
+    def escrever(self, registro):
+        self._escrever(linha(registro))
+        self.linhas += 1
+
+    def escrever_todos(self, registros):
+        for registro in registros:
+            self.escrever(registro)
+        return self.linhas
+
+    @abc.abstractmethod
+    def _escrever(self, valores):
+        """Grava uma linha (dicionário na ordem de NOMES_COLUNAS)"""
+
+    def fechar(self):
+        """Termina o arquivo; chamadas repetidas não fazem nada"""
+        if not self.fechado:
+            self.fechado = True
+            self._fechar()
+
+    @abc.abstractmethod
+    def _fechar(self):
+        """Grava o que estiver pendente e fecha o arquivo"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+
+
+class ExportadorNDJSON(Exportador):
+    """Um objeto JSON por linha, números como números e ausentes como null"""
+    formato = 'ndjson'
+    extensao = '.ndjson'
+
+    def __init__(self, caminho):
+        super().__init__(caminho)
+        self._arquivo = open(caminho, 'w', encoding='utf-8')
+
+    def _escrever(self, valores):
+        self._arquivo.write(json.dumps(valores, ensure_ascii=False) + '\n')
+        self._arquivo.flush()
+
+    def _fechar(self):
+        self._arquivo.close()
+
+
+class ExportadorCSV(Exportador):
+    """CSV com cabeçalho; campo ausente vira célula vazia"""
+    formato = 'csv'
+    extensao = '.csv'
+
+    def __init__(self, caminho):
+        super().__init__(caminho)
+        self._arquivo = open(caminho, 'w', encoding='utf-8', newline='')
+        self._escritor = csv.writer(self._arquivo)
+        self._escritor.writerow(NOMES_COLUNAS)
+
+    def _escrever(self, valores):
+        self._escritor.writerow(['' if valores[nome] is None else valores[nome] for nome in NOMES_COLUNAS])
+        self._arquivo.flush()
+
+    def _fechar(self):
+        self._arquivo.close()
+
+
+class ExportadorParquet(Exportador):
+    """Parquet com o esquema de COLUNAS, em row groups de `tamanho_grupo` linhas"""
+    formato = 'parquet'
+    extensao = '.parquet'
+
+    def __init__(self, caminho, tamanho_grupo=1000):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("A exportação em Parquet precisa do pacote pyarrow (pip install pyarrow)")
+        super().__init__(caminho)
+        tipos = {'texto': pa.string(), 'real': pa.float64(), 'inteiro': pa.int64()}
+        self._pa = pa
+        self._esquema = pa.schema([(nome, tipos[tipo]) for nome, tipo in COLUNAS])
+        self._escritor = pq.ParquetWriter(caminho, self._esquema)
+        self.tamanho_grupo = tamanho_grupo
+        self._grupo = {nome: [] for nome in NOMES_COLUNAS}
+
+    def _escrever(self, valores):
+        for nome in NOMES_COLUNAS:
+            self._grupo[nome].append(valores[nome])
+        if len(self._grupo['url']) >= self.tamanho_grupo:
+            self._gravar_grupo()
+
+    def _gravar_grupo(self):
+        if self._grupo['url']:
+            self._escritor.write_batch(self._pa.RecordBatch.from_pydict(self._grupo, schema=self._esquema))
+            self._grupo = {nome: [] for nome in NOMES_COLUNAS}
+
+    def _fechar(self):
+        try:
+            self._gravar_grupo()
+        finally:
+            self._escritor.close()
+
+
+FORMATOS = {classe.formato: classe for classe in (ExportadorParquet, ExportadorCSV, ExportadorNDJSON)}
+
+
+def caminho_exportacao(formato, diretorio, prefixo='anuncios'):
+    """Caminho de um arquivo novo (nome com data e sufixo único) do formato pedido em `diretorio`
+
+    O arquivo não é criado: serve para informar o destino antes de abrir o
+    exportador (ver o POST /jobs).
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação desconhecido: {formato}")
+    os.makedirs(diretorio, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return os.path.join(diretorio, f"{prefixo}_{timestamp}_{uuid.uuid4().hex[:8]}{FORMATOS[formato].extensao}")
+
+
+def criar_exportador(formato, diretorio, prefixo='anuncios'):
+    """Exportador do formato pedido num arquivo novo em `diretorio` (ver caminho_exportacao)"""
+    caminho = caminho_exportacao(formato, diretorio, prefixo)
+    return FORMATOS[formato](caminho)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Exporta o repositório de anúncios")
+    parser.add_argument('--formato', choices=sorted(FORMATOS), required=True)
+    parser.add_argument('--banco', default=os.getenv('LISTINGS_DB') or './scraped_data/anuncios.sqlite3')
+    parser.add_argument('--diretorio', default=os.getenv('EXPORT_DIR') or './scraped_data/exportacoes')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.banco):
+        sys.exit(f"❌ Repositório de anúncios não encontrado: {args.banco}")
+
+    with criar_exportador(args.formato, args.diretorio) as exportador:
+        exportador.escrever_todos(RepositorioAnuncios(args.banco).consultar(limite=None, ordenar='-atualizado_em'))
+    print(f"✅ {exportador.linhas} anúncios exportados para {exportador.caminho}")
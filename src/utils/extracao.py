@@ -0,0 +1,381 @@
+"""
+    Motor de extração dos campos de anúncios do controller.com
+
+    Os seletores CSS e as regras regex são compilados uma única vez, na
+    importação do módulo. A árvore do BeautifulSoup é percorrida uma só vez
+    e, nessa passada, cada tag é testada contra todos os seletores de todos
+    os campos, guardando o primeiro elemento de cada um (o mesmo que
+    `select_one` devolveria). As regras regex rodam pré-compiladas sobre o
+    texto e param na primeira que casar, na mesma ordem de prioridade.
+
+    Os campos decisivos para o filtro da busca (ano, motores, preço) saem
+    antes, só com regex sobre o texto (extrair_decisivos), para o anúncio
+    poder ser descartado antes do parse completo.
+
+    O registro sai tipado: preço (float) e moeda, ano (int), horas e TBO
+    (float), horas dos motores como {'horas': float, 'status': StatusMotor}
+    e None para o que não foi encontrado.
+"""
+
+import re
+from enum import Enum
+
+from bs4 import Tag
+
+from utils.engine import engine_left_time
+from utils.referencias import registro
+
+# Marcador dos registros antigos (tudo texto); hoje o campo fica None
+NAO_ENCONTRADO = 'Não encontrado'
+
+
+class StatusMotor(str, Enum):
+    """Referência das horas do motor informadas no anúncio"""
+    SMOH = 'SMOH'  # desde a última revisão geral
+    SNEW = 'SNEW'  # desde novo
+    DESCONHECIDO = 'Desconhecido'
+
+
+CAMPOS = [
+    'url', 'titulo', 'preco', 'moeda', 'localizacao', 'ano', 'fabricante', 'modelo',
+    'motor_1_left', 'motor_2_left', 'horas_totais', 'motor_1_horas',
+    'motor_2_horas', 'motor_1_tbo', 'motor_2_tbo', 'motor_tbo_referencia', 'vendedor', 'telefone',
+]
+
+TITLE_SELECTORS = ['h1', '.listing-title', '.title', '[class*="title"]']
+PRICE_SELECTORS = ['.price', '.cost', '.amount', '[class*="price"]', '[class*="cost"]']
+LOCATION_SELECTORS = [
+    'a[href*="google.com/maps"]',
+    'a[href*="maps.google.com"]',
+    'a[href*="google.com/maps/search"]'
+]
+
+PRICE_PATTERNS = [re.compile(p) for p in (r'Call\s*for\s*price', r'USD\s*\$[\d,]+', r'\$[\d,]+')]
+YEAR_PATTERN = re.compile(r'\b(19|20)\d{2}\b')
+NUMBER_PATTERN = re.compile(r'\d[\d,]*(?:\.\d+)?')
+CURRENCY_PATTERN = re.compile(r'\b([A-Z]{3})\b')
+TAG_PATTERN = re.compile(r'<[^>]+>')
+# Elemento que algum dos PRICE_SELECTORS pode escolher (busca ampla: na dúvida, casa)
+PRICE_CLASS_PATTERN = re.compile(r'class\s*=\s*["\']?[^"\'>]*?(?:price|cost|amount)', re.IGNORECASE)
+
+TIME_PATTERNS = {
+    field: [re.compile(p, re.IGNORECASE) for p in patterns]
+    for field, patterns in {
+        'horas_totais': [
+            r'Total Time[^\d]*([\d,\.]+)',
+            r'Total[^\d]*Time[^\d]*([\d,\.]+)',
+            r'Total[^\d]*([\d,\.]+)\s*Hours',
+            r'Total[^\d]*([\d,\.]+)\s*Hrs',
+            r'TT[^\d]*([\d,\.]+)',
+            r'([\d,\.]+)\s*Total Time',
+            r'Total[^\d]*([\d,\.]+)'
+        ],
+        'motor_1_horas': [
+            r'Engine 1 Time[^\d]*([\d,\.]+)\s*([A-Z]+)',  # Captura número E texto
+            r'Eng 1 Time[^\d]*([\d,\.]+)\s*([A-Z]+)',
+            r'Left Engine[^\d]*([\d,\.]+)\s*([A-Z]+)',
+            # Padrões alternativos caso o texto venha antes
+            r'Engine 1 Time\s*([A-Z]+)[^\d]*([\d,\.]+)'
+        ],
+        'motor_2_horas': [
+            r'Engine 2 Time[^\d]*([\d,\.]+)\s*([A-Z]+)',
+            r'Eng 2 Time[^\d]*([\d,\.]+)\s*([A-Z]+)',
+            r'Right Engine[^\d]*([\d,\.]+)\s*([A-Z]+)',
+            # Padrões alternativos
+            r'Engine 2 Time\s*([A-Z]+)[^\d]*([\d,\.]+)'
+        ],
+        'motor_1_tbo': [
+            r'Engine 1 TBO[^\d]*([\d,\.]+)',
+            r'Eng 1 TBO[^\d]*([\d,\.]+)',
+            r'Left Engine TBO[^\d]*([\d,\.]+)'
+        ],
+        'motor_2_tbo': [
+            r'Engine 2 TBO[^\d]*([\d,\.]+)',
+            r'Eng 2 TBO[^\d]*([\d,\.]+)',
+            r'Right Engine TBO[^\d]*([\d,\.]+)'
+        ]
+    }.items()
+}
+
+# No laço original o último padrão de contato que casa é o que fica, por
+# isso a lista está invertida e a busca para no primeiro match
+CONTACT_PATTERNS = [re.compile(p, re.IGNORECASE) for p in reversed([
+    r'Contact:([^<]+)<br/>',
+    r'Contact:\s*([^<\n]+)<br/>',
+    r'Contact:\s*([^<\n]+)(?:<br/>|$)',
+    r'Contact[^:]*:\s*([^<\n]+)'
+])]
+
+# Tenta capturar do texto dentro da tag primeiro; fallback: captura do href
+PHONE_PATTERNS = [
+    re.compile(r'Phone:.*?<a[^>]*>([^<]+)</a>'),
+    re.compile(r'Phone:.*?<a href="tel:([^"]+)"'),
+]
+
+_SELETOR = re.compile(r'^(?P<tag>[a-z0-9]+)?(?:\.(?P<classe>[\w-]+)|\[(?P<attr>[\w-]+)\*="(?P<valor>[^"]*)"\])?$')
+_NAO_ESPACO = re.compile(r'[^ \t\r\n\f]+')
+
+
+def _compilar_seletor(seletor):
+    """Converte os seletores simples usados aqui (tag, .classe, tag[attr*="valor"]) num teste sobre a tag"""
+    partes = _SELETOR.match(seletor)
+    if not partes:
+        raise ValueError(f"Seletor não suportado: {seletor}")
+    nome, classe, attr, valor = partes.group('tag', 'classe', 'attr', 'valor')
+
+    def teste(tag):
+        if nome and tag.name != nome:
+            return False
+        if classe:
+            classes = tag.attrs.get('class', [])
+            if isinstance(classes, str):
+                classes = _NAO_ESPACO.findall(classes)
+            if classe not in classes:
+                return False
+        if attr:
+            atual = tag.attrs.get(attr)
+            if atual is None:
+                return False
+            if not isinstance(atual, str):
+                atual = ' '.join(atual)
+            if valor not in atual:
+                return False
+        return True
+
+    return teste
+
+
+SELETORES = {
+    seletor: _compilar_seletor(seletor)
+    for seletor in dict.fromkeys(TITLE_SELECTORS + PRICE_SELECTORS + LOCATION_SELECTORS)
+}
+
+
+def primeiros_elementos(soup, seletores=SELETORES):
+    """Percorre a árvore uma única vez e devolve o primeiro elemento de cada seletor"""
+    pendentes = dict(seletores)
+    encontrados = {}
+    for node in soup.descendants:
+        if not isinstance(node, Tag):
+            continue
+        for seletor, teste in list(pendentes.items()):
+            if teste(node):
+                encontrados[seletor] = node
+                del pendentes[seletor]
+        if not pendentes:
+            break
+    return encontrados
+
+
+def _primeiro_match(patterns, texto):
+    for pattern in patterns:
+        match = pattern.search(texto)
+        if match:
+            return match
+    return None
+
+
+def numero(valor):
+    """Número contido no campo ('2,596' -> 2596.0), ou None"""
+    if valor is None or isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    match = NUMBER_PATTERN.search(str(valor))
+    return float(match.group().replace(',', '')) if match else None
+
+
+def preco_e_moeda(texto):
+    """('USD $695,000' -> (695000.0, 'USD')); 'Call for price' -> (None, None)"""
+    valor = numero(texto)
+    if valor is None:
+        return None, None
+    match = CURRENCY_PATTERN.search(texto)
+    return valor, match.group(1) if match else ('USD' if '$' in texto else None)
+
+
+def status_motor(texto):
+    """SMOH/SNEW; qualquer outra referência (ou nenhuma) vira Desconhecido"""
+    texto = (texto or '').strip().upper()
+    if texto in (StatusMotor.SMOH.value, StatusMotor.SNEW.value):
+        return texto
+    return StatusMotor.DESCONHECIDO.value
+
+
+def _horas_motor(valor):
+    return valor['horas'] if isinstance(valor, dict) else None
+
+
+def normalizar_registro(registro):
+    """Converte um registro no formato antigo (tudo texto) para os tipos atuais
+
+    Registros já tipados voltam iguais; serve para o histórico e o
+    repositório, que podem ter registros gravados antes da mudança.
+    """
+    dados = {campo: None if valor == NAO_ENCONTRADO else valor for campo, valor in registro.items()}
+
+    if isinstance(dados.get('preco'), str):
+        dados['preco'], moeda = preco_e_moeda(dados['preco'])
+        dados['moeda'] = dados.get('moeda') or moeda
+
+    if 'ano' in dados:
+        ano = numero(dados['ano'])
+        dados['ano'] = int(ano) if ano is not None else None
+    for campo in ('horas_totais', 'motor_1_left', 'motor_2_left', 'motor_1_tbo', 'motor_2_tbo', 'motor_tbo_referencia'):
+        if campo in dados:
+            dados[campo] = numero(dados[campo])
+
+    for campo in ('motor_1_horas', 'motor_2_horas'):
+        valor = dados.get(campo)
+        if isinstance(valor, dict):
+            dados[campo] = {'horas': numero(valor.get('horas')), 'status': status_motor(valor.get('status'))}
+        elif valor is not None:
+            dados[campo] = {'horas': numero(valor), 'status': StatusMotor.DESCONHECIDO.value}
+    return dados
+
+
+def sem_dados(registro):
+    """Se a extração não achou título, preço nem ano (página de bloqueio, HTML vazio...)"""
+    return all(registro.get(campo) is None for campo in ('titulo', 'preco', 'ano'))
+
+
+def extrair_decisivos(html_content):
+    """Campos baratos e decisivos para o filtro da busca, direto do texto (sem
+    montar a árvore do BeautifulSoup): ano, horas e TBO dos motores, horas
+    restantes e o preço. O preço só vem quando é o mesmo que extrair_dados
+    vai escolher: se a página tem um elemento dos PRICE_SELECTORS, o preço
+    depende da árvore e fica None (o filtro completo decide). Sem TBO no
+    anúncio, `motor_tbo_referencia` traz o TBO nominal do modelo de motor
+    citado na página, só como informação: não entra nas horas restantes."""
+    filtered_data = {}
+
+    # Ano - procura por padrão de 4 dígitos (ano)
+    year_match = YEAR_PATTERN.search(html_content)
+    filtered_data['ano'] = int(year_match.group()) if year_match else None
+
+    # Horas totais e dos motores
+    texto_sem_tags = TAG_PATTERN.sub(' ', html_content)
+
+    for field, patterns in TIME_PATTERNS.items():
+        filtered_data[field] = None
+        match = _primeiro_match(patterns, texto_sem_tags)
+        if not match:
+            continue
+        grupos = match.groups()
+        # O último padrão dos motores traz o status antes do número
+        if len(grupos) > 1 and grupos[0][:1].isalpha():
+            grupos = grupos[::-1]
+        horas = numero(grupos[0])
+
+        if len(grupos) > 1:
+            status = status_motor(grupos[1])
+            filtered_data[field] = {'horas': horas, 'status': status}
+            print(f"✅ {field}: {horas} {status}")
+        else:
+            filtered_data[field] = horas
+            print(f"✅ {field}: {horas}")
+
+    # TBO de referência pelo modelo do motor quando o anúncio não informa;
+    # o modelo pode vir de qualquer parte do texto, por isso fica à parte
+    filtered_data['motor_tbo_referencia'] = None
+    if filtered_data['motor_1_tbo'] is None:
+        tbo = registro.tbo_motor(texto_sem_tags)
+        if tbo:
+            filtered_data['motor_tbo_referencia'] = float(tbo)
+            print(f"ℹ️  TBO de referência pelo modelo do motor: {tbo}")
+
+    # Horas restantes até o TBO (None quando falta o TBO ou as horas do motor)
+    filtered_data['motor_1_left'] = engine_left_time(
+        filtered_data['motor_1_tbo'], _horas_motor(filtered_data['motor_1_horas'])
+    )
+
+    filtered_data['motor_2_left'] = None
+    motor_2 = filtered_data['motor_2_horas']
+    if isinstance(motor_2, dict) and motor_2['status'] != StatusMotor.DESCONHECIDO.value:
+        filtered_data['motor_2_left'] = engine_left_time(filtered_data['motor_2_tbo'], motor_2['horas'])
+
+    filtered_data['preco'] = None
+    if not PRICE_CLASS_PATTERN.search(html_content):
+        match = _primeiro_match(PRICE_PATTERNS, html_content)
+        if match:
+            filtered_data['preco'], _ = preco_e_moeda(match.group())
+    return filtered_data
+
+
+def extrair_dados(url, soup, html_content, decisivos=None):
+    """Extrai os campos do anúncio a partir do HTML já analisado
+
+    `decisivos` reaproveita o resultado de extrair_decisivos quando o
+    pré-filtro já o calculou.
+    """
+    if decisivos is None:
+        decisivos = extrair_decisivos(html_content)
+
+    filtered_data = dict.fromkeys(CAMPOS)
+    filtered_data['url'] = url
+
+    elementos = primeiros_elementos(soup)
+
+    # 1. Título do anúncio
+    for selector in TITLE_SELECTORS:
+        title_tag = elementos.get(selector)
+        if title_tag and title_tag.get_text(strip=True):
+            filtered_data['titulo'] = title_tag.get_text(strip=True)
+            break
+
+    # 2. Preço
+    texto_preco = None
+    for selector in PRICE_SELECTORS:
+        price_element = elementos.get(selector)
+        if price_element:
+            match = _primeiro_match(PRICE_PATTERNS, price_element.get_text(strip=True))
+            if match:
+                texto_preco = match.group()
+                break
+
+    # Se não encontrou por seletor, busca no texto completo
+    if texto_preco is None:
+        match = _primeiro_match(PRICE_PATTERNS, html_content)
+        if match:
+            texto_preco = match.group()
+
+    # "Call for price" fica sem valor
+    if texto_preco is not None:
+        filtered_data['preco'], filtered_data['moeda'] = preco_e_moeda(texto_preco)
+
+    # 3. Localização
+    for selector in LOCATION_SELECTORS:
+        location_element = elementos.get(selector)
+        if location_element and location_element.get_text(strip=True):
+            filtered_data['localizacao'] = location_element.get_text(strip=True)
+            break
+
+    # 4. Ano, horas dos motores, TBO (e o de referência) e horas restantes (o preço já saiu dos seletores)
+    filtered_data.update(
+        (campo, valor) for campo, valor in decisivos.items() if campo in filtered_data and campo != 'preco'
+    )
+
+    # 5. Fabricante e Modelo - extrai do título
+    if filtered_data['titulo']:
+        title = filtered_data['titulo'].upper()
+        encontrado = registro.encontrar_fabricante(title)
+        if encontrado:
+            filtered_data['fabricante'], fim = encontrado
+            # Tenta extrair modelo (parte após o fabricante)
+            model_part = title[fim:].strip()
+            if model_part:
+                # Pega as primeiras palavras como modelo
+                words = model_part.split()[:3]
+                filtered_data['modelo'] = ' '.join(words)
+
+    # 6. Informações do vendedor
+    match = _primeiro_match(CONTACT_PATTERNS, html_content)
+    if match:
+        filtered_data['vendedor'] = match.group(1).strip()
+
+    # 7. Telefone do vendedor
+    match = _primeiro_match(PHONE_PATTERNS, html_content)
+    if match:
+        filtered_data['telefone'] = match.group(1).strip()
+
+    return filtered_data
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from utils.cache_html import normalizar_url
+from utils.extracao import normalizar_registro
+
+
+def hash_conteudo(html_content):
+    """Hash do HTML usado para saber se o anúncio mudou"""
+    return hashlib.sha256(html_content.encode('utf-8')).hexdigest()
+
+
+class HistoricoAnuncios:
+    """Registro persistente (SQLite) dos anúncios já extraídos
+
+    Para cada URL guarda quando ela apareceu pela última vez, quando a
+    página foi buscada pela última vez, o hash do HTML e o registro
+    extraído (registros gravados no formato antigo, só com texto, são
+    convertidos para os tipos atuais na leitura). Anúncios verificados há menos de `intervalo_reverificacao`
+    segundos são devolvidos sem nova requisição; depois disso a página é
+    buscada de novo, mas só é reprocessada se o hash mudou.
+    """
+
+    def __init__(self, caminho, intervalo_reverificacao=24 * 60 * 60):
+        self.caminho = caminho
+        self.intervalo_reverificacao = intervalo_reverificacao
+
+        self.reaproveitados = 0
+        self.inalterados = 0
+        self.alterados = 0
+        self._lock = threading.Lock()
+
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        conn = self._conectar()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS anuncios ("
+                " url TEXT PRIMARY KEY,"
+                " visto_em REAL NOT NULL,"
+                " verificado_em REAL NOT NULL,"
+                " hash TEXT NOT NULL,"
+                " registro TEXT NOT NULL)"
+            )
+        finally:
+            conn.close()
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+
+    def _contar(self, campo):
+        with self._lock:
+            setattr(self, campo, getattr(self, campo) + 1)
+
+    def recente(self, url):
+        """Registro do anúncio se ele foi verificado dentro do intervalo, senão None"""
+        chave = normalizar_url(url)
+        agora = time.time()
+        conn = self._conectar()
+        try:
+            row = conn.execute(
+                "SELECT verificado_em, registro FROM anuncios WHERE url = ?", (chave,)
+            ).fetchone()
+            if row is None or agora - row[0] >= self.intervalo_reverificacao:
+                return None
+            conn.execute("UPDATE anuncios SET visto_em = ? WHERE url = ?", (agora, chave))
+        finally:
+            conn.close()
+        self._contar('reaproveitados')
+        return normalizar_registro(json.loads(row[1]))
+
+    def inalterado(self, url, hash_html):
+        """Registro guardado se o HTML buscado tem o mesmo hash, senão None"""
+        chave = normalizar_url(url)
+        agora = time.time()
+        conn = self._conectar()
+        try:
+            row = conn.execute(
+                "SELECT registro FROM anuncios WHERE url = ? AND hash = ?", (chave, hash_html)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE anuncios SET visto_em = ?, verificado_em = ? WHERE url = ?", (agora, agora, chave)
+            )
+        finally:
+            conn.close()
+        self._contar('inalterados')
+        return normalizar_registro(json.loads(row[0]))
+
+    def guardar(self, url, hash_html, registro):
+        """Guarda o registro recém-extraído do anúncio"""
+        agora = time.time()
+        conn = self._conectar()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO anuncios (url, visto_em, verificado_em, hash, registro)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (normalizar_url(url), agora, agora, hash_html, json.dumps(registro, ensure_ascii=False)),
+            )
+        finally:
+            conn.close()
+        self._contar('alterados')
+
+    def reprocessado(self, url, hash_html, registro):
+        """Troca o registro guardado pelo de uma nova extração do mesmo HTML
+
+        Só vale se o histórico ainda aponta para esse hash; não conta como
+        verificação (as datas não mudam). Devolve se o registro foi trocado.
+        """
+        conn = self._conectar()
+        try:
+            cursor = conn.execute(
+                "UPDATE anuncios SET registro = ? WHERE url = ? AND hash = ?",
+                (json.dumps(registro, ensure_ascii=False), normalizar_url(url), hash_html),
+            )
+        finally:
+            conn.close()
+        return cursor.rowcount > 0
+
+    def estatisticas(self):
+        """Contadores de reaproveitamento e tamanho do histórico"""
+        conn = self._conectar()
+        try:
+            entradas = conn.execute("SELECT COUNT(*) FROM anuncios").fetchone()[0]
+        finally:
+            conn.close()
+        return {
+            'entradas': entradas,
+            'reaproveitados': self.reaproveitados,
+            'inalterados': self.inalterados,
+            'alterados': self.alterados,
+            'intervalo_reverificacao_s': self.intervalo_reverificacao,
+        }
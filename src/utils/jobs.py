@@ -0,0 +1,99 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+PENDENTE = 'pendente'
+EXECUTANDO = 'executando'
+CONCLUIDO = 'concluido'
+ERRO = 'erro'
+
+FINALIZADOS = (CONCLUIDO, ERRO)
+
+
+class GerenciadorJobs:
+    """Executa scrapings longos em segundo plano e guarda o andamento de cada um
+
+    `submeter` devolve o id do job na hora; a função do job roda num
+    ThreadPoolExecutor e recebe o dicionário de progresso, que ela mesma
+    atualiza. Os jobs finalizados mais antigos são descartados quando
+    passam de `max_finalizados`.
+    """
+
+    def __init__(self, max_workers=2, max_finalizados=100):
+        self.max_finalizados = max_finalizados
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submeter(self, funcao, progresso, parametros=None, arquivo_exportado=None):
+        """Agenda `funcao(progresso)` e retorna o id do job
+
+        `arquivo_exportado` é o caminho do arquivo que o job vai gravar (ver
+        utils.exportacao), informado junto com o andamento.
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                'id': job_id,
+                'status': PENDENTE,
+                'parametros': parametros,
+                'progresso': progresso,
+                'criado_em': time.time(),
+                'iniciado_em': None,
+                'finalizado_em': None,
+                'erro': None,
+                'arquivo_exportado': arquivo_exportado,
+                'resultados': None,
+            }
+            self._descartar_antigos()
+        self._executor.submit(self._rodar, job_id, funcao)
+        return job_id
+
+    def _rodar(self, job_id, funcao):
+        with self._lock:
+            job = self._jobs[job_id]
+            job['iniciado_em'] = time.time()
+            job['status'] = EXECUTANDO
+        resultados, erro = None, None
+        try:
+            resultados = list(funcao(job['progresso']) or [])
+        except Exception as e:
+            print(f"❌ Job {job_id} falhou: {e}")
+            erro = str(e)
+        # Tudo de uma vez: um job finalizado sempre tem finalizado_em (ver _descartar_antigos)
+        with self._lock:
+            job['finalizado_em'] = time.time()
+            job['resultados'] = resultados
+            job['erro'] = erro
+            job['status'] = ERRO if erro is not None else CONCLUIDO
+
+    def _descartar_antigos(self):
+        # Chamado com self._lock
+        finalizados = [job for job in self._jobs.values() if job['status'] in FINALIZADOS]
+        excesso = len(finalizados) - self.max_finalizados
+        for job in sorted(finalizados, key=lambda j: j['finalizado_em'])[:max(0, excesso)]:
+            del self._jobs[job['id']]
+
+    def obter(self, job_id):
+        """Retorna um retrato do job (sem os resultados) ou None se não existir"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            retrato = {k: v for k, v in job.items() if k != 'resultados'}
+            retrato['progresso'] = dict(job['progresso'])
+            retrato['total_resultados'] = len(job['resultados']) if job['resultados'] is not None else None
+            return retrato
+
+    def resultados(self, job_id):
+        """Retorna (status, resultados); resultados só existem para jobs concluídos"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None, None
+            return job['status'], job['resultados']
+
+    def desligar(self, aguardar=True):
+        """Encerra o executor (usado no shutdown do servidor)"""
+        self._executor.shutdown(wait=aguardar, cancel_futures=True)
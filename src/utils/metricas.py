@@ -0,0 +1,81 @@
+"""
+    Métricas Prometheus do scraper
+
+    Cada etapa do processamento de um anúncio é cronometrada no histograma
+    `scraper_etapa_segundos` (rótulo `etapa`), e os contadores registram
+    retentativas por rate limit, falhas de extração, requisições ao
+    Firecrawl, recusas do circuit breaker e o destino de cada anúncio; um
+    gauge acompanha o ritmo adaptativo de requisições. O endpoint /metrics
+    da API expõe tudo no formato texto do Prometheus.
+"""
+
+from contextlib import contextmanager
+import time
+
+from prometheus_client import Counter, Gauge, Histogram
+
+ESPERA_RATE_LIMIT = 'espera_rate_limit'
+FETCH = 'fetch'
+PARSE = 'parse'
+EXTRACAO = 'extracao'
+FILTRO = 'filtro'
+PERSISTENCIA = 'persistencia'
+
+ETAPAS = (ESPERA_RATE_LIMIT, FETCH, PARSE, EXTRACAO, FILTRO, PERSISTENCIA)
+
+# Do milissegundo do filtro aos minutos de espera por cota
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+duracao_etapa = Histogram(
+    'scraper_etapa_segundos',
+    'Duração de cada etapa do scraping',
+    ['etapa'],
+    buckets=BUCKETS,
+)
+
+retentativas_rate_limit = Counter(
+    'scraper_retentativas_rate_limit',
+    'Requisições repetidas após "Rate Limit Exceeded" do Firecrawl',
+)
+
+circuito_recusas = Counter(
+    'scraper_circuito_recusas',
+    'Requisições recusadas sem ir ao Firecrawl com o circuito aberto',
+)
+
+ritmo_requisicoes = Gauge(
+    'scraper_ritmo_requisicoes_por_minuto',
+    'Ritmo atual de requisições ao Firecrawl (ajustado pelo controle AIMD)',
+)
+
+falhas_extracao = Counter(
+    'scraper_falhas_extracao',
+    'Anúncios cuja extração não produziu registro',
+    ['motivo'],
+)
+
+requisicoes_firecrawl = Counter(
+    'scraper_requisicoes_firecrawl',
+    'Requisições feitas ao Firecrawl (cada uma consome cota)',
+    ['resultado'],
+)
+
+anuncios_processados = Counter(
+    'scraper_anuncios_processados',
+    'Anúncios processados, por destino',
+    ['resultado'],
+)
+
+# Séries zeradas desde o início, para os alertas de taxa não ficarem sem dados
+for _etapa in ETAPAS:
+    duracao_etapa.labels(_etapa)
+
+
+@contextmanager
+def medir(etapa):
+    """Cronometra o bloco e registra a duração na etapa informada"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao_etapa.labels(etapa).observe(time.perf_counter() - inicio)
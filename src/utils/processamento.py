@@ -0,0 +1,190 @@
+"""
+    Parse do HTML e extração dos campos fora das threads do servidor
+
+    As funções de análise ficam no nível do módulo para poderem ser enviadas
+    a um ProcessPoolExecutor: recebem só strings (URL e HTML) e devolvem
+    dicionários, listas e números, sem objetos do BeautifulSoup. Com
+    `processos=0` o ExecutorParse roda tudo na própria thread, como antes.
+"""
+
+import asyncio
+import multiprocessing
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from utils.extracao import extrair_dados, extrair_decisivos
+from utils.ranking import pode_atender
+from utils.referencias import registro
+
+BASE_DOMAIN = "https://www.controller.com"
+
+PAGE_PARAM_PATTERN = re.compile(r'[?&]page=(\d+)', re.IGNORECASE)
+TOTAL_LISTINGS_PATTERN = re.compile(r'\bof\s+([\d,]+)\s+Listings\b', re.IGNORECASE)
+NO_LISTINGS_PATTERN = re.compile(r'No Listings Found', re.IGNORECASE)
+
+# Devolvido no lugar dos dados quando o pré-filtro descarta o anúncio (uma
+# string, para atravessar o pool de processos e comparar por igualdade)
+DESCARTADO = 'descartado'
+
+
+def analisar_anuncio(url, html_content, filtros=None):
+    """Parse e extração de um anúncio: (dados, segundos de parse, segundos de extração)
+
+    Com `filtros` (lista de buscas) os campos decisivos são extraídos
+    primeiro e, se nenhuma busca pode aceitar o anúncio, ele é descartado
+    antes do parse: os dados voltam como DESCARTADO.
+    """
+    inicio = time.perf_counter()
+    decisivos = extrair_decisivos(html_content)
+    if filtros and not pode_atender(decisivos, filtros):
+        return DESCARTADO, 0.0, time.perf_counter() - inicio
+
+    pre_filtro = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    soup = BeautifulSoup(html_content, 'html.parser')
+    meio = time.perf_counter()
+    dados = extrair_dados(url, soup, html_content, decisivos)
+    return dados, meio - inicio, pre_filtro + time.perf_counter() - meio
+
+
+def total_paginas(soup, links_por_pagina):
+    """Descobre o total de páginas da busca a partir da primeira página"""
+    paginas = [1]
+
+    # Links da paginação (?page=N)
+    for tag in soup.find_all('a', href=True):
+        match = PAGE_PARAM_PATTERN.search(tag['href'])
+        if match:
+            paginas.append(int(match.group(1)))
+
+    # Contador de resultados ("1 - 28 of 133 Listings")
+    match = TOTAL_LISTINGS_PATTERN.search(soup.get_text(' ', strip=True))
+    if match and links_por_pagina:
+        total_anuncios = int(match.group(1).replace(',', ''))
+        paginas.append(-(-total_anuncios // links_por_pagina))
+
+    return max(paginas)
+
+
+def analisar_busca(html_content, calcular_total=False):
+    """Links de uma página de resultados: (links, total de páginas ou None, segundos)"""
+    inicio = time.perf_counter()
+    soup = BeautifulSoup(html_content, 'html.parser')
+
+    # DEBUG: Verificar estrutura da página
+    print(f"📊 Título da página: {soup.title.string if soup.title else 'Não encontrado'}")
+
+    if soup.find('h1', string=NO_LISTINGS_PATTERN):
+        print("❌ Nenhum anúncio encontrado na página de pesquisa.")
+        return [], None, time.perf_counter() - inicio
+
+    # Seletor original
+    link_tags = soup.find_all('a', class_='list-listing-title-link')
+    print(f"🔍 Tentativa 1 - Classe 'list-listing-title-link': {len(link_tags)} links")
+
+    # Se não encontrar, tentar outros seletores
+    if not link_tags:
+        link_tags = soup.find_all('a', href=lambda href: href and '/listing/' in href)
+        print(f"🔍 Tentativa 2 - Links com '/listing/': {len(link_tags)} links")
+
+    if not link_tags:
+        # Buscar por qualquer link que possa ser um anúncio
+        all_links = soup.find_all('a', href=True)
+        for link in all_links:
+            href = link.get('href', '')
+            if '/listing/' in href and href.split('/listing/')[1].strip('/').replace('-', '').isalnum():
+                link_tags.append(link)
+        print(f"🔍 Tentativa 3 - Filtro por padrão de URL: {len(link_tags)} links")
+
+    # Extraindo apenas o link das tags que estão em href (sem duplicatas, na ordem da página)
+    absolut_links = {}
+    for tag in link_tags:
+        relative_link = tag.get('href')
+        relative_link += '?print=1'
+        if relative_link:
+            full_link = urljoin(BASE_DOMAIN, relative_link)
+            absolut_links[full_link] = None
+            print(f"   ✅ Link encontrado: {full_link}")
+
+    links = list(absolut_links)
+    total = total_paginas(soup, len(links)) if calcular_total and links else None
+    return links, total, time.perf_counter() - inicio
+
+
+class ExecutorParse:
+    """Roda as funções de análise num ProcessPoolExecutor (ou na thread, com 0 processos)
+
+    O pool é criado na primeira chamada, com o contexto 'spawn' para não
+    herdar por fork as threads e conexões do servidor. Se um processo
+    morrer, o pool quebrado é descartado e recriado na chamada seguinte.
+    Cada processo carrega os dados de referência ao iniciar: depois de
+    registro.recarregar() o pool é trocado por um novo na chamada seguinte.
+    Com 'spawn' cada processo também reimporta o script de entrada como
+    __mp_main__: iniciado com `python src/main.py`, cada um monta de novo o
+    app, o pool de jobs e as conexões SQLite. Por isso o servidor sobe com
+    `python -m uvicorn main:app --app-dir src`, que os processos não
+    reimportam.
+    """
+
+    def __init__(self, processos=0, contexto='spawn'):
+        self.processos = max(0, processos)
+        self.contexto = contexto
+        self._pool = None
+        self._geracao = None
+        self._lock = threading.Lock()
+
+    def _obter_pool(self):
+        antigo = None
+        with self._lock:
+            if self._pool is not None and self._geracao != registro.geracao:
+                antigo, self._pool = self._pool, None
+            if self._pool is None:
+                self._geracao = registro.geracao
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processos,
+                    mp_context=multiprocessing.get_context(self.contexto),
+                )
+            pool = self._pool
+        if antigo is not None:
+            # As análises já enviadas terminam nos processos antigos
+            antigo.shutdown(wait=False)
+        return pool
+
+    def executar(self, funcao, *args):
+        """Executa `funcao(*args)` e devolve o resultado (bloqueia só a thread atual)"""
+        if not self.processos:
+            return funcao(*args)
+        pool = self._obter_pool()
+        try:
+            return pool.submit(funcao, *args).result()
+        except BrokenProcessPool:
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            raise
+
+    async def executar_async(self, funcao, *args):
+        """Versão para código assíncrono: aguarda o resultado sem bloquear o event loop"""
+        if not self.processos:
+            return await asyncio.to_thread(funcao, *args)
+        pool = self._obter_pool()
+        try:
+            return await asyncio.wrap_future(pool.submit(funcao, *args))
+        except BrokenProcessPool:
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            raise
+
+    def desligar(self):
+        """Encerra os processos do pool"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,161 @@
+"""
+    Filtro e ranking colunar de lotes de anúncios (NumPy/pandas)
+
+    Os registros tipados viram uma tabela com uma coluna por campo numérico
+    e as restrições da busca (fabricante, faixas de ano, preço e horas
+    restantes do motor) são avaliadas de uma vez sobre as colunas,
+    sem laço por anúncio. A tabela também traz métricas derivadas para
+    ordenação:
+
+        motor_restante           menor tempo restante entre os motores
+        preco_por_hora_restante  preço / motor_restante
+        vida_motor               fração do TBO que ainda resta (motores somados)
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.referencias import registro as referencias
+
+CAMPOS_NUMERICOS = (
+    'preco', 'ano', 'horas_totais', 'motor_1_left', 'motor_2_left', 'motor_1_tbo', 'motor_2_tbo',
+)
+CAMPOS_TEXTO = ('fabricante',)
+
+# Métricas calculadas aqui (não existem como coluna no repositório)
+METRICAS = ('preco_por_hora_restante', 'vida_motor')
+
+# Colunas aceitas em `ordenar` (prefixo '-' para ordem decrescente)
+ORDENACOES = ('preco', 'ano', 'horas_totais', 'motor_restante') + METRICAS
+
+
+def tabela(registros):
+    """Tabela colunar dos registros (valores ausentes viram NaN) com as métricas derivadas"""
+    registros = list(registros)
+    colunas = {campo: np.array([r.get(campo) for r in registros], dtype=float) for campo in CAMPOS_NUMERICOS}
+    for campo in CAMPOS_TEXTO:
+        colunas[campo] = pd.array([r.get(campo) for r in registros], dtype='string')
+    df = pd.DataFrame(colunas)
+
+    restantes = df[['motor_1_left', 'motor_2_left']].to_numpy()
+    tbos = df[['motor_1_tbo', 'motor_2_tbo']].to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        df['motor_restante'] = np.fmin(restantes[:, 0], restantes[:, 1])
+        df['preco_por_hora_restante'] = np.where(df['motor_restante'] > 0, df['preco'] / df['motor_restante'], np.nan)
+        # Só entram na soma os motores com horas restantes e TBO conhecidos
+        conhecidos = ~np.isnan(restantes) & ~np.isnan(tbos)
+        soma_tbo = np.where(conhecidos, tbos, 0).sum(axis=1)
+        soma_restante = np.where(conhecidos, restantes, 0).sum(axis=1)
+        df['vida_motor'] = np.where(soma_tbo > 0, soma_restante / soma_tbo, np.nan)
+    return df
+
+
+def _numero(valor):
+    """Limite de faixa vindo da busca ('1000', 1000 ou vazio)"""
+    if valor is None or (isinstance(valor, str) and not valor.strip()):
+        return None
+    return float(valor)
+
+
+def _faixa(valores, minimo, maximo, aceita_ausente=True):
+    mascara = np.ones(len(valores), dtype=bool)
+    if minimo is not None:
+        mascara &= valores >= minimo
+    if maximo is not None:
+        mascara &= valores <= maximo
+    if aceita_ausente:
+        mascara |= np.isnan(valores)
+    return mascara
+
+
+def _fabricante(coluna, termo):
+    """Fabricante extraído igual ao da busca, os dois no nome canônico da referência"""
+    encontrado = referencias.encontrar_fabricante(termo)
+    canonico = encontrado[0] if encontrado else termo.strip().upper()
+    # Campo não extraído não elimina o anúncio: o site já aplicou o filtro na busca
+    return (coluna == canonico).fillna(True).to_numpy(dtype=bool)
+
+
+def mascara(df, search_datas):
+    """Linhas que atendem a todas as restrições da busca
+
+    Só são conferidos de novo os filtros do site que comparam valores
+    canônicos ou números: fabricante (nome canônico), ano e preço. Um campo
+    não extraído não elimina o anúncio. Modelo e país não são conferidos:
+    a URL de pesquisa já filtra por eles e os campos extraídos (modelo do
+    título, localização em texto livre) não são comparáveis com a busca.
+    A faixa de horas restantes vale para o motor com menos horas e exige
+    ao menos um tempo conhecido.
+    """
+    resultado = np.ones(len(df), dtype=bool)
+
+    if search_datas.get('manufacturer'):
+        resultado &= _fabricante(df['fabricante'], search_datas['manufacturer'])
+
+    for campo, coluna in (('year', 'ano'), ('price', 'preco')):
+        faixa = search_datas.get(campo) or {}
+        resultado &= _faixa(df[coluna].to_numpy(), _numero(faixa.get('min')), _numero(faixa.get('max')))
+
+    minimo = _numero(search_datas.get('engine_left_time_min'))
+    maximo = _numero(search_datas.get('engine_left_time_max'))
+    if minimo is not None or maximo is not None:
+        resultado &= _faixa(df['motor_restante'].to_numpy(), minimo, maximo, aceita_ausente=False)
+    return resultado
+
+
+def top_k(valores, ordenar, limite=None):
+    """Posições dos `limite` melhores valores, em ordem ('-' = decrescente; NaN por último)"""
+    chave = -valores if ordenar.startswith('-') else valores.copy()
+    chave[np.isnan(chave)] = np.inf
+    posicoes = np.arange(len(chave))
+    if limite is not None and limite < len(chave):
+        if limite <= 0:
+            return posicoes[:0]
+        # Seleção parcial em O(n); só os escolhidos são ordenados
+        posicoes = np.argpartition(chave, limite - 1)[:limite]
+    return posicoes[np.lexsort((posicoes, chave[posicoes]))]
+
+
+def selecionar(df, search_datas, posicoes=None):
+    """Posições (em df) das linhas que atendem à busca, ordenadas e cortadas conforme
+    `ordenar` e `limite` da busca; `posicoes` restringe a um subconjunto da tabela"""
+    posicoes = np.arange(len(df)) if posicoes is None else np.asarray(posicoes, dtype=int)
+    posicoes = posicoes[mascara(df, search_datas)[posicoes]]
+
+    ordenar, limite = search_datas.get('ordenar'), search_datas.get('limite')
+    if ordenar:
+        coluna = ordenar.lstrip('-')
+        if coluna not in ORDENACOES:
+            raise ValueError(f"Ordenação desconhecida: {ordenar}")
+        return posicoes[top_k(df[coluna].to_numpy()[posicoes], ordenar, limite)]
+    if limite is not None:
+        return posicoes[:limite]
+    return posicoes
+
+
+def filtrar_e_ranquear(registros, search_datas):
+    """Registros que atendem à busca, na ordem do ranking pedido (ou na original)"""
+    registros = list(registros)
+    if not registros:
+        return []
+    return [registros[p] for p in selecionar(tabela(registros), search_datas)]
+
+
+def pode_atender(decisivos, filtros):
+    """Pré-filtro com os campos de extracao.extrair_decisivos, antes do parse
+
+    Só é False quando nenhuma das buscas em `filtros` pode aceitar o anúncio.
+    Ano, preço e horas restantes valem como em `mascara`: os decisivos só
+    trazem o preço quando ele é o mesmo que a extração completa vai achar,
+    e preço ausente não elimina. O fabricante fica para o filtro completo.
+    """
+    linha = tabela([decisivos])
+    campos = ('year', 'price', 'engine_left_time_min', 'engine_left_time_max')
+    return any(
+        mascara(linha, {campo: search_datas.get(campo) for campo in campos})[0] for search_datas in filtros
+    )
+
+
+def atende(registro, search_datas):
+    """Versão de um único registro, para o caminho em streaming"""
+    return bool(mascara(tabela([registro]), search_datas)[0])
@@ -0,0 +1,311 @@
+import asyncio
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+
+
+class _EstadoMemoria:
+    """Guarda o balde de tokens na memória do processo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._estado = None
+
+    def atualizar(self, funcao):
+        with self._lock:
+            self._estado, resultado = funcao(self._estado)
+            return resultado
+
+    def limpar(self):
+        with self._lock:
+            self._estado = None
+
+
+class _EstadoSQLite:
+    """Guarda o balde de tokens num arquivo SQLite
+
+    O arquivo pode ser compartilhado por várias requisições, workers do
+    uvicorn e containers (via volume), e sobrevive a reinícios.
+    """
+
+    def __init__(self, caminho, nome):
+        self.caminho = caminho
+        self.nome = nome
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        with self._conectar() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS token_bucket ("
+                " nome TEXT PRIMARY KEY,"
+                " tokens REAL NOT NULL,"
+                " atualizado_em REAL NOT NULL)"
+            )
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+
+    def atualizar(self, funcao):
+        conn = self._conectar()
+        try:
+            # BEGIN IMMEDIATE trava a escrita: leitura e reserva são atômicas entre processos
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT tokens, atualizado_em FROM token_bucket WHERE nome = ?", (self.nome,)
+            ).fetchone()
+            novo_estado, resultado = funcao(row)
+            conn.execute(
+                "INSERT OR REPLACE INTO token_bucket (nome, tokens, atualizado_em) VALUES (?, ?, ?)",
+                (self.nome, novo_estado[0], novo_estado[1]),
+            )
+            conn.execute("COMMIT")
+            return resultado
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def limpar(self):
+        conn = self._conectar()
+        try:
+            conn.execute("DELETE FROM token_bucket WHERE nome = ?", (self.nome,))
+        finally:
+            conn.close()
+
+
+class LimitadorRequisicoes:
+    """Token bucket que distribui um orçamento de requisições por minuto
+
+    Cada chamada reserva um token; se o balde estiver vazio o saldo fica
+    negativo e a chamada espera exatamente o tempo de reposição necessário.
+    Com `caminho_estado` o saldo é persistido em SQLite e passa a ser
+    compartilhado por todos os processos que apontam para o mesmo arquivo.
+    """
+
+    def __init__(self, requisicoes_por_minuto=10, capacidade=1, caminho_estado=None, nome='firecrawl'):
+        self.definir_taxa(requisicoes_por_minuto)
+        self.capacidade = float(capacidade)
+
+        if caminho_estado:
+            self._estado = _EstadoSQLite(caminho_estado, nome)
+        else:
+            self._estado = _EstadoMemoria()
+
+    def definir_taxa(self, requisicoes_por_minuto):
+        """Muda o ritmo de reposição dos tokens (ver ControladorTaxa)"""
+        self.requisicoes_por_minuto = float(requisicoes_por_minuto)
+        self.taxa = self.requisicoes_por_minuto / 60.0  # tokens por segundo
+        self.intervalo = 1.0 / self.taxa
+
+    def reservar(self):
+        """Reserva um token e retorna quantos segundos é preciso esperar por ele"""
+        agora = time.time()
+
+        def consumir(estado):
+            if estado is None:
+                tokens, atualizado_em = self.capacidade, agora
+            else:
+                tokens, atualizado_em = estado
+            # Repor os tokens acumulados desde a última atualização
+            tokens = min(self.capacidade, tokens + max(0.0, agora - atualizado_em) * self.taxa)
+            tokens -= 1
+            espera = -tokens / self.taxa if tokens < 0 else 0.0
+            return (tokens, agora), espera
+
+        return self._estado.atualizar(consumir)
+
+    def aguardar(self):
+        """Bloqueia a thread atual até o token reservado estar disponível"""
+        espera = self.reservar()
+        if espera > 0:
+            print(f"⏳ Aguardando {espera:.1f} segundos (limite de {self.requisicoes_por_minuto:g} req/min)...")
+            time.sleep(espera)
+        return espera
+
+    async def aguardar_async(self):
+        """Como aguardar(), mas espera com asyncio.sleep sem bloquear o event loop"""
+        if isinstance(self._estado, _EstadoSQLite):
+            # A reserva no SQLite pode esperar pelo lock do arquivo: fica numa thread
+            espera = await asyncio.to_thread(self.reservar)
+        else:
+            espera = self.reservar()
+        if espera > 0:
+            print(f"⏳ Aguardando {espera:.1f} segundos (limite de {self.requisicoes_por_minuto:g} req/min)...")
+            await asyncio.sleep(espera)
+        return espera
+
+    def reset(self):
+        """Devolve o balde ao estado cheio (útil em testes)"""
+        self._estado.limpar()
+
+
+def e_rate_limit(erro):
+    """Se o erro é uma recusa por excesso de requisições (mensagem do Firecrawl ou HTTP 429)"""
+    resposta = getattr(erro, 'response', None)
+    return "Rate Limit Exceeded" in str(erro) or getattr(resposta, 'status_code', None) == 429
+
+
+def retry_after(erro):
+    """Segundos pedidos pelo servidor antes de repetir ("retry after Xs" ou cabeçalho Retry-After)"""
+    match = re.search(r'retry after (\d+)s', str(erro))
+    if match:
+        return float(match.group(1))
+    resposta = getattr(erro, 'response', None)
+    valor = getattr(resposta, 'headers', {}).get('retry-after') if resposta is not None else None
+    try:
+        return float(valor) if valor is not None else None
+    except (TypeError, ValueError):
+        # Retry-After também pode vir como data HTTP: fica o backoff exponencial
+        return None
+
+
+def status_http(erro):
+    """Status da resposta HTTP que originou o erro, ou None se o servidor não respondeu (timeout, conexão)"""
+    resposta = getattr(erro, 'response', None)
+    status = getattr(resposta, 'status_code', None) if resposta is not None else None
+    # Erros do SDK do Firecrawl trazem o status no próprio erro
+    return status if status is not None else getattr(erro, 'status_code', None)
+
+
+class CircuitoAberto(Exception):
+    """Requisição recusada sem ir ao servidor: o disjuntor está aberto"""
+
+
+class Disjuntor:
+    """Circuit breaker: após `limiar` rate limits seguidos, recusa as requisições por um tempo
+
+    Aberto, falha na hora para todas as threads e corrotinas do processo.
+    Passado `tempo_aberto` (ou o retry-after do servidor, se maior), deixa
+    passar uma requisição de sondagem: se ela passar o circuito fecha, se
+    voltar com rate limit (ou sem resposta do servidor) ele abre de novo.
+    """
+
+    def __init__(self, limiar=5, tempo_aberto=60.0):
+        self.limiar = limiar
+        self.tempo_aberto = float(tempo_aberto)
+        self._lock = threading.Lock()
+        self._falhas = 0
+        self._aberto_ate = None
+        self._sondando_desde = None
+        self.recusadas = 0
+
+    def verificar(self):
+        """Levanta CircuitoAberto se a requisição não deve sair agora"""
+        with self._lock:
+            if self._aberto_ate is None:
+                return
+            agora = time.monotonic()
+            sondagem_livre = self._sondando_desde is None or agora - self._sondando_desde > self.tempo_aberto
+            if agora >= self._aberto_ate and sondagem_livre:
+                self._sondando_desde = agora
+                return
+            self.recusadas += 1
+            restante = max(0.0, self._aberto_ate - agora)
+        raise CircuitoAberto(f"Circuito aberto por rate limit do servidor (mais {restante:.0f}s)")
+
+    def sucesso(self):
+        with self._lock:
+            self._falhas = 0
+            self._aberto_ate = None
+            self._sondando_desde = None
+
+    def falha(self, espera=None):
+        with self._lock:
+            self._falhas += 1
+            if self._falhas >= self.limiar or self._sondando_desde is not None:
+                self._aberto_ate = time.monotonic() + max(self.tempo_aberto, espera or 0.0)
+                self._sondando_desde = None
+
+    def sem_resposta(self):
+        """Erro sem resposta do servidor: reabre se era a sondagem, senão o circuito não muda"""
+        with self._lock:
+            if self._sondando_desde is not None:
+                self._aberto_ate = time.monotonic() + self.tempo_aberto
+                self._sondando_desde = None
+
+    @property
+    def aberto(self):
+        with self._lock:
+            return self._aberto_ate is not None
+
+    def reset(self):
+        self.sucesso()
+        with self._lock:
+            self.recusadas = 0
+
+
+class ControladorTaxa:
+    """Ritmo adaptativo (AIMD), retentativas limitadas com jitter e circuit breaker
+
+    Cada rate limit do servidor multiplica as requisições por minuto do
+    limitador por `reducao`; cada sucesso soma `incremento` até voltar ao
+    ritmo configurado. A espera antes de repetir respeita o retry-after do
+    servidor (também limitado a `espera_maxima`) ou, sem ele, cresce
+    exponencialmente até `espera_maxima`, e sempre ganha um acréscimo
+    aleatório para as retentativas não saírem juntas. O ritmo vale para o processo; o saldo de tokens continua
+    compartilhado pelo estado do limitador.
+    """
+
+    def __init__(self, limitador, max_tentativas=5, espera_base=5.0, espera_maxima=120.0, jitter=0.25,
+                 reducao=0.5, incremento=0.5, minimo=1.0, disjuntor=None):
+        self.limitador = limitador
+        self.max_tentativas = max(1, max_tentativas)
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.jitter = jitter
+        self.reducao = reducao
+        self.incremento = incremento
+        self.maximo = limitador.requisicoes_por_minuto
+        self.minimo = min(minimo, self.maximo)
+        self.disjuntor = disjuntor or Disjuntor()
+        self._lock = threading.Lock()
+
+    def pode_repetir(self, tentativa):
+        """Se ainda cabe outra tentativa depois da `tentativa` (contada a partir de 1)"""
+        return tentativa < self.max_tentativas
+
+    def espera(self, erro, tentativa=1):
+        """Segundos a esperar antes de repetir a `tentativa` que voltou com rate limit"""
+        pedido = self._retry_after(erro)
+        if pedido is not None:
+            base = min(self.espera_maxima, pedido + 2)  # +2 segundos de segurança
+        else:
+            base = min(self.espera_maxima, self.espera_base * 2 ** (tentativa - 1))
+        return base + random.uniform(0, base * self.jitter)
+
+    def _retry_after(self, erro):
+        # Dica do servidor limitada a espera_maxima: um cabeçalho enorme não trava a requisição por horas
+        pedido = retry_after(erro)
+        return min(self.espera_maxima, pedido) if pedido is not None else None
+
+    def verificar(self):
+        """Falha na hora (CircuitoAberto) enquanto o servidor está saturado"""
+        self.disjuntor.verificar()
+
+    def registrar_sucesso(self):
+        """Resposta normal: aumento aditivo do ritmo"""
+        self.disjuntor.sucesso()
+        with self._lock:
+            self.limitador.definir_taxa(min(self.maximo, self.limitador.requisicoes_por_minuto + self.incremento))
+
+    def registrar_erro(self, erro=None):
+        """Outro erro: o ritmo não muda; o circuito só fecha se o servidor respondeu"""
+        if status_http(erro) is not None:
+            self.disjuntor.sucesso()
+        else:
+            self.disjuntor.sem_resposta()
+
+    def registrar_rate_limit(self, erro):
+        """Rate limit: redução multiplicativa do ritmo e uma falha no disjuntor"""
+        self.disjuntor.falha(self._retry_after(erro))
+        with self._lock:
+            self.limitador.definir_taxa(max(self.minimo, self.limitador.requisicoes_por_minuto * self.reducao))
+
+    def reset(self):
+        """Volta ao ritmo configurado com o circuito fechado (útil em testes)"""
+        self.disjuntor.reset()
+        self.limitador.definir_taxa(self.maximo)
@@ -0,0 +1,145 @@
+"""
+    Dados de referência (países, fabricantes e TBO de motores)
+
+    Os arquivos JSON de `util_datas` são lidos uma única vez e convertidos
+    em índices: dicionário de países com chaves sem acento, uma regex única
+    com todos os fabricantes (e apelidos) e outra com todos os modelos de
+    motor. `recarregar()` relê os arquivos e troca os índices de uma vez,
+    então é possível editar os dados sem reiniciar o servidor.
+"""
+
+import json
+import os
+import re
+import threading
+import unicodedata
+
+DIRETORIO_PADRAO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'util_datas')
+
+ARQUIVO_PAISES = 'paises.json'
+ARQUIVO_FABRICANTES = 'fabricantes.json'
+ARQUIVO_TBO = 'tbo_motores.json'
+
+# Quantos caracteres antes do modelo do motor procurar pela marca
+JANELA_MARCA_MOTOR = 40
+
+
+def normalizar_nome(nome):
+    """Normaliza nomes para busca: minúsculas, sem acentos e com '_' no lugar de espaços e hífens"""
+    sem_acento = unicodedata.normalize('NFKD', nome.strip().lower())
+    sem_acento = ''.join(c for c in sem_acento if not unicodedata.combining(c))
+    return sem_acento.replace(' ', '_').replace('-', '_')
+
+
+def _alternativas(termos):
+    # Os termos mais longos vêm primeiro para 'BELLANCA' ganhar de 'BELL' na mesma posição
+    return '|'.join(re.escape(t) for t in sorted(termos, key=len, reverse=True))
+
+
+def _ler_json(caminho):
+    try:
+        with open(caminho, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        print(f"⚠️  Arquivo de referência não encontrado: {caminho}")
+        return {}
+    except json.JSONDecodeError:
+        print(f"⚠️  Erro ao ler JSON de referência: {caminho}. Verifique o formato.")
+        return {}
+
+
+class _Indices:
+    """Retrato imutável dos índices; trocado inteiro a cada recarga"""
+
+    def __init__(self, paises, fabricantes, tbo):
+        self.paises = {normalizar_nome(nome): codigo for nome, codigo in paises.items()}
+
+        self.fabricantes = {nome.upper(): nome.upper() for nome in fabricantes.get('fabricantes', [])}
+        self.fabricantes.update({
+            apelido.upper(): nome.upper() for apelido, nome in fabricantes.get('aliases', {}).items()
+        })
+        self.padrao_fabricantes = re.compile(
+            rf"(?<![A-Z0-9])(?:{_alternativas(self.fabricantes)})(?![A-Z0-9])"
+        ) if self.fabricantes else None
+
+        # modelo -> {marca: tbo}
+        self.tbo = {}
+        for marca, modelos in tbo.items():
+            if marca.startswith('_'):
+                continue
+            for modelo, horas in modelos.items():
+                self.tbo.setdefault(modelo.upper(), {})[marca.upper()] = int(horas)
+        self.padrao_motores = re.compile(
+            rf"(?<![A-Z0-9-])({_alternativas(self.tbo)})(?![A-Z0-9])", re.IGNORECASE
+        ) if self.tbo else None
+
+
+class RegistroReferencias:
+    """Índices dos dados de referência, carregados uma vez e recarregáveis"""
+
+    def __init__(self, diretorio=DIRETORIO_PADRAO):
+        self.diretorio = diretorio
+        self._lock = threading.Lock()
+        self._indices = None
+        # Muda a cada recarga; quem copia os índices para outros processos compara (ver ExecutorParse)
+        self.geracao = 0
+        self.recarregar()
+
+    def recarregar(self):
+        """Relê os arquivos JSON e substitui os índices em uso"""
+        indices = _Indices(
+            _ler_json(os.path.join(self.diretorio, ARQUIVO_PAISES)),
+            _ler_json(os.path.join(self.diretorio, ARQUIVO_FABRICANTES)),
+            _ler_json(os.path.join(self.diretorio, ARQUIVO_TBO)),
+        )
+        with self._lock:
+            self._indices = indices
+            self.geracao += 1
+        return self.resumo()
+
+    def resumo(self):
+        """Quantidade de entradas de cada índice"""
+        indices = self._indices
+        return {
+            'paises': len(indices.paises),
+            'fabricantes': len(set(indices.fabricantes.values())),
+            'modelos_motor': len(indices.tbo),
+        }
+
+    def codigo_pais(self, nome_pais):
+        """Código do país no controller.com (aceita nomes com ou sem acento) ou None"""
+        if not nome_pais:
+            return None
+        return self._indices.paises.get(normalizar_nome(nome_pais))
+
+    def encontrar_fabricante(self, titulo):
+        """Primeiro fabricante citado no título: (nome canônico, posição após o nome) ou None"""
+        indices = self._indices
+        if not titulo or indices.padrao_fabricantes is None:
+            return None
+        match = indices.padrao_fabricantes.search(titulo.upper())
+        if not match:
+            return None
+        return indices.fabricantes[match.group()], match.end()
+
+    def tbo_motor(self, texto):
+        """TBO de referência do primeiro modelo de motor citado no texto, ou None
+
+        Quando o mesmo modelo existe em mais de uma marca (ex.: IO-360), a
+        marca precisa aparecer logo antes do modelo; senão não há palpite.
+        """
+        indices = self._indices
+        if not texto or indices.padrao_motores is None:
+            return None
+        for match in indices.padrao_motores.finditer(texto):
+            por_marca = indices.tbo[match.group(1).upper()]
+            if len(por_marca) == 1:
+                return next(iter(por_marca.values()))
+            antes = texto[max(0, match.start() - JANELA_MARCA_MOTOR):match.start()].upper()
+            for marca, horas in por_marca.items():
+                if marca in antes:
+                    return horas
+        return None
+
+
+registro = RegistroReferencias(os.getenv('REFERENCE_DATA_DIR') or DIRETORIO_PADRAO)
@@ -0,0 +1,203 @@
+"""
+    Repositório persistente (SQLite) dos anúncios extraídos
+
+    Cada anúncio fica numa linha por URL (a extração mais recente vence),
+    com o registro completo em JSON e colunas numéricas indexadas para as
+    consultas históricas: preço, ano, horas totais e o menor tempo restante
+    entre os motores. Substitui os arquivos JSON por execução em
+    scraped_data/resultados; os antigos podem ser importados com:
+
+        python src/utils/repositorio_anuncios.py --importar scraped_data/resultados
+"""
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# Permite rodar o arquivo direto (importação dos JSON antigos)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.extracao import normalizar_registro
+
+# Colunas aceitas em `ordenar` (prefixo '-' para ordem decrescente)
+ORDENACOES = ('preco', 'ano', 'horas_totais', 'motor_restante', 'atualizado_em')
+
+
+def colunas(registro):
+    """Valores das colunas indexadas a partir de um registro já tipado"""
+    restantes = [v for v in (registro.get('motor_1_left'), registro.get('motor_2_left')) if v is not None]
+    return {
+        'fabricante': registro.get('fabricante'),
+        'modelo': registro.get('modelo'),
+        'preco': registro.get('preco'),
+        'moeda': registro.get('moeda'),
+        'ano': registro.get('ano'),
+        'horas_totais': registro.get('horas_totais'),
+        'motor_restante': min(restantes) if restantes else None,
+    }
+
+
+class RepositorioAnuncios:
+    """Anúncios por URL com colunas numéricas indexadas para consultas por faixa"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self.gravados = 0
+
+        diretorio = os.path.dirname(caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        conn = self._conectar()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS anuncios ("
+                " url TEXT PRIMARY KEY,"
+                " fabricante TEXT,"
+                " modelo TEXT,"
+                " preco REAL,"
+                " moeda TEXT,"
+                " ano INTEGER,"
+                " horas_totais REAL,"
+                " motor_restante REAL,"
+                " primeiro_visto REAL NOT NULL,"
+                " atualizado_em REAL NOT NULL,"
+                " registro TEXT NOT NULL)"
+            )
+            for coluna in ('preco', 'ano', 'horas_totais', 'motor_restante', 'atualizado_em'):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_anuncios_{coluna} ON anuncios ({coluna})")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_anuncios_fabricante_modelo"
+                " ON anuncios (fabricante COLLATE NOCASE, modelo COLLATE NOCASE)"
+            )
+        finally:
+            conn.close()
+
+    def _conectar(self):
+        return sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+
+    def guardar(self, registros):
+        """Insere ou atualiza (pela URL) os registros extraídos numa única transação"""
+        if isinstance(registros, dict):
+            registros = [registros]
+        agora = time.time()
+        linhas = []
+        for registro in registros:
+            if not registro or not registro.get('url'):
+                continue
+            # Os JSON antigos (e registros de antes da extração tipada) chegam só com texto
+            registro = normalizar_registro(registro)
+            c = colunas(registro)
+            linhas.append((
+                registro['url'], c['fabricante'], c['modelo'], c['preco'], c['moeda'], c['ano'],
+                c['horas_totais'], c['motor_restante'], agora, agora, json.dumps(registro, ensure_ascii=False),
+            ))
+        if not linhas:
+            return 0
+
+        conn = self._conectar()
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT INTO anuncios (url, fabricante, modelo, preco, moeda, ano, horas_totais,"
+                " motor_restante, primeiro_visto, atualizado_em, registro)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(url) DO UPDATE SET"
+                " fabricante = excluded.fabricante, modelo = excluded.modelo, preco = excluded.preco,"
+                " moeda = excluded.moeda, ano = excluded.ano, horas_totais = excluded.horas_totais,"
+                " motor_restante = excluded.motor_restante, atualizado_em = excluded.atualizado_em,"
+                " registro = excluded.registro",
+                linhas,
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        with self._lock:
+            self.gravados += len(linhas)
+        return len(linhas)
+
+    def consultar(self, fabricante=None, modelo=None, moeda=None, preco_min=None, preco_max=None,
+                  ano_min=None, ano_max=None, horas_totais_min=None, horas_totais_max=None,
+                  motor_restante_min=None, motor_restante_max=None, ordenar='-atualizado_em',
+                  limite=100, deslocamento=0):
+        """Registros que atendem aos filtros (faixas inclusivas; modelo por trecho do nome);
+        `limite=None` devolve todos"""
+        condicoes, parametros = [], []
+
+        if fabricante:
+            condicoes.append("fabricante = ? COLLATE NOCASE")
+            parametros.append(fabricante)
+        if modelo:
+            condicoes.append("modelo LIKE ?")
+            parametros.append(f"%{modelo}%")
+        if moeda:
+            condicoes.append("moeda = ? COLLATE NOCASE")
+            parametros.append(moeda)
+
+        for coluna, minimo, maximo in (
+            ('preco', preco_min, preco_max),
+            ('ano', ano_min, ano_max),
+            ('horas_totais', horas_totais_min, horas_totais_max),
+            ('motor_restante', motor_restante_min, motor_restante_max),
+        ):
+            if minimo is not None:
+                condicoes.append(f"{coluna} >= ?")
+                parametros.append(minimo)
+            if maximo is not None:
+                condicoes.append(f"{coluna} <= ?")
+                parametros.append(maximo)
+
+        coluna_ordem = ordenar.lstrip('-')
+        if coluna_ordem not in ORDENACOES:
+            raise ValueError(f"Ordenação desconhecida: {ordenar}")
+        direcao = 'DESC' if ordenar.startswith('-') else 'ASC'
+
+        sql = "SELECT registro FROM anuncios"
+        if condicoes:
+            sql += " WHERE " + " AND ".join(condicoes)
+        sql += f" ORDER BY {coluna_ordem} IS NULL, {coluna_ordem} {direcao}, url LIMIT ? OFFSET ?"
+        # LIMIT -1 no SQLite = sem limite
+        parametros += [-1 if limite is None else limite, deslocamento]
+
+        conn = self._conectar()
+        try:
+            linhas = conn.execute(sql, parametros).fetchall()
+        finally:
+            conn.close()
+        return [normalizar_registro(json.loads(linha[0])) for linha in linhas]
+
+    def importar_json(self, diretorio):
+        """Importa os arquivos resultados_*.json das execuções antigas"""
+        total = 0
+        for caminho in sorted(glob.glob(os.path.join(diretorio, '*.json'))):
+            with open(caminho, 'r', encoding='utf-8') as f:
+                total += self.guardar(json.load(f))
+        return total
+
+    def estatisticas(self):
+        """Tamanho do repositório e registros gravados por este processo"""
+        conn = self._conectar()
+        try:
+            entradas = conn.execute("SELECT COUNT(*) FROM anuncios").fetchone()[0]
+        finally:
+            conn.close()
+        return {'entradas': entradas, 'gravados': self.gravados}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Repositório local de anúncios")
+    parser.add_argument('--banco', default=os.getenv('LISTINGS_DB') or './scraped_data/anuncios.sqlite3')
+    parser.add_argument('--importar', metavar='DIRETORIO', required=True,
+                        help="diretório com os JSON de scraped_data/resultados")
+    args = parser.parse_args()
+    print(f"✅ {RepositorioAnuncios(args.banco).importar_json(args.importar)} anúncios importados para {args.banco}")
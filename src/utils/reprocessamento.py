@@ -0,0 +1,141 @@
+"""
+    Reprocessamento offline das páginas arquivadas (sem rede e sem cota)
+
+    Depois de corrigir uma regra de extração, relê a versão mais recente de
+    cada página do arquivo de páginas (arquivo_paginas) e roda de novo a
+    análise em todos os núcleos: páginas de anúncio passam por
+    analisar_anuncio e os registros novos vão para o repositório de anúncios
+    (e para o histórico, se o HTML ainda é o mesmo); páginas de busca passam
+    por analisar_busca e o resumo conta os links sem página arquivada.
+
+        python src/utils/reprocessamento.py
+        python src/utils/reprocessamento.py --processos 8 --historico ""
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Permite rodar o arquivo direto
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.arquivo_paginas import ArquivoPaginas, ler_registro
+from utils.cache_html import normalizar_url, tipo_pagina
+from utils.extracao import sem_dados
+from utils.historico_anuncios import HistoricoAnuncios
+from utils.processamento import analisar_anuncio, analisar_busca
+from utils.repositorio_anuncios import RepositorioAnuncios
+
+
+def reprocessar_pagina(caminho_segmento, deslocamento, tamanho):
+    """Lê um registro do arquivo e refaz a análise: (url, tipo, resultado, hash)
+
+    Roda nos processos do pool: recebe só a localização do registro, lê e
+    descomprime ali mesmo. `tipo` é 'anuncio', 'busca' ou 'erro' (com a
+    mensagem no lugar do resultado).
+    """
+    url = None
+    try:
+        cabecalho, html_content = ler_registro(caminho_segmento, deslocamento, tamanho)
+        url = cabecalho['url']
+        if tipo_pagina(url) == 'busca':
+            links, _, _ = analisar_busca(html_content)
+            return url, 'busca', links, cabecalho['hash']
+        dados, _, _ = analisar_anuncio(url, html_content)
+        if sem_dados(dados):
+            return url, 'erro', "página sem dados de anúncio", cabecalho['hash']
+        return url, 'anuncio', dados, cabecalho['hash']
+    except Exception as e:
+        return url, 'erro', str(e), None
+
+
+def _silenciar():
+    # As mensagens de progresso da extração, página a página, só atrasariam o
+    # lote; vão para o devnull (o processo vive o lote inteiro, nada acumula)
+    sys.stdout = open(os.devnull, 'w')
+
+
+def _resultados(registros, processos, tamanho_lote):
+    localizacoes = [registro[1:] for registro in registros]
+    if not localizacoes:
+        return
+    if not processos:
+        yield from (reprocessar_pagina(*localizacao) for localizacao in localizacoes)
+        return
+    with ProcessPoolExecutor(
+        max_workers=processos, mp_context=multiprocessing.get_context('spawn'), initializer=_silenciar,
+    ) as pool:
+        yield from pool.map(reprocessar_pagina, *zip(*localizacoes), chunksize=max(1, tamanho_lote // processos))
+
+
+def reprocessar(arquivo, repositorio=None, historico=None, processos=None, tamanho_lote=200):
+    """Reprocessa todo o arquivo de páginas e devolve o resumo da execução
+
+    `processos=None` usa todos os núcleos; 0 roda na própria thread. Os
+    registros vão para o repositório em transações de `tamanho_lote`.
+    """
+    if processos is None:
+        processos = os.cpu_count() or 1
+    inicio = time.monotonic()
+    registros = arquivo.registros()
+    arquivadas = {url for url, *_ in registros}
+    resumo = {'paginas': len(registros), 'anuncios': 0, 'buscas': 0, 'links': 0, 'links_sem_pagina': 0,
+              'falhas': 0, 'gravados': 0, 'historico_atualizado': 0}
+
+    lote = []
+
+    def gravar():
+        if repositorio is not None and lote:
+            resumo['gravados'] += repositorio.guardar(lote)
+        lote.clear()
+
+    links_vistos = set()
+    for url, tipo, resultado, hash_html in _resultados(registros, processos, tamanho_lote):
+        if tipo == 'erro':
+            print(f"❌ Falha ao reprocessar {url}: {resultado}")
+            resumo['falhas'] += 1
+        elif tipo == 'busca':
+            resumo['buscas'] += 1
+            links_vistos.update(normalizar_url(link) for link in resultado)
+        else:
+            resumo['anuncios'] += 1
+            lote.append(resultado)
+            if historico is not None and historico.reprocessado(url, hash_html, resultado):
+                resumo['historico_atualizado'] += 1
+            if len(lote) >= tamanho_lote:
+                gravar()
+    gravar()
+
+    resumo['links'] = len(links_vistos)
+    resumo['links_sem_pagina'] = len(links_vistos - arquivadas)
+    resumo['duracao_s'] = round(time.monotonic() - inicio, 2)
+    return resumo
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Reprocessa offline as páginas arquivadas")
+    parser.add_argument('--arquivo', default=os.getenv('PAGE_ARCHIVE_DIR') or './scraped_data/arquivo_paginas')
+    parser.add_argument('--banco', default=os.getenv('LISTINGS_DB', './scraped_data/anuncios.sqlite3'),
+                        help="repositório de anúncios (vazio: não grava)")
+    parser.add_argument('--historico', default=os.getenv('CRAWL_LEDGER_DB', './scraped_data/crawl_ledger.sqlite3'),
+                        help="histórico do modo incremental (vazio: não atualiza)")
+    parser.add_argument('--processos', type=int, default=None, help="padrão: todos os núcleos")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.arquivo):
+        sys.exit(f"❌ Arquivo de páginas não encontrado: {args.arquivo}")
+
+    resumo = reprocessar(
+        ArquivoPaginas(args.arquivo),
+        repositorio=RepositorioAnuncios(args.banco) if args.banco else None,
+        historico=HistoricoAnuncios(args.historico) if args.historico else None,
+        processos=args.processos,
+    )
+    por_segundo = resumo['paginas'] / resumo['duracao_s'] if resumo['duracao_s'] else resumo['paginas']
+    print(f"✅ {resumo['paginas']} páginas reprocessadas em {resumo['duracao_s']}s ({por_segundo:.1f}/s): "
+          f"{resumo['anuncios']} anúncios ({resumo['gravados']} gravados, {resumo['historico_atualizado']} "
+          f"no histórico), {resumo['buscas']} buscas ({resumo['links_sem_pagina']} de {resumo['links']} "
+          f"links sem página arquivada), {resumo['falhas']} falhas")
@@ -0,0 +1,154 @@
+"""
+    Transportes usados pelo FirecrawlScraper para buscar páginas
+
+    Todo transporte tem `buscar(url)` (e a versão assíncrona `buscar_async`),
+    que devolve um objeto com os atributos `html` e `markdown` (o mesmo
+    formato do resultado do Firecrawl), e `usa_cota`, que diz se a requisição consome o orçamento
+    de requisições do Firecrawl.
+
+    - TransporteFirecrawl: passa pelo Firecrawl (proxy headless, gasta crédito)
+    - TransporteHTTP: busca direto com um cliente httpx assíncrono com pool de
+      conexões, keep-alive e HTTP/2, rodando num event loop próprio para
+      poder ser usado tanto por threads quanto por código assíncrono
+"""
+
+import asyncio
+import os
+import threading
+
+import httpx
+
+FIRECRAWL = 'firecrawl'
+HTTP = 'http'
+
+CABECALHOS_PADRAO = {
+    'User-Agent': (
+        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+        '(KHTML, like Gecko) Chrome/124.0 Safari/537.36'
+    ),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+
+class PaginaBuscada:
+    """Resultado de um transporte, no mesmo formato do resultado do Firecrawl"""
+
+    def __init__(self, html=None, markdown=None, status=None):
+        self.html = html
+        self.markdown = markdown
+        self.status = status
+
+
+class TransporteFirecrawl:
+    """Busca pelo Firecrawl (cada página consome um crédito)"""
+
+    nome = FIRECRAWL
+    usa_cota = True
+
+    def __init__(self, app, app_async=None):
+        self.app = app
+        self.app_async = app_async
+
+    def buscar(self, url):
+        return self.app.scrape(url)
+
+    async def buscar_async(self, url):
+        """Usa o cliente assíncrono do Firecrawl, se houver; senão o síncrono numa thread"""
+        if self.app_async is not None:
+            return await self.app_async.scrape(url)
+        return await asyncio.to_thread(self.app.scrape, url)
+
+
+class TransporteHTTP:
+    """Busca direta com httpx.AsyncClient (pool de conexões, keep-alive e HTTP/2)"""
+
+    nome = HTTP
+    usa_cota = False
+
+    def __init__(self, timeout=30.0, max_conexoes=20, http2=True, cabecalhos=None):
+        self.timeout = timeout
+        self.max_conexoes = max_conexoes
+        self.http2 = http2
+        self.cabecalhos = dict(CABECALHOS_PADRAO, **(cabecalhos or {}))
+        self._lock = threading.Lock()
+        self._loop = None
+        self._cliente = None
+
+    def _iniciar(self):
+        """Cria o event loop dedicado e o cliente na primeira busca"""
+        with self._lock:
+            if self._loop is not None:
+                return
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='transporte-http', daemon=True).start()
+
+            async def criar_cliente():
+                return httpx.AsyncClient(
+                    http2=self.http2,
+                    timeout=self.timeout,
+                    follow_redirects=True,
+                    headers=self.cabecalhos,
+                    limits=httpx.Limits(
+                        max_connections=self.max_conexoes,
+                        max_keepalive_connections=self.max_conexoes,
+                    ),
+                )
+
+            self._cliente = asyncio.run_coroutine_threadsafe(criar_cliente(), loop).result()
+            self._loop = loop
+
+    async def _buscar(self, url):
+        resposta = await self._cliente.get(url)
+        resposta.raise_for_status()
+        return PaginaBuscada(html=resposta.text, status=resposta.status_code)
+
+    def buscar(self, url):
+        """Versão síncrona (threads): agenda a busca no event loop do transporte"""
+        self._iniciar()
+        return asyncio.run_coroutine_threadsafe(self._buscar(url), self._loop).result()
+
+    async def buscar_async(self, url):
+        """Versão para código assíncrono, sem bloquear o event loop de quem chama"""
+        self._iniciar()
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(self._buscar(url), self._loop))
+
+    def fechar(self):
+        """Fecha as conexões do pool e para o event loop"""
+        with self._lock:
+            if self._loop is None:
+                return
+            asyncio.run_coroutine_threadsafe(self._cliente.aclose(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+            self._cliente = None
+
+
+_transporte_http = None
+_lock_http = threading.Lock()
+
+
+def transporte_http_compartilhado():
+    """Transporte HTTP único do processo, para que todas as buscas dividam o mesmo pool"""
+    global _transporte_http
+    with _lock_http:
+        if _transporte_http is None:
+            _transporte_http = TransporteHTTP(
+                timeout=float(os.getenv('REQUEST_TIMEOUT', '30')),
+                max_conexoes=int(os.getenv('HTTP_MAX_CONNECTIONS', '20')),
+                http2=os.getenv('HTTP_HTTP2', 'true').lower() in ('1', 'true', 'sim'),
+            )
+        return _transporte_http
+
+
+def transportes_configurados():
+    """Nome do transporte por tipo de página, lido do ambiente
+
+    FETCH_TRANSPORT vale para todas as páginas; FETCH_TRANSPORT_BUSCA,
+    FETCH_TRANSPORT_ANUNCIO e FETCH_TRANSPORT_OUTRO sobrescrevem por tipo.
+    """
+    padrao = os.getenv('FETCH_TRANSPORT') or FIRECRAWL
+    return {
+        tipo: (os.getenv(f'FETCH_TRANSPORT_{tipo.upper()}') or padrao).lower()
+        for tipo in ('busca', 'anuncio', 'outro')
+    }
@@ -1,53 +1,197 @@
+import asyncio
 import time
-import random
-from firecrawl import FirecrawlApp
+from firecrawl import FirecrawlApp, AsyncFirecrawlApp
 import re
-from bs4 import BeautifulSoup
 import os
 import sys
-import json
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse, parse_qsl, urlunparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from dotenv import load_dotenv
-from urllib.parse import urljoin
 from urllib.parse import urlencode, quote
 
 # Adicionar o diretório pai ao path do Python
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.engine import engine_left_time
+from utils.rate_limit import CircuitoAberto, ControladorTaxa, Disjuntor, LimitadorRequisicoes, e_rate_limit
+from utils.cache_html import CacheHTML, normalizar_url, tipo_pagina
+from utils.cache_buscas import CacheBuscas, ColetaIncompleta, SingleFlight
+from utils.referencias import registro
+from utils.historico_anuncios import HistoricoAnuncios, hash_conteudo
+from utils.arquivo_paginas import ArquivoPaginas
+from utils.extracao import sem_dados
+from utils import metricas
+from utils.processamento import DESCARTADO, ExecutorParse, analisar_anuncio, analisar_busca
+from utils.transporte import (
+    FIRECRAWL, HTTP, TransporteFirecrawl, transporte_http_compartilhado, transportes_configurados,
+)
+
+# Orçamento único de requisições por minuto, compartilhado por todas as
+# instâncias do scraper, threads, workers e containers que usam o mesmo
+# arquivo de estado (RATE_LIMIT_DB vazio mantém o estado só em memória)
+limitador_compartilhado = LimitadorRequisicoes(
+    requisicoes_por_minuto=float(os.getenv('FIRECRAWL_RPM', '10')),
+    capacidade=float(os.getenv('FIRECRAWL_BURST', '1')),
+    caminho_estado=os.getenv('RATE_LIMIT_DB', './scraped_data/rate_limit.sqlite3'),
+)
+
+# Ritmo adaptativo, retentativas e circuit breaker sobre o orçamento acima,
+# compartilhados por todos os jobs e requisições do processo
+controle_compartilhado = ControladorTaxa(
+    limitador_compartilhado,
+    max_tentativas=int(os.getenv('RATE_LIMIT_MAX_RETRIES', '5')),
+    espera_maxima=float(os.getenv('RATE_LIMIT_MAX_WAIT', '120')),
+    minimo=float(os.getenv('FIRECRAWL_RPM_MIN', '1')),
+    disjuntor=Disjuntor(
+        limiar=int(os.getenv('CIRCUIT_BREAKER_THRESHOLD', '5')),
+        tempo_aberto=float(os.getenv('CIRCUIT_BREAKER_COOLDOWN', '60')),
+    ),
+)
+metricas.ritmo_requisicoes.set(limitador_compartilhado.requisicoes_por_minuto)
+
+def _criar_cache_html():
+    """Cria o cache de HTML em disco (HTML_CACHE_DB vazio desativa o cache)"""
+    caminho = os.getenv('HTML_CACHE_DB', './scraped_data/html_cache.sqlite3')
+    if not caminho:
+        return None
+    return CacheHTML(
+        caminho,
+        tamanho_maximo=int(float(os.getenv('HTML_CACHE_MAX_MB', '200')) * 1024 * 1024),
+        ttl={
+            'busca': int(os.getenv('HTML_CACHE_TTL_BUSCA', 15 * 60)),
+            'anuncio': int(os.getenv('HTML_CACHE_TTL_ANUNCIO', 24 * 60 * 60)),
+        },
+    )
+
+cache_compartilhado = _criar_cache_html()
+
+def _criar_historico():
+    """Cria o histórico de anúncios do modo incremental (CRAWL_LEDGER_DB vazio desativa)"""
+    caminho = os.getenv('CRAWL_LEDGER_DB', './scraped_data/crawl_ledger.sqlite3')
+    if not caminho:
+        return None
+    return HistoricoAnuncios(
+        caminho,
+        intervalo_reverificacao=float(os.getenv('CRAWL_RECHECK_HOURS', '24')) * 60 * 60,
+    )
+
+historico_compartilhado = _criar_historico()
+
+def _criar_arquivo_paginas():
+    """Cria o arquivo de páginas brutas usado com save_to_file (PAGE_ARCHIVE_DIR vazio desativa)"""
+    diretorio = os.getenv('PAGE_ARCHIVE_DIR', './scraped_data/arquivo_paginas')
+    if not diretorio:
+        return None
+    return ArquivoPaginas(
+        diretorio,
+        tamanho_segmento=int(float(os.getenv('PAGE_ARCHIVE_SEGMENT_MB', '64')) * 1024 * 1024),
+    )
+
+arquivo_compartilhado = _criar_arquivo_paginas()
+
+# Links por busca (URL canônica) e buscas de HTML em andamento, compartilhados
+# para que pesquisas idênticas simultâneas gastem a cota do Firecrawl uma vez só
+buscas_compartilhadas = CacheBuscas(ttl=int(os.getenv('SEARCH_CACHE_TTL', 15 * 60)))
+voos_compartilhados = SingleFlight()
+
+# Parse e extração em processos separados (PARSE_WORKERS=0 mantém tudo na thread)
+executor_parse_compartilhado = ExecutorParse(int(os.getenv('PARSE_WORKERS', '2')))
+
+class _ColetaLinks:
+    """Links já emitidos e mensagens de andamento da coleta de uma busca
+
+    Comum a _coletar_links e _coletar_links_async, que só diferem em como
+    as páginas 2..N são buscadas.
+    """
+
+    def __init__(self, search_url, max_paginas):
+        print(f"A procurar links na página de pesquisa: {search_url}")
+        self.max_paginas = max_paginas
+        self.total_paginas = None
+        self.vistos = set()
+        self.falhas = 0
+
+    def novos(self, links_pagina):
+        """Links da página que ainda não foram emitidos, na ordem da página"""
+        novos = []
+        for link in links_pagina:
+            if link not in self.vistos:
+                self.vistos.add(link)
+                novos.append(link)
+        return novos
+
+    def restantes(self, links, total_paginas):
+        """Páginas a buscar depois da primeira (nenhuma se a busca cabe numa página)"""
+        if total_paginas is None or not links:
+            return []
+        self.total_paginas = min(total_paginas, self.max_paginas)
+        if self.total_paginas <= 1:
+            print(f"Encontramos {len(self.vistos)} links únicos.")
+            return []
+        print(f"📄 A busca tem {self.total_paginas} páginas. A buscar as restantes em paralelo...")
+        return range(2, self.total_paginas + 1)
+
+    def pagina(self, pagina, links_pagina):
+        """Links novos de uma das páginas restantes (None: a página não veio)"""
+        if links_pagina is None:
+            self.falha(pagina, "página sem conteúdo HTML")
+            return []
+        links_novos = self.novos(links_pagina)
+        print(f"📄 Página {pagina}/{self.total_paginas}: {len(links_novos)} links novos")
+        return links_novos
+
+    def falha(self, pagina, erro):
+        self.falhas += 1
+        print(f"⚠️  Falha ao buscar a página {pagina}: {erro}")
+
+    def concluir(self):
+        """Fecha a coleta; com páginas faltando, avisa o cache para não guardá-la"""
+        print(f"Encontramos {len(self.vistos)} links únicos em {self.total_paginas} páginas.")
+        if self.falhas:
+            raise ColetaIncompleta(f"{self.falhas} de {self.total_paginas} páginas da busca falharam")
 
 class FirecrawlScraper:
-    def __init__(self, api_key):
+    def __init__(self, api_key, limitador=None, cache=None, concorrencia=None, buscas=None, historico=None,
+                 transportes=None, arquivo=None, controle=None):
         self.app = FirecrawlApp(api_key=api_key)
+        # Transporte por tipo de página ('busca', 'anuncio', 'outro'): nome ou instância
+        self.transportes = {
+            tipo: self._resolver_transporte(transporte)
+            for tipo, transporte in {**transportes_configurados(), **(transportes or {})}.items()
+        }
+        self.limitador = limitador or limitador_compartilhado
+        if controle is None:
+            controle = controle_compartilhado if self.limitador is limitador_compartilhado else ControladorTaxa(self.limitador)
+        self.controle = controle
+        self.cache = cache if cache is not None else cache_compartilhado
+        self.historico = historico if historico is not None else historico_compartilhado
+        self.arquivo = arquivo if arquivo is not None else arquivo_compartilhado
+        self.executor_parse = executor_parse_compartilhado
+        self.buscas = buscas or buscas_compartilhadas
+        self.voos = voos_compartilhados
+        self.concorrencia = max(1, concorrencia or int(os.getenv('SCRAPER_CONCURRENCY', '3')))
+
+    def _resolver_transporte(self, transporte):
+        if not isinstance(transporte, str):
+            return transporte
+        if transporte == FIRECRAWL:
+            return TransporteFirecrawl(self.app)
+        if transporte == HTTP:
+            return transporte_http_compartilhado()
+        raise ValueError(f"Transporte desconhecido: {transporte}")
+
+    def transporte_para(self, url):
+        """Transporte configurado para o tipo da página"""
+        return self.transportes[tipo_pagina(url)]
 
     def _rate_limit_delay(self):
-        """Delay fixo entre requisições para containers"""
-        # Como não podemos manter estado entre execuções, usamos um delay fixo
-        # que garante ficar abaixo do limite de 10 req/minuto
-        base_delay = random.uniform(7, 12)  # 7-12 segundos = ~5-8 req/minuto
-        print(f"⏳ Aguardando {base_delay:.1f} segundos entre requisições...")
-        time.sleep(base_delay)
-
-    def carregar_paises(self):
-        """Carrega os países do arquivo JSON"""
-        try:
-            with open('./src/util_datas/paises.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            print(f"Arquivo não encontrado. Criando novo...")
-            return {}
-        except json.JSONDecodeError:
-            print("Erro ao ler JSON. Verifique o formato.")
-            return {}
-        
-    def normalizar_nome(self, nome):
-        # Normaliza o nome do país para busca
-        return nome.strip().lower().replace(' ', '_').replace('-', '_')
-        
-    def get_codigo_pais(self, nome_pais, paises):
-        # Retorna o código numérico do país
-        chave = self.normalizar_nome(nome_pais)
-        return paises.get(chave, None)
+        """Aguarda o próximo horário livre no orçamento compartilhado de requisições"""
+        with metricas.medir(metricas.ESPERA_RATE_LIMIT):
+            return self.limitador.aguardar()
+
+    def get_codigo_pais(self, nome_pais):
+        # Retorna o código numérico do país (índice carregado uma vez, sem acentos)
+        return registro.codigo_pais(nome_pais)
 
     def build_search_url(self, search):
         """Construindo a url de busca, codificand os parametros"""
@@ -67,8 +211,7 @@ class FirecrawlScraper:
 
             # Parâmetro country
             if search['country']:
-                paises = self.carregar_paises()
-                codigo_pais = self.get_codigo_pais(search['country'], paises)
+                codigo_pais = self.get_codigo_pais(search['country'])
                 if codigo_pais:
                     params['Country'] = str(codigo_pais)
                 else:
@@ -104,176 +247,236 @@ class FirecrawlScraper:
             return None
         
 
-    def get_listing_links(self, search_url):
-        """Pegando todos os links de uma página de busca"""
+    def get_listing_links(self, search_url, max_paginas=None, save_to_file=False):
+        """Pegando todos os links de todas as páginas de uma busca"""
         try:
-            print(f"A procurar links na página de pesquisa: {search_url}")
-
-            # Buscar a página
-            html_content = self.scrape_as_html(search_url)
-
-            if not html_content:
-                print("Não foi possível obter o conteúdo HTML da página de pesquisa.")
-                return []
-            
-            # Analisar o html
-            soup = BeautifulSoup(html_content, 'html.parser')
-
-            # DEBUG: Verificar estrutura da página
-            print(f"📊 Título da página: {soup.title.string if soup.title else 'Não encontrado'}")
-            
-            # Tentar diferentes seletores para encontrar os links
-            link_tags = []
-
-            if soup.find('h1', text=re.compile(r'No Listings Found', re.IGNORECASE)):
-                print("❌ Nenhum anúncio encontrado na página de pesquisa.")
-                return []
-            
-            # Seletor original
-            link_tags = soup.find_all('a', class_='list-listing-title-link')
-            print(f"🔍 Tentativa 1 - Classe 'list-listing-title-link': {len(link_tags)} links")
-            
-            # Se não encontrar, tentar outros seletores
-            if not link_tags:
-                link_tags = soup.find_all('a', href=lambda href: href and '/listing/' in href)
-                print(f"🔍 Tentativa 2 - Links com '/listing/': {len(link_tags)} links")
-            
-            if not link_tags:
-                # Buscar por qualquer link que possa ser um anúncio
-                all_links = soup.find_all('a', href=True)
-                for link in all_links:
-                    href = link.get('href', '')
-                    if '/listing/' in href and href.split('/listing/')[1].strip('/').replace('-', '').isalnum():
-                        link_tags.append(link)
-                print(f"🔍 Tentativa 3 - Filtro por padrão de URL: {len(link_tags)} links")
-
-            absolut_links = []
-            base_domain = "https://www.controller.com"
-
-            # Extraindo apenas o link das tags que estão em href
-            for tag in link_tags:
-                relative_link = tag.get('href')
-                relative_link += '?print=1'
-                if relative_link:
-                    full_link = urljoin(base_domain, relative_link)
-                    absolut_links.append(full_link)
-                    print(f"   ✅ Link encontrado: {full_link}")
-            
-            # Remover duplicatas
-            absolut_links = list(set(absolut_links))
-            
-            print(f"Encontramos {len(absolut_links)} links únicos.")
-
-            return absolut_links
+            return list(self.iter_listing_links(search_url, max_paginas, save_to_file))
         
         except Exception as e:
             print(f"Erro no scraping: {e}")
             return []
 
-    def scrape_as_html(self, url, save_to_file=False, pretty_print=True, output_dir='./scraped_data/html_files'):
-        """Retorna o conteúdo em HTML"""
-        try:
-            self._rate_limit_delay()
-            
-            print(f"🔄 Iniciando scraping HTML de: {url}")
-            
-            # Solicitar especificamente HTML
-            result = self.app.scrape(url)
-            
-            # Tentar obter HTML de diferentes formas
-            html_content = None
-            
-            if hasattr(result, 'html') and result.html:
-                html_content = result.html
-                print("✅ HTML encontrado diretamente!")
-            elif hasattr(result, 'markdown') and result.markdown:
-                # Converter markdown para HTML (simples)
-                html_content = self._markdown_to_html(result.markdown)
-                print("✅ Convertido markdown para HTML!")
-            else:
-                print("❌ Nenhum conteúdo disponível")
-                return None
-                        
-            # Salvar se solicitado
-            if save_to_file and html_content:
-                pretty_html = html_content
-                # Formatar HTML
-                if pretty_print:
-                    pretty_html = self._format_html(html_content)
-                # Gerar nome do arquivo
-                filename = self._generate_custom_filename(url, 'html')
-                filepath = os.path.join(output_dir, filename)
-                
-                # Criar diretório se não existir
-                os.makedirs(output_dir, exist_ok=True)
-                with open(filepath, 'w', encoding='utf-8') as f:
-                    f.write(pretty_html)
-                print(f"💾 HTML salvo em: {filepath}")
-            
-            return html_content
-                
-        except Exception as e:
-            print(f"🚨 Erro no scraping HTML: {e}")
-        
-            # ADICIONADO: Retry automático em caso de rate limit
-            if "Rate Limit Exceeded" in str(e):
-                # Extrai o tempo de espera da mensagem de erro
+    def iter_listing_links(self, search_url, max_paginas=None, save_to_file=False):
+        """Gera os links de anúncio conforme as páginas de resultados chegam
+
+        Buscas idênticas (mesma URL canônica) reaproveitam o cache de buscas
+        ou a coleta que já estiver em andamento, em vez de refazer o crawl.
+        Com `save_to_file` as páginas de resultados buscadas são arquivadas.
+        """
+        if max_paginas is None:
+            max_paginas = int(os.getenv('MAX_SEARCH_PAGES', '50'))
+        yield from self.buscas.iterar(
+            search_url, lambda: self._coletar_links(search_url, max_paginas, save_to_file), variante=max_paginas
+        )
+
+    def _coletar_links(self, search_url, max_paginas, save_to_file=False):
+        """Percorre as páginas de resultados de uma busca
+
+        A primeira página informa o total de páginas; as demais são buscadas
+        em paralelo (respeitando o orçamento de requisições) e os links novos
+        são emitidos sem duplicatas assim que cada página fica pronta.
+        """
+        coleta = _ColetaLinks(search_url, max_paginas)
+        links, total_paginas = self._links_da_pagina(search_url, True, save_to_file)
+        if links is None:
+            return
+        yield from coleta.novos(links)
+
+        paginas = coleta.restantes(links, total_paginas)
+        if not paginas:
+            return
+
+        with ThreadPoolExecutor(max_workers=min(self.concorrencia, len(paginas))) as executor:
+            futuros = {
+                executor.submit(
+                    self._links_da_pagina, self._build_page_url(search_url, pagina), False, save_to_file
+                ): pagina
+                for pagina in paginas
+            }
+            for futuro in as_completed(futuros):
                 try:
-                    # Procura por "retry after Xs" no erro
-                    import re
-                    match = re.search(r'retry after (\d+)s', str(e))
-                    if match:
-                        wait_time = int(match.group(1)) + 2  # +2 segundos de segurança
-                    else:
-                        wait_time = 60  # fallback
-                    
-                    print(f"🔄 Rate limit detectado, tentando novamente após {wait_time} segundos...")
-                    time.sleep(wait_time)
-                    return self.scrape_as_html(url, save_to_file, pretty_print, output_dir)
-                except:
-                    print("🔄 Rate limit detectado, tentando novamente após 60 segundos...")
-                    time.sleep(60)
-                    return self.scrape_as_html(url, save_to_file, pretty_print, output_dir)
-            
+                    links_pagina, _ = futuro.result()
+                except Exception as e:
+                    coleta.falha(futuros[futuro], e)
+                    continue
+                yield from coleta.pagina(futuros[futuro], links_pagina)
+
+        coleta.concluir()
+
+    def _links_da_pagina(self, page_url, calcular_total=False, save_to_file=False):
+        """Busca uma página de resultados e devolve (links, total de páginas)
+
+        Sem HTML, devolve (None, None), que a coleta conta como página falha.
+        O parse roda no executor de parse (processos separados, se configurado);
+        o total de páginas só é calculado quando pedido (primeira página).
+        """
+        # Buscar a página
+        html_content = self.scrape_as_html(page_url, save_to_file)
+
+        if not html_content:
+            print("Não foi possível obter o conteúdo HTML da página de pesquisa.")
+            return None, None
+        
+        # Analisar o html
+        links, total, duracao = self.executor_parse.executar(analisar_busca, html_content, calcular_total)
+        metricas.duracao_etapa.labels(metricas.PARSE).observe(duracao)
+        return links, total
+
+    def _build_page_url(self, search_url, pagina):
+        """Monta a URL de uma página específica dos resultados da busca"""
+        parsed = urlparse(search_url)
+        params = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if k.lower() != 'page']
+        params.append(('page', str(pagina)))
+        return urlunparse(parsed._replace(query=urlencode(params, quote_via=quote)))
+
+    def scrape_as_html(self, url, save_to_file=False):
+        """Retorna o conteúdo em HTML (consultando antes o cache local)
+
+        Com `save_to_file` a página bruta é acrescentada ao arquivo de páginas.
+        Requisições barradas por rate limit são repetidas até o limite do
+        controle de taxa; com o circuito aberto desiste na hora.
+        """
+        tentativa = 0
+        while True:
+            tentativa += 1
+            try:
+                html_content = self._html_do_cache(url)
+                if html_content is None:
+                    # Pedidos simultâneos da mesma página esperam a mesma requisição
+                    html_content = self.voos.executar(normalizar_url(url), self._buscar_html, url)
+
+                # Salvar se solicitado
+                if save_to_file and html_content:
+                    self._salvar_html(url, html_content)
+
+                return html_content
+
+            except Exception as e:
+                wait_time = self._espera_apos_falha(e, tentativa, url)
+                if wait_time is None:
+                    return None
+                time.sleep(wait_time)
+
+    def _html_do_cache(self, url):
+        """HTML da página no cache local, ou None"""
+        html_content = self.cache.obter(url) if self.cache else None
+        if html_content is not None:
+            print(f"⚡ HTML servido do cache local: {url}")
+        return html_content
+
+    def _salvar_html(self, url, html_content):
+        """Acrescenta o HTML bruto ao arquivo de páginas (sem formatar; ver arquivo_paginas)"""
+        if not self.arquivo:
+            return
+        if self.arquivo.guardar(url, html_content):
+            print(f"💾 HTML arquivado: {url}")
+
+    def _espera_apos_falha(self, erro, tentativa, url):
+        """Segundos a esperar antes de repetir a busca de `url` que falhou com `erro`, ou None para desistir"""
+        if isinstance(erro, CircuitoAberto):
+            print(f"⛔ {erro}: {url}")
             return None
+        print(f"🚨 Erro no scraping HTML: {erro}")
+        if not self._repetir_apos_rate_limit(erro, tentativa, url):
+            return None
+        wait_time = self._espera_rate_limit(erro, tentativa)
+        print(f"🔄 Rate limit detectado, tentando novamente após {wait_time:.1f} segundos...")
+        return wait_time
+
+    def _repetir_apos_rate_limit(self, erro, tentativa, url):
+        """Se a `tentativa` que falhou com `erro` deve ser repetida"""
+        if not e_rate_limit(erro):
+            return False
+        if not self.controle.pode_repetir(tentativa):
+            print(f"❌ Rate limit persistente, desistindo após {tentativa} tentativas: {url}")
+            return False
+        metricas.retentativas_rate_limit.inc()
+        return True
+
+    def _espera_rate_limit(self, erro, tentativa=1):
+        """Segundos a esperar antes de repetir uma requisição barrada por rate limit"""
+        return self.controle.espera(erro, tentativa)
+
+    def _verificar_circuito(self):
+        """Falha na hora, sem gastar cota, enquanto o servidor está saturado"""
+        try:
+            self.controle.verificar()
+        except CircuitoAberto:
+            metricas.circuito_recusas.inc()
+            raise
+
+    def _registrar_resposta(self, erro=None):
+        """Ajusta o ritmo (AIMD) e o circuit breaker pelo resultado de uma requisição com cota"""
+        if erro is None:
+            resultado = 'ok'
+            self.controle.registrar_sucesso()
+        elif e_rate_limit(erro):
+            resultado = 'rate_limit'
+            self.controle.registrar_rate_limit(erro)
+        else:
+            resultado = 'erro'
+            self.controle.registrar_erro(erro)
+        metricas.requisicoes_firecrawl.labels(resultado).inc()
+        metricas.ritmo_requisicoes.set(self.limitador.requisicoes_por_minuto)
+
+    def _conteudo_html(self, result):
+        """HTML do resultado do transporte (convertendo o markdown, se for o caso)"""
+        # Tentar obter HTML de diferentes formas
+        if hasattr(result, 'html') and result.html:
+            html_content = result.html
+            print("✅ HTML encontrado diretamente!")
+        elif hasattr(result, 'markdown') and result.markdown:
+            # Converter markdown para HTML (simples)
+            html_content = self._markdown_to_html(result.markdown)
+            print("✅ Convertido markdown para HTML!")
+        else:
+            print("❌ Nenhum conteúdo disponível")
+            return None
+        return html_content
+
+    def _buscar_html(self, url):
+        """Busca a página pelo transporte do seu tipo e guarda o HTML no cache local"""
+        transporte = self._preparar_busca(url)
+        if transporte.usa_cota:
+            self._rate_limit_delay()
+
+        # Solicitar especificamente HTML
+        with self._requisicao(transporte, url):
+            result = transporte.buscar(url)
 
-    def _generate_custom_filename(self, url, extension):
-        """Gera nome no padrão: dominio_pais_ordenacao_palavrachave.md (ou .html)"""
+        return self._guardar_resposta(url, result)
+
+    def _preparar_busca(self, url):
+        """Transporte da página; falha na hora se ele gasta cota e o circuito está aberto"""
+        transporte = self.transporte_para(url)
+        if transporte.usa_cota:
+            self._verificar_circuito()
+        return transporte
+
+    @contextmanager
+    def _requisicao(self, transporte, url):
+        """Mede a requisição e informa o resultado ao controle de taxa (transportes com cota)"""
+        print(f"🔄 Iniciando scraping HTML de: {url} (via {transporte.nome})")
         try:
-            parsed_url = urlparse(url)
-            # Extrair domínio
-            domain = parsed_url.netloc.replace('www.', '').replace('.', '_')
-            domain = domain.replace('_com', '').replace('_org', '').replace('_net', '')
-            
-            query_params = parse_qs(parsed_url.query)
-            
-            # Extrair parâmetros com fallback
-            country = query_params.get('Country', [''])[0] or '_'
-            sort_order = query_params.get('sort', [''])[0] or '_'
-            keywords = query_params.get('keywords', [''])[0] or '_'
-            
-            # Processar keywords
-            if keywords != '_':
-                # Decodificar URL
-                keywords = keywords.replace('%20', ' ').replace('%2C', ',').replace('%26', 'and')
-                # Limpar e formatar
-                keywords = re.sub(r'[^\w\s]', '', keywords)  # Remove caracteres especiais
-                keywords = re.sub(r'\s+', '_', keywords.strip().lower())  # Padroniza
-            
-            # Montar filename
-            filename = f"{domain}_{country}_{sort_order}_{keywords}."
-
-            if extension == 'html':
-                filename += "html"
-            else:
-                filename += "md"
-            
-            return filename
-            
+            with metricas.medir(metricas.FETCH):
+                yield
         except Exception as e:
-            print(f"⚠️  Erro no filename, usando fallback: {e}")
-            return f"fallback_{hash(url) % 10000}.md"
-    
+            if transporte.usa_cota:
+                self._registrar_resposta(e)
+            raise
+        if transporte.usa_cota:
+            self._registrar_resposta()
+
+    def _guardar_resposta(self, url, result):
+        """HTML da resposta do transporte, guardado no cache local"""
+        html_content = self._conteudo_html(result)
+        if html_content is None:
+            return None
+
+        if self.cache:
+            self.cache.guardar(url, html_content)
+        return html_content
+
     def _markdown_to_html(self, markdown_text):
         """Converte markdown básico para HTML"""
         # Conversões simples
@@ -289,211 +492,248 @@ class FirecrawlScraper:
         
         return f"<html><body>{html}</body></html>"
     
-    def _format_html(self, html_content):
-        """Formata o HTML para ficar bem identado"""
+    def filter_html_data(self, url, save_to_file=False, filtros=None):
+        """Filtra dados específicos de anúncios de aeronaves
+
+        Com o histórico ativo, anúncios verificados recentemente não são
+        buscados de novo e páginas com o mesmo HTML não são reprocessadas.
+        Com `filtros` (lista de buscas, ver montar_search_datas) os campos
+        decisivos são avaliados antes do parse: se nenhuma busca pode aceitar
+        o anúncio, ele volta como DESCARTADO, sem parse completo, sem gravar
+        o HTML (save_to_file) e sem entrar no histórico.
+        """
         try:
-            # Usar BeautifulSoup para formatar
-            soup = BeautifulSoup(html_content, 'html.parser')
-            pretty_html = soup.prettify()
-            
-            return pretty_html
-            
+            filtered_data = self._do_historico_recente(url)
+            if filtered_data is not None:
+                return filtered_data
+
+            html_content = self.scrape_as_html(url)
+            if not html_content:
+                return self._sem_html()
+
+            hash_html, filtered_data = self._do_historico_inalterado(url, html_content)
+            if filtered_data is not None:
+                return filtered_data
+
+            filtered_data = self._resultado_parse(
+                url, *self.executor_parse.executar(analisar_anuncio, url, html_content, filtros)
+            )
+            if filtered_data is not None and filtered_data != DESCARTADO:
+                self._guardar_extracao(url, html_content, hash_html, filtered_data, save_to_file)
+            return filtered_data
+
         except Exception as e:
-            print(f"⚠️  Erro na formatação, retornando HTML original: {e}")
-            return html_content
-        
-    def filter_html_data(self, url, save_to_file=False):
-        """Filtra dados específicos de anúncios de aeronaves do controller.com"""
+            return self._falha_filtragem(e)
+
+    def _do_historico_recente(self, url):
+        """Registro do histórico se o anúncio foi verificado recentemente, ou None"""
+        if not self.historico:
+            return None
+        filtered_data = self.historico.recente(url)
+        if filtered_data is not None:
+            print(f"♻️  Anúncio verificado recentemente, usando o histórico: {url}")
+        return filtered_data
+
+    def _do_historico_inalterado(self, url, html_content):
+        """(hash do HTML, registro do histórico se o HTML não mudou desde a última extração, ou None)"""
+        if not self.historico:
+            return None, None
+        hash_html = hash_conteudo(html_content)
+        filtered_data = self.historico.inalterado(url, hash_html)
+        if filtered_data is not None:
+            print(f"♻️  Anúncio sem alterações desde a última extração: {url}")
+        return hash_html, filtered_data
+
+    def _sem_html(self):
+        print("HTML content is empty. Cannot filter data.")
+        metricas.falhas_extracao.labels('sem_html').inc()
+        return None
+
+    def _resultado_parse(self, url, filtered_data, duracao_parse, duracao_extracao):
+        """Registro extraído, DESCARTADO (fora dos filtros) ou None (página sem dados de anúncio)"""
+        metricas.duracao_etapa.labels(metricas.EXTRACAO).observe(duracao_extracao)
+        if filtered_data == DESCARTADO:
+            print(f"⏭️  Anúncio fora dos filtros da busca, descartado antes do parse: {url}")
+            return DESCARTADO
+        metricas.duracao_etapa.labels(metricas.PARSE).observe(duracao_parse)
+        if sem_dados(filtered_data):
+            print(f"❌ Página sem dados de anúncio (título, preço e ano ausentes): {url}")
+            metricas.falhas_extracao.labels('sem_dados').inc()
+            return None
+        return filtered_data
+
+    def _guardar_extracao(self, url, html_content, hash_html, filtered_data, save_to_file):
+        """Arquiva o HTML (se pedido) e grava o registro extraído no histórico"""
+        if save_to_file:
+            self._salvar_html(url, html_content)
+
+        if self.historico:
+            self.historico.guardar(url, hash_html, filtered_data)
+
+        print(f"✅ Dados extraídos: {filtered_data['fabricante']} {filtered_data['modelo']} - {filtered_data['ano']}")
+
+    def _falha_filtragem(self, erro):
+        print(f"🚨 Erro na filtragem HTML: {erro}")
+        metricas.falhas_extracao.labels('erro').inc()
+        import traceback
+        traceback.print_exc()
+        return None
+
+class AsyncFirecrawlScraper(FirecrawlScraper):
+    """Versão assíncrona do FirecrawlScraper, para rodar dentro do event loop da API
+
+    Toda espera é feita com `await`: o orçamento de requisições usa
+    asyncio.sleep, as páginas vêm do cliente assíncrono do Firecrawl (ou do
+    `buscar_async` do transporte configurado), SQLite e gravação de arquivos
+    ficam em threads e o parse vai para o executor de parse. Assim um único
+    worker do uvicorn atende várias buscas ao mesmo tempo. Caches, histórico,
+    orçamento e single-flight são os mesmos da versão síncrona.
+    """
+
+    def __init__(self, api_key, **kwargs):
+        self.app_async = AsyncFirecrawlApp(api_key=api_key)
+        super().__init__(api_key, **kwargs)
+
+    def _resolver_transporte(self, transporte):
+        if transporte == FIRECRAWL:
+            return TransporteFirecrawl(self.app, self.app_async)
+        return super()._resolver_transporte(transporte)
+
+    async def _rate_limit_delay_async(self):
+        """Aguarda o próximo horário livre no orçamento sem bloquear o event loop"""
+        with metricas.medir(metricas.ESPERA_RATE_LIMIT):
+            return await self.limitador.aguardar_async()
+
+    async def get_listing_links_async(self, search_url, max_paginas=None, save_to_file=False):
+        """Pegando todos os links de todas as páginas de uma busca"""
         try:
-            html_content = self.scrape_as_html(url, save_to_file=save_to_file)
-            if not html_content:
-                print("HTML content is empty. Cannot filter data.")
-                return None
-
-            soup = BeautifulSoup(html_content, 'html.parser')
-            filtered_data = {
-                'url': url,
-                'titulo': 'Não encontrado',
-                'preco': 'Não encontrado',
-                'localizacao': 'Não encontrado',
-                'ano': 'Não encontrado',
-                'fabricante': 'Não encontrado',
-                'modelo': 'Não encontrado',
-                'motor_1_left': 'Não encontrado',
-                'motor_2_left': 'Não encontrado',
-                'horas_totais': 'Não encontrado',
-                'motor_1_horas': 'Não encontrado',
-                'motor_2_horas': 'Não encontrado',
-                'motor_1_tbo': 'Não encontrado',
-                'motor_2_tbo': 'Não encontrado',
-                'vendedor': 'Não encontrado',
-                'telefone': 'Não encontrado',
-            }
+            return [link async for link in self.iter_listing_links_async(search_url, max_paginas, save_to_file)]
 
-            # 1. Título do anúncio
-            title_selectors = ['h1', '.listing-title', '.title', '[class*="title"]']
-            for selector in title_selectors:
-                title_tag = soup.select_one(selector)
-                if title_tag and title_tag.get_text(strip=True):
-                    filtered_data['titulo'] = title_tag.get_text(strip=True)
-                    break
-
-            # 2. Preço
-            price_selectors = ['.price', '.cost', '.amount', '[class*="price"]', '[class*="cost"]']
-            price_patterns = [r'Call\s*for\s*price', r'USD\s*\$[\d,]+', r'\$[\d,]+']
-            
-            for selector in price_selectors:
-                price_element = soup.select_one(selector)
-                if price_element:
-                    price_text = price_element.get_text(strip=True)
-                    for pattern in price_patterns:
-                        match = re.search(pattern, price_text)
-                        if match:
-                            filtered_data['preco'] = match.group()
-                            break
-                    if filtered_data['preco'] != 'Não encontrado':
-                        break
-            
-            # Se não encontrou por seletor, busca no texto completo
-            if filtered_data['preco'] == 'Não encontrado':
-                for pattern in price_patterns:
-                    match = re.search(pattern, html_content)
-                    if match:
-                        filtered_data['preco'] = match.group()
-                        break
-
-            # 3. Localização
-            location_selectors = [
-                'a[href*="google.com/maps"]',
-                'a[href*="maps.google.com"]',
-                'a[href*="google.com/maps/search"]' 
-            ]
-            for selector in location_selectors:
-                location_element = soup.select_one(selector)
-                if location_element and location_element.get_text(strip=True):
-                    filtered_data['localizacao'] = location_element.get_text(strip=True)
-                    break
-
-            # 4. Ano - procura por padrão de 4 dígitos (ano)
-            year_match = re.search(r'\b(19|20)\d{2}\b', html_content)
-            if year_match:
-                filtered_data['ano'] = year_match.group()
-
-            # 5. Fabricante e Modelo - extrai do título ou URL
-            if filtered_data['titulo'] != 'Não encontrado':
-                # Tenta extrair fabricante e modelo do título
-                title = filtered_data['titulo'].upper()
-                manufacturers = ['PIPER', 'CESSNA', 'BEECHCRAFT', 'BOEING', 'AIRBUS', 'CIRRUS', 'MOONEY']
-                for manufacturer in manufacturers:
-                    if manufacturer in title:
-                        filtered_data['fabricante'] = manufacturer
-                        # Tenta extrair modelo (parte após o fabricante)
-                        model_part = title.split(manufacturer, 1)[-1].strip()
-                        if model_part:
-                            # Pega as primeiras palavras como modelo
-                            words = model_part.split()[:3]
-                            filtered_data['modelo'] = ' '.join(words)
-                        break
-
-            # 6. Horas totais e dos motores
-
-            texto_sem_tags = re.sub(r'<[^>]+>', ' ', html_content)
-
-            time_patterns = {
-                'horas_totais': [
-                    r'Total Time[^\d]*([\d,\.]+)',           
-                    r'Total[^\d]*Time[^\d]*([\d,\.]+)', 
-                    r'Total[^\d]*([\d,\.]+)\s*Hours',       
-                    r'Total[^\d]*([\d,\.]+)\s*Hrs',         
-                    r'TT[^\d]*([\d,\.]+)',                   
-                    r'([\d,\.]+)\s*Total Time',           
-                    r'Total[^\d]*([\d,\.]+)'                
-                ],
-                'motor_1_horas': [
-                    r'Engine 1 Time[^\d]*([\d,\.]+)\s*([A-Z]+)',  # Captura número E texto
-                    r'Eng 1 Time[^\d]*([\d,\.]+)\s*([A-Z]+)',
-                    r'Left Engine[^\d]*([\d,\.]+)\s*([A-Z]+)',
-                    # Padrões alternativos caso o texto venha antes
-                    r'Engine 1 Time\s*([A-Z]+)[^\d]*([\d,\.]+)'
-                ],
-                'motor_2_horas': [
-                    r'Engine 2 Time[^\d]*([\d,\.]+)\s*([A-Z]+)',
-                    r'Eng 2 Time[^\d]*([\d,\.]+)\s*([A-Z]+)', 
-                    r'Right Engine[^\d]*([\d,\.]+)\s*([A-Z]+)',
-                    # Padrões alternativos
-                    r'Engine 2 Time\s*([A-Z]+)[^\d]*([\d,\.]+)'
-                ],
-                'motor_1_tbo': [
-                    r'Engine 1 TBO[^\d]*([\d,\.]+)',
-                    r'Eng 1 TBO[^\d]*([\d,\.]+)',
-                    r'Left Engine TBO[^\d]*([\d,\.]+)'
-                ],
-                'motor_2_tbo': [
-                    r'Engine 2 TBO[^\d]*([\d,\.]+)',
-                    r'Eng 2 TBO[^\d]*([\d,\.]+)',
-                    r'Right Engine TBO[^\d]*([\d,\.]+)'
-                ]
-            }
+        except Exception as e:
+            print(f"Erro no scraping: {e}")
+            return []
 
-            for field, patterns in time_patterns.items():
-                for pattern in patterns:
-                    match = re.search(pattern, texto_sem_tags, re.IGNORECASE)
-                    if match:
-                        numero_com_virgula = match.group(1)
-                        texto = match.group(2) if len(match.groups()) > 1 else ''
-
-                        if texto.strip() != '' and texto.strip() != 'SMOH' and texto.strip() != 'SNEW':
-                            texto = 'Desconhecido'
-
-                        numero_sem_virgula = numero_com_virgula.replace(',', '')  # Remove vírgulas
-                        filtered_data[field] = {'horas': numero_sem_virgula, 'status': texto.strip()} if texto else numero_sem_virgula
-                        print(f"✅ {field}: {numero_sem_virgula} {texto.strip() if texto else ''}")
-                        break
-
-            # 7. Informações do vendedor
-
-            # Padrão para capturar contato do vendedor
-            padroes = [
-                r'Contact:([^<]+)<br/>', 
-                r'Contact:\s*([^<\n]+)<br/>',    
-                r'Contact:\s*([^<\n]+)(?:<br/>|$)', 
-                r'Contact[^:]*:\s*([^<\n]+)'      
-            ]
-            
-            for padrao in padroes:
-                match = re.search(padrao, html_content, re.IGNORECASE)
-                if match:
-                    filtered_data['vendedor'] = match.group(1).strip()
-            
-
-            # 8. Telefone do vendedor
-
-            # Tenta capturar do texto dentro da tag primeiro
-            phone_patterns = [r'Phone:.*?<a[^>]*>([^<]+)</a>']
-        
-            for pattern in phone_patterns:
-                match = re.search(pattern, html_content)
-                if match:
-                    filtered_data['telefone'] = match.group(1).strip()
-                    break
-                else:
-                    # Fallback: captura do href
-                    padrao_href = r'Phone:.*?<a href="tel:([^"]+)"'
-                    match = re.search(padrao_href, html_content)
-                    if match:
-                        filtered_data['telefone'] = match.group(1).strip()
-                        break
+    async def iter_listing_links_async(self, search_url, max_paginas=None, save_to_file=False):
+        """Gera os links de anúncio conforme as páginas de resultados chegam (ver iter_listing_links)"""
+        if max_paginas is None:
+            max_paginas = int(os.getenv('MAX_SEARCH_PAGES', '50'))
+        async for link in self.buscas.iterar_async(
+            search_url, lambda: self._coletar_links_async(search_url, max_paginas, save_to_file), variante=max_paginas
+        ):
+            yield link
+
+    async def _coletar_links_async(self, search_url, max_paginas, save_to_file=False):
+        """Percorre as páginas de resultados de uma busca (ver _coletar_links)
+
+        As páginas 2..N são buscadas como tarefas, no máximo `concorrencia`
+        ao mesmo tempo, e os links são emitidos na ordem em que ficam prontas.
+        """
+        coleta = _ColetaLinks(search_url, max_paginas)
+        links, total_paginas = await self._links_da_pagina_async(search_url, True, save_to_file)
+        if links is None:
+            return
+        for link in coleta.novos(links):
+            yield link
+
+        paginas = coleta.restantes(links, total_paginas)
+        if not paginas:
+            return
+
+        semaforo = asyncio.Semaphore(self.concorrencia)
+
+        async def buscar_pagina(pagina):
+            async with semaforo:
+                try:
+                    links_pagina, _ = await self._links_da_pagina_async(
+                        self._build_page_url(search_url, pagina), False, save_to_file
+                    )
+                except Exception as e:
+                    coleta.falha(pagina, e)
+                    links_pagina = []
+                return pagina, links_pagina
+
+        tarefas = [asyncio.ensure_future(buscar_pagina(pagina)) for pagina in paginas]
+        try:
+            for proxima in asyncio.as_completed(tarefas):
+                for link in coleta.pagina(*await proxima):
+                    yield link
+        finally:
+            for tarefa in tarefas:
+                tarefa.cancel()
+
+        coleta.concluir()
+
+    async def _links_da_pagina_async(self, page_url, calcular_total=False, save_to_file=False):
+        """Busca uma página de resultados e devolve (links, total de páginas)"""
+        html_content = await self.scrape_as_html_async(page_url, save_to_file)
+
+        if not html_content:
+            print("Não foi possível obter o conteúdo HTML da página de pesquisa.")
+            return None, None
+
+        links, total, duracao = await self.executor_parse.executar_async(analisar_busca, html_content, calcular_total)
+        metricas.duracao_etapa.labels(metricas.PARSE).observe(duracao)
+        return links, total
+
+    async def scrape_as_html_async(self, url, save_to_file=False):
+        """Retorna o conteúdo em HTML (consultando antes o cache local; ver scrape_as_html)"""
+        tentativa = 0
+        while True:
+            tentativa += 1
+            try:
+                html_content = await asyncio.to_thread(self._html_do_cache, url)
+                if html_content is None:
+                    # Pedidos simultâneos da mesma página (de threads ou corrotinas) esperam a mesma requisição
+                    html_content = await self.voos.executar_async(normalizar_url(url), self._buscar_html_async, url)
+
+                if save_to_file and html_content:
+                    await asyncio.to_thread(self._salvar_html, url, html_content)
+
+                return html_content
+
+            except Exception as e:
+                wait_time = self._espera_apos_falha(e, tentativa, url)
+                if wait_time is None:
+                    return None
+                await asyncio.sleep(wait_time)
 
-            filtered_data['motor_1_left'] = engine_left_time(filtered_data['motor_1_tbo'], filtered_data['motor_1_horas']['horas'])
+    async def _buscar_html_async(self, url):
+        """Busca a página pelo transporte do seu tipo e guarda o HTML no cache local"""
+        transporte = self._preparar_busca(url)
+        if transporte.usa_cota:
+            await self._rate_limit_delay_async()
+
+        with self._requisicao(transporte, url):
+            if hasattr(transporte, 'buscar_async'):
+                result = await transporte.buscar_async(url)
+            else:
+                result = await asyncio.to_thread(transporte.buscar, url)
 
-            if filtered_data['motor_2_horas']['status'] != 'Desconhecido':
-                filtered_data['motor_2_left'] = engine_left_time(filtered_data['motor_2_tbo'], filtered_data['motor_2_horas']['horas'])
+        return await asyncio.to_thread(self._guardar_resposta, url, result)
 
-            print(f"✅ Dados extraídos: {filtered_data['fabricante']} {filtered_data['modelo']} - {filtered_data['ano']}")
+    async def filter_html_data_async(self, url, save_to_file=False, filtros=None):
+        """Filtra dados específicos de anúncios de aeronaves (ver filter_html_data)"""
+        try:
+            filtered_data = await asyncio.to_thread(self._do_historico_recente, url)
+            if filtered_data is not None:
+                return filtered_data
+
+            html_content = await self.scrape_as_html_async(url)
+            if not html_content:
+                return self._sem_html()
+
+            hash_html, filtered_data = await asyncio.to_thread(self._do_historico_inalterado, url, html_content)
+            if filtered_data is not None:
+                return filtered_data
+
+            filtered_data = self._resultado_parse(
+                url, *await self.executor_parse.executar_async(analisar_anuncio, url, html_content, filtros)
+            )
+            if filtered_data is not None and filtered_data != DESCARTADO:
+                await asyncio.to_thread(
+                    self._guardar_extracao, url, html_content, hash_html, filtered_data, save_to_file
+                )
             return filtered_data
 
         except Exception as e:
-            print(f"🚨 Erro na filtragem HTML: {e}")
-            import traceback
-            traceback.print_exc()
-            return None
\ No newline at end of file
+            return self._falha_filtragem(e)
@@ -6,6 +6,16 @@ from unittest.mock import Mock, MagicMock, patch
 # Adiciona o src ao path do Python
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+# Nos testes o orçamento de requisições fica só em memória; cache de HTML, histórico,
+# processos de parse e repositório de anúncios desligados
+os.environ.setdefault('RATE_LIMIT_DB', '')
+os.environ.setdefault('HTML_CACHE_DB', '')
+os.environ.setdefault('CRAWL_LEDGER_DB', '')
+os.environ.setdefault('PARSE_WORKERS', '0')
+os.environ.setdefault('LISTINGS_DB', '')
+os.environ.setdefault('PAGE_ARCHIVE_DIR', '')
+os.environ.setdefault('EXPORT_FORMAT', '')
+
 from src.web_scraping import FirecrawlScraper
 
 @pytest.fixture
@@ -16,6 +26,18 @@ def mock_firecrawl_app():
         mock_app.return_value = mock_instance
         yield mock_instance
 
+@pytest.fixture(autouse=True)
+def reset_rate_limit():
+    """Zera o orçamento compartilhado de requisições, o controle de taxa e o cache de buscas entre os testes"""
+    from src.web_scraping import limitador_compartilhado, buscas_compartilhadas, controle_compartilhado
+    limitador_compartilhado.reset()
+    controle_compartilhado.reset()
+    buscas_compartilhadas.limpar()
+    yield
+    limitador_compartilhado.reset()
+    controle_compartilhado.reset()
+    buscas_compartilhadas.limpar()
+
 @pytest.fixture
 def scraper(mock_firecrawl_app):
     """Fixture do scraper com mock"""
@@ -65,6 +87,48 @@ def sample_urls():
         'invalid_url': "https://invalid-url.com"
     }
 
+@pytest.fixture
+def servidor_local(sample_html_content, sample_search_html):
+    """Servidor HTTP local que faz as vezes do controller.com
+
+    Serve a página de busca em /listings/search e anúncios em /listing/...;
+    `conexoes` guarda a porta de origem de cada requisição recebida.
+    """
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    conexoes = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            conexoes.append(self.client_address[1])
+            if self.path.startswith('/listings/search'):
+                corpo, status = sample_search_html, 200
+            elif self.path.startswith('/listing/'):
+                corpo, status = sample_html_content, 200
+            else:
+                corpo, status = 'Not Found', 404
+            dados = corpo.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    servidor.base_url = f"http://127.0.0.1:{servidor.server_address[1]}"
+    servidor.conexoes = conexoes
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
 @pytest.fixture
 def scraper_real():
     """Scraper para testes reais (sem mocks)"""
@@ -76,6 +140,86 @@ def scraper_real():
     return FirecrawlScraper(api_key=api_key)
 
 
+def anuncio_fake(url, motor_1_left=1500.0, titulo="2012 PIPER SENECA V"):
+    """Registro no formato (tipado) devolvido por filter_html_data"""
+    return {
+        'url': url,
+        'titulo': titulo,
+        'preco': 695000.0,
+        'moeda': 'USD',
+        'localizacao': 'Cham, Zug, Switzerland',
+        'ano': 2012,
+        'fabricante': 'PIPER',
+        'modelo': 'SENECA V',
+        'motor_1_left': motor_1_left,
+        'motor_2_left': None,
+        'horas_totais': 2596.0,
+        'motor_1_horas': {'horas': 500.0, 'status': 'SMOH'},
+        'motor_2_horas': None,
+        'motor_1_tbo': 2000.0,
+        'motor_2_tbo': None,
+        'vendedor': 'Ralph Severin',
+        'telefone': '+41 79 446 91 84',
+    }
+
+@pytest.fixture
+def fake_scraper():
+    """Scraper falso para os testes da API: links e anúncios configuráveis"""
+    class FakeScraper:
+        links = []
+        links_por_modelo = {}
+        anuncios = {}
+        descartados = set()
+        erros = {}
+        extraidos = []
+
+        def __init__(self, api_key, **kwargs):
+            pass
+
+        def build_search_url(self, search):
+            url = f"https://www.controller.com/listings/search?Manufacturer={search['manufacturer']}"
+            if search.get('model'):
+                url += f"&Model={search['model']}"
+            return url
+
+        def iter_listing_links(self, search_url, max_paginas=None, save_to_file=False):
+            yield from self.links
+
+        def get_listing_links(self, search_url, max_paginas=None, save_to_file=False):
+            return list(self.links)
+
+        def filter_html_data(self, url, save_to_file=False, filtros=None):
+            return self.anuncios.get(url)
+
+        async def iter_listing_links_async(self, search_url, max_paginas=None, save_to_file=False):
+            modelo = search_url.partition('&Model=')[2]
+            for link in self.links_por_modelo.get(modelo, self.links):
+                yield link
+
+        async def filter_html_data_async(self, url, save_to_file=False, filtros=None):
+            self.extraidos.append(url)
+            if url in self.erros:
+                raise self.erros[url]
+            if url in self.descartados:
+                return 'descartado'
+            return self.anuncios.get(url)
+
+    return FakeScraper
+
+@pytest.fixture
+def api_client(fake_scraper, monkeypatch, tmp_path):
+    """Cliente HTTP da API com o scraper substituído pelo falso e repositório temporário"""
+    from fastapi.testclient import TestClient
+    from utils.repositorio_anuncios import RepositorioAnuncios
+    import main
+
+    monkeypatch.setenv('FIRECRAWL_API_KEY', 'test_key')
+    monkeypatch.setattr(main, 'AsyncFirecrawlScraper', fake_scraper)
+    monkeypatch.setattr(main, 'repositorio_anuncios', RepositorioAnuncios(str(tmp_path / 'anuncios.sqlite3')))
+    monkeypatch.chdir(tmp_path)
+    return TestClient(main.app)
+
+
 def pytest_configure(config):
     """Registrar marcas programaticamente - funciona mesmo sem pytest.ini"""
     config.addinivalue_line(
@@ -0,0 +1,329 @@
+import json
+import os
+import threading
+import time
+import pytest
+from tests.conftest import anuncio_fake
+
+LINKS = [f"https://www.controller.com/listing/{i}?print=1" for i in range(3)]
+BUSCA = {"manufacturer": "PIPER", "model": "SENECA V", "engine_left_time_min": "1000"}
+
+class TestScrapeApi:
+    """Testes de integração dos endpoints da API"""
+    
+    @pytest.mark.integration
+    def test_scrape_filtra_por_motor(self, api_client, fake_scraper):
+        """Testa o /scrape com o filtro de horas restantes do motor"""
+        fake_scraper.links = LINKS
+        fake_scraper.anuncios = {
+            LINKS[0]: anuncio_fake(LINKS[0], motor_1_left=1500.0),
+            LINKS[1]: anuncio_fake(LINKS[1], motor_1_left=200.0),
+        }
+        
+        response = api_client.post("/scrape", json=BUSCA)
+        
+        assert response.status_code == 200
+        assert [r['url'] for r in response.json()] == [LINKS[0]]
+    
+    @pytest.mark.integration
+    def test_scrape_descartado_no_pre_filtro(self, api_client, fake_scraper):
+        """Testa que o anúncio descartado antes do parse conta como processado, não como falha"""
+        fake_scraper.links = LINKS[:2]
+        fake_scraper.anuncios = {LINKS[0]: anuncio_fake(LINKS[0])}
+        fake_scraper.descartados = {LINKS[1]}
+        
+        response = api_client.post("/scrape/stream", json=BUSCA)
+        resumo = [json.loads(linha) for linha in response.text.splitlines()][-1]['dados']
+        
+        assert (resumo['processados'], resumo['aceitos'], resumo['falhas']) == (2, 1, 0)
+        assert [r['url'] for r in api_client.get("/listings").json()] == [LINKS[0]]
+    
+    @pytest.mark.integration
+    def test_scrape_ordena_e_limita(self, api_client, fake_scraper):
+        """Testa o top-k do /scrape pela métrica derivada"""
+        fake_scraper.links = LINKS
+        fake_scraper.anuncios = {
+            LINKS[0]: anuncio_fake(LINKS[0], motor_1_left=1100.0),
+            LINKS[1]: anuncio_fake(LINKS[1], motor_1_left=200.0),
+            LINKS[2]: anuncio_fake(LINKS[2], motor_1_left=1900.0),
+        }
+        
+        response = api_client.post("/scrape", json={**BUSCA, 'ordenar': 'preco_por_hora_restante', 'limite': 1})
+        
+        assert response.status_code == 200
+        assert [r['url'] for r in response.json()] == [LINKS[2]]
+        assert api_client.post("/scrape", json={**BUSCA, 'ordenar': 'registro'}).status_code == 422
+    
+    @pytest.mark.integration
+    def test_listings_consulta_o_repositorio(self, api_client, fake_scraper):
+        """Testa que os anúncios extraídos ficam consultáveis pelo GET /listings"""
+        fake_scraper.links = LINKS
+        fake_scraper.anuncios = {
+            LINKS[0]: anuncio_fake(LINKS[0], motor_1_left=1500.0),
+            LINKS[1]: anuncio_fake(LINKS[1], motor_1_left=200.0),
+        }
+        api_client.post("/scrape", json=BUSCA)
+        
+        todos = api_client.get("/listings").json()
+        filtrados = api_client.get("/listings", params={'modelo': 'seneca', 'motor_restante_min': 1000}).json()
+        
+        assert {r['url'] for r in todos} == set(LINKS[:2])
+        assert [r['url'] for r in filtrados] == [LINKS[0]]
+        assert api_client.get("/listings", params={'ordenar': 'registro'}).status_code == 422
+        
+        por_vida = api_client.get("/listings", params={'ordenar': '-vida_motor', 'limite': 1}).json()
+        assert [r['url'] for r in por_vida] == [LINKS[0]]
+    
+    @pytest.mark.integration
+    def test_scrape_batch_compartilha_anuncios(self, api_client, fake_scraper):
+        """Testa que o lote extrai cada anúncio uma vez e entrega a todas as buscas que o listaram"""
+        fake_scraper.links_por_modelo = {
+            'SENECA V': LINKS[:2],
+            'SENECA': LINKS[1:],
+        }
+        fake_scraper.anuncios = {
+            LINKS[0]: anuncio_fake(LINKS[0]),
+            LINKS[1]: anuncio_fake(LINKS[1], motor_1_left=1200.0),
+            LINKS[2]: anuncio_fake(LINKS[2], motor_1_left=200.0),
+        }
+        buscas = [
+            BUSCA,
+            {"manufacturer": "PIPER", "model": "SENECA", "engine_left_time_min": "100"},
+            {**BUSCA, "engine_left_time_min": "1300"},
+        ]
+        
+        response = api_client.post("/scrape/batch", json=buscas)
+        
+        assert response.status_code == 200
+        lote = response.json()
+        assert [b['busca']['model'] for b in lote] == ['SENECA V', 'SENECA', 'SENECA V']
+        assert [[r['url'] for r in b['resultados']] for b in lote] == [LINKS[:2], LINKS[1:], LINKS[:1]]
+        assert sorted(fake_scraper.extraidos) == sorted(LINKS)
+    
+    @pytest.mark.integration
+    def test_scrape_batch_erro_num_anuncio(self, api_client, fake_scraper):
+        """Testa que o erro inesperado num anúncio não descarta as demais extrações do lote"""
+        fake_scraper.links_por_modelo = {'SENECA V': LINKS[:2], 'SENECA': LINKS[1:]}
+        fake_scraper.anuncios = {link: anuncio_fake(link) for link in LINKS}
+        fake_scraper.erros = {LINKS[1]: RuntimeError("html inesperado")}
+        buscas = [BUSCA, {**BUSCA, "model": "SENECA"}]
+        
+        response = api_client.post("/scrape/batch", json=buscas)
+        
+        assert response.status_code == 200
+        assert [[r['url'] for r in b['resultados']] for b in response.json()] == [LINKS[:1], LINKS[2:]]
+    
+    @pytest.mark.integration
+    def test_scrape_batch_exporta_cada_anuncio_uma_vez(self, api_client, fake_scraper):
+        """Testa o ?exportar= do lote: os aceitos de todas as buscas, sem repetição"""
+        fake_scraper.links_por_modelo = {'SENECA V': LINKS[:2], 'SENECA': LINKS[1:]}
+        fake_scraper.anuncios = {link: anuncio_fake(link) for link in LINKS}
+        buscas = [BUSCA, {**BUSCA, "model": "SENECA"}]
+        
+        response = api_client.post("/scrape/batch?exportar=ndjson", json=buscas)
+        
+        with open(response.headers['X-Export-File'], encoding='utf-8') as f:
+            exportados = [json.loads(linha)['url'] for linha in f]
+        assert sorted(exportados) == LINKS
+    
+    @pytest.mark.integration
+    def test_scrape_batch_limite_de_buscas(self, api_client, monkeypatch):
+        """Testa a recusa de lotes maiores que BATCH_MAX_SEARCHES"""
+        monkeypatch.setenv('BATCH_MAX_SEARCHES', '2')
+        
+        response = api_client.post("/scrape/batch", json=[BUSCA] * 3)
+        
+        assert response.status_code == 400
+    
+    @pytest.mark.integration
+    def test_scrape_stream_ndjson(self, api_client, fake_scraper):
+        """Testa que o stream emite cada anúncio aceito e termina com o resumo"""
+        fake_scraper.links = LINKS
+        fake_scraper.anuncios = {link: anuncio_fake(link) for link in LINKS[:2]}
+        
+        response = api_client.post("/scrape/stream", json=BUSCA)
+        eventos = [json.loads(linha) for linha in response.text.splitlines() if linha]
+        
+        assert response.headers['content-type'].startswith("application/x-ndjson")
+        assert [e['tipo'] for e in eventos] == ['resultado', 'resultado', 'resumo']
+        assert {e['dados']['url'] for e in eventos[:2]} == set(LINKS[:2])
+        resumo = eventos[-1]['dados']
+        assert resumo['links_encontrados'] == 3
+        assert resumo['processados'] == 3
+        assert resumo['aceitos'] == 2
+        assert resumo['falhas'] == 1
+    
+    @pytest.mark.integration
+    def test_stream_termina_com_anuncio_cancelado(self, api_client, fake_scraper):
+        """Testa que um anúncio cancelado (ex.: líder do single-flight em outro stream) não trava o stream"""
+        import asyncio
+        import main
+        fake_scraper.links = LINKS[:2]
+        fake_scraper.anuncios = {LINKS[0]: anuncio_fake(LINKS[0])}
+        fake_scraper.erros = {LINKS[1]: asyncio.CancelledError()}
+        
+        async def consumir():
+            return [dados async for dados in main.iter_scraping(main.montar_search_datas(main.SearchData(**BUSCA)))]
+        
+        aceitos = asyncio.run(asyncio.wait_for(consumir(), timeout=5))
+        
+        assert [dados['url'] for dados in aceitos] == [LINKS[0]]
+    
+    @pytest.mark.integration
+    def test_scrape_stream_sse(self, api_client, fake_scraper):
+        """Testa o formato Server-Sent Events"""
+        fake_scraper.links = LINKS[:1]
+        fake_scraper.anuncios = {LINKS[0]: anuncio_fake(LINKS[0])}
+        
+        response = api_client.post("/scrape/stream?formato=sse", json=BUSCA)
+        
+        assert response.headers['content-type'].startswith("text/event-stream")
+        assert response.text.startswith("event: resultado\ndata: ")
+        assert "event: resumo\n" in response.text
+    
+    @pytest.mark.integration
+    def test_scrape_exporta_csv(self, api_client, fake_scraper):
+        """Testa o ?exportar= do /scrape: arquivo com os aceitos e caminho no cabeçalho"""
+        fake_scraper.links = LINKS
+        fake_scraper.anuncios = {
+            LINKS[0]: anuncio_fake(LINKS[0], motor_1_left=1500.0),
+            LINKS[1]: anuncio_fake(LINKS[1], motor_1_left=200.0),
+        }
+        
+        response = api_client.post("/scrape?exportar=csv", json=BUSCA)
+        
+        with open(response.headers['X-Export-File'], encoding='utf-8') as f:
+            linhas = f.read().splitlines()
+        assert linhas[0].startswith("url,titulo,preco,")
+        assert len(linhas) == 2 and linhas[1].startswith(f"{LINKS[0]},")
+        assert api_client.post("/scrape?exportar=xlsx", json=BUSCA).status_code == 422
+    
+    @pytest.mark.integration
+    def test_scrape_exporta_cada_anuncio_ao_ser_aceito(self, api_client, fake_scraper):
+        """Testa que sem ranking o anúncio é exportado antes de a busca terminar"""
+        import asyncio
+        import main
+        fake_scraper.links = LINKS[:2]
+        fake_scraper.anuncios = {link: anuncio_fake(link) for link in LINKS[:2]}
+        extrair = fake_scraper.filter_html_data_async
+        exportados = []
+        
+        async def cenario():
+            primeiro_exportado = asyncio.Event()
+            
+            class Exportador:
+                def escrever(self, dados):
+                    exportados.append(dados['url'])
+                    primeiro_exportado.set()
+            
+            async def extrair_depois_do_primeiro(self, url, *args):
+                # Só termina se o primeiro anúncio já estiver no arquivo
+                if url == LINKS[1]:
+                    await primeiro_exportado.wait()
+                return await extrair(self, url, *args)
+            
+            fake_scraper.filter_html_data_async = extrair_depois_do_primeiro
+            busca = main.montar_search_datas(main.SearchData(**BUSCA))
+            return await main.execute_scraping(busca, exportador=Exportador())
+        
+        resultados = asyncio.run(asyncio.wait_for(cenario(), timeout=5))
+        
+        assert exportados == LINKS[:2]
+        assert [r['url'] for r in resultados] == LINKS[:2]
+    
+    @pytest.mark.integration
+    def test_scrape_stream_exporta_ndjson(self, api_client, fake_scraper):
+        """Testa que o stream grava cada anúncio aceito e informa o arquivo no resumo"""
+        fake_scraper.links = LINKS
+        fake_scraper.anuncios = {link: anuncio_fake(link) for link in LINKS[:2]}
+        
+        response = api_client.post("/scrape/stream?exportar=ndjson", json=BUSCA)
+        resumo = [json.loads(linha) for linha in response.text.splitlines()][-1]['dados']
+        
+        with open(resumo['arquivo_exportado'], encoding='utf-8') as f:
+            exportados = [json.loads(linha) for linha in f]
+        assert {e['url'] for e in exportados} == set(LINKS[:2])
+        assert exportados[0]['motor_1_status'] == 'SMOH' and exportados[0]['motor_2_left'] is None
+    
+    @pytest.mark.integration
+    def test_job_submeter_e_consultar(self, api_client, fake_scraper):
+        """Testa o fluxo POST /jobs -> GET /jobs/{id} -> GET /jobs/{id}/results"""
+        fake_scraper.links = LINKS
+        fake_scraper.anuncios = {link: anuncio_fake(link) for link in LINKS[:2]}
+        
+        response = api_client.post("/jobs", json=BUSCA)
+        assert response.status_code == 202
+        job_id = response.json()['id']
+        
+        prazo = time.monotonic() + 10
+        while (job := api_client.get(f"/jobs/{job_id}").json())['status'] not in ('concluido', 'erro'):
+            assert time.monotonic() < prazo
+            time.sleep(0.05)
+        
+        assert job['status'] == 'concluido'
+        assert job['progresso']['links_encontrados'] == 3
+        assert job['progresso']['processados'] == 3
+        assert job['progresso']['aceitos'] == 2
+        resultados = api_client.get(f"/jobs/{job_id}/results").json()
+        assert {r['url'] for r in resultados} == set(LINKS[:2])
+        assert job['arquivo_exportado'] is None
+    
+    @pytest.mark.integration
+    def test_job_exporta_resultados(self, api_client, fake_scraper):
+        """Testa o ?exportar= do /jobs: caminho no status e arquivo completo ao concluir"""
+        fake_scraper.links = LINKS
+        fake_scraper.anuncios = {link: anuncio_fake(link) for link in LINKS[:2]}
+        
+        job = api_client.post("/jobs?exportar=csv", json=BUSCA).json()
+        
+        prazo = time.monotonic() + 10
+        while (job := api_client.get(f"/jobs/{job['id']}").json())['status'] not in ('concluido', 'erro'):
+            assert time.monotonic() < prazo
+            time.sleep(0.05)
+        
+        assert job['arquivo_exportado'].endswith('.csv')
+        with open(job['arquivo_exportado'], encoding='utf-8') as f:
+            linhas = f.read().splitlines()
+        assert len(linhas) == 3 and linhas[0].startswith("url,titulo,preco,")
+    
+    @pytest.mark.integration
+    def test_job_pendente_cancelado_nao_abre_exportacao(self, api_client, fake_scraper, monkeypatch):
+        """Testa que o job cancelado antes de rodar (desligamento) não cria o arquivo exportado"""
+        import main
+        from utils.jobs import GerenciadorJobs
+        gerenciador = GerenciadorJobs(max_workers=1)
+        monkeypatch.setattr(main, 'gerenciador_jobs', gerenciador)
+        liberar = threading.Event()
+        gerenciador.submeter(lambda progresso: liberar.wait(5), {})
+        
+        job = api_client.post("/jobs?exportar=csv", json=BUSCA).json()
+        gerenciador.desligar(aguardar=False)
+        liberar.set()
+        
+        assert job['status'] == 'pendente'
+        assert job['arquivo_exportado'].endswith('.csv')
+        assert not os.path.exists(job['arquivo_exportado'])
+    
+    @pytest.mark.integration
+    def test_job_inexistente(self, api_client):
+        """Testa o 404 para ids desconhecidos"""
+        assert api_client.get("/jobs/nao-existe").status_code == 404
+        assert api_client.get("/jobs/nao-existe/results").status_code == 404
+    
+    @pytest.mark.integration
+    def test_metrics_prometheus(self, api_client, fake_scraper):
+        """Testa que /metrics expõe as etapas e os contadores de anúncios"""
+        from prometheus_client import REGISTRY
+        antes = REGISTRY.get_sample_value('scraper_anuncios_processados_total', {'resultado': 'aceito'}) or 0
+        fake_scraper.links = LINKS[:2]
+        fake_scraper.anuncios = {LINKS[0]: anuncio_fake(LINKS[0])}
+        
+        api_client.post("/scrape", json=BUSCA)
+        response = api_client.get("/metrics")
+        
+        assert response.status_code == 200
+        assert response.headers['content-type'].startswith("text/plain")
+        for etapa in ('espera_rate_limit', 'fetch', 'parse', 'extracao', 'filtro', 'persistencia'):
+            assert f'scraper_etapa_segundos_count{{etapa="{etapa}"}}' in response.text
+        assert REGISTRY.get_sample_value('scraper_anuncios_processados_total', {'resultado': 'aceito'}) == antes + 1
+        assert REGISTRY.get_sample_value('scraper_etapa_segundos_count', {'etapa': 'persistencia'}) >= 1
@@ -0,0 +1,54 @@
+import os
+import pytest
+from src.utils.arquivo_paginas import ArquivoPaginas
+
+URL = "https://www.controller.com/listing/for-sale/237079783/2012-piper-seneca-v?print=1"
+
+class TestArquivoPaginas:
+    """Testes do arquivo de páginas brutas em segmentos gzip"""
+    
+    @pytest.fixture
+    def arquivo(self, tmp_path):
+        return ArquivoPaginas(str(tmp_path / "arquivo"))
+    
+    def test_paginas_de_anuncio_nao_colidem(self, arquivo):
+        """Testa que anúncios diferentes ficam separados (antes todos caíam no mesmo nome de arquivo)"""
+        outra = URL.replace("237079783", "237079784")
+        arquivo.guardar(URL, "<html>seneca</html>")
+        arquivo.guardar(outra, "<html>baron</html>")
+        
+        assert arquivo.ler(URL) == "<html>seneca</html>"
+        assert arquivo.ler(outra) == "<html>baron</html>"
+        assert arquivo.estatisticas()['urls'] == 2
+    
+    def test_versoes_e_repeticao(self, arquivo):
+        """Testa que cada versão é acrescentada e que a página repetida não é gravada de novo"""
+        assert arquivo.guardar(URL, "<html>v1</html>")
+        assert not arquivo.guardar(URL, "<html>v1</html>")
+        assert arquivo.guardar(URL, "<html>v2</html>")
+        
+        primeira, segunda = arquivo.versoes(URL)
+        
+        assert arquivo.ler(URL) == "<html>v2</html>"
+        assert arquivo.ler(URL, ate=primeira) == "<html>v1</html>"
+        assert arquivo.estatisticas()['repetidas'] == 1
+    
+    def test_troca_de_segmento(self, tmp_path):
+        """Testa a abertura de um novo segmento ao passar do tamanho configurado"""
+        arquivo = ArquivoPaginas(str(tmp_path / "arquivo"), tamanho_segmento=1)
+        for i in range(3):
+            arquivo.guardar(f"{URL}&v={i}", f"<html>{i}</html>")
+        
+        assert arquivo.estatisticas()['segmentos'] == 3
+        assert arquivo.ler(f"{URL}&v=1") == "<html>1</html>"
+    
+    def test_reindexar(self, arquivo):
+        """Testa a reconstrução do índice só a partir dos segmentos"""
+        for i in range(3):
+            arquivo.guardar(f"{URL}&v={i}", "<html>" + "x" * 1000 * i + "</html>")
+        os.remove(arquivo.caminho_indice)
+        
+        reaberto = ArquivoPaginas(arquivo.diretorio)
+        
+        assert reaberto.reindexar() == 3
+        assert reaberto.ler(f"{URL}&v=2") == "<html>" + "x" * 2000 + "</html>"
@@ -0,0 +1,161 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.utils.rate_limit import LimitadorRequisicoes
+from src.utils.transporte import PaginaBuscada, TransporteHTTP
+from src.utils.arquivo_paginas import ArquivoPaginas
+
+ANUNCIO = "https://www.controller.com/listing/piper-seneca-123?print=1"
+HTML_ANUNCIO = """<html><body><h1>2012 PIPER SENECA V</h1><div class="price">USD $695,000</div>
+    <p>Total Time: 2,596</p><p>Engine 1 Time: 500 SMOH</p><p>Engine 1 TBO: 1,800</p>
+    <p>Engine 2 Time: 450 SMOH</p><p>Engine 2 TBO: 1,800</p></body></html>"""
+
+class TransporteFalso:
+    """Transporte com buscar_async que devolve o HTML configurado"""
+    nome = 'falso'
+
+    def __init__(self, html, usa_cota=True, erros=()):
+        self.html = html
+        self.usa_cota = usa_cota
+        self.erros = list(erros)
+        self.chamadas = 0
+
+    async def buscar_async(self, url):
+        self.chamadas += 1
+        await asyncio.sleep(0.01)
+        if self.erros:
+            raise self.erros.pop(0)
+        return PaginaBuscada(html=self.html)
+
+class TestAsyncFirecrawlScraper:
+    """Testes do scraper assíncrono (sem bloquear o event loop)"""
+
+    @pytest.fixture
+    def criar_scraper(self, mock_firecrawl_app):
+        from src.web_scraping import AsyncFirecrawlScraper
+
+        def criar(transporte, **kwargs):
+            with patch('src.web_scraping.AsyncFirecrawlApp'):
+                return AsyncFirecrawlScraper(
+                    api_key="test_key", cache=False, historico=False,
+                    transportes={'busca': transporte, 'anuncio': transporte, 'outro': transporte}, **kwargs
+                )
+        return criar
+
+    def test_espera_do_limitador_nao_bloqueia_o_loop(self):
+        """Testa que outras corrotinas rodam enquanto a cota é aguardada"""
+        limitador = LimitadorRequisicoes(requisicoes_por_minuto=600)
+        batidas = []
+
+        async def cenario():
+            async def relogio():
+                while True:
+                    batidas.append(1)
+                    await asyncio.sleep(0.01)
+            tarefa = asyncio.create_task(relogio())
+            esperas = await asyncio.gather(*(limitador.aguardar_async() for _ in range(3)))
+            tarefa.cancel()
+            return esperas
+
+        esperas = asyncio.run(cenario())
+
+        assert esperas[0] == 0
+        assert max(esperas) == pytest.approx(0.2, abs=0.05)
+        assert len(batidas) >= 10
+
+    def test_filter_html_data_async(self, criar_scraper):
+        """Testa a extração completa de um anúncio pelo caminho assíncrono"""
+        transporte = TransporteFalso(HTML_ANUNCIO)
+        scraper = criar_scraper(transporte)
+
+        dados = asyncio.run(scraper.filter_html_data_async(ANUNCIO))
+
+        assert dados['fabricante'] == 'PIPER'
+        assert dados['motor_2_left'] == 1350.0
+        assert transporte.chamadas == 1
+
+    def test_descartado_antes_de_gravar_o_html(self, criar_scraper, tmp_path):
+        """Testa que o anúncio fora da busca não é gravado no arquivo de páginas"""
+        arquivo = ArquivoPaginas(str(tmp_path / "arquivo"))
+        scraper = criar_scraper(TransporteFalso(HTML_ANUNCIO), arquivo=arquivo)
+        fora = {'year': None, 'price': None, 'engine_left_time_min': '1500', 'engine_left_time_max': '1000000000'}
+        dentro = {**fora, 'engine_left_time_min': '1000'}
+
+        descartado = asyncio.run(scraper.filter_html_data_async(ANUNCIO, True, [fora]))
+        assert arquivo.estatisticas()['paginas'] == 0
+
+        dados = asyncio.run(scraper.filter_html_data_async(ANUNCIO, True, [dentro]))
+
+        assert descartado == 'descartado'
+        assert dados['motor_2_left'] == 1350.0
+        assert arquivo.ler(ANUNCIO) == HTML_ANUNCIO
+
+    def test_pagina_de_busca_arquivada(self, criar_scraper, sample_search_html, tmp_path):
+        """Testa que com save_to_file a página de resultados vai para o arquivo de páginas"""
+        arquivo = ArquivoPaginas(str(tmp_path / "arquivo"))
+        scraper = criar_scraper(TransporteFalso(sample_search_html), arquivo=arquivo)
+        busca = "https://www.controller.com/listings/search?Manufacturer=PIPER"
+
+        links = asyncio.run(scraper.get_listing_links_async(busca, save_to_file=True))
+
+        assert len(links) == 2
+        assert arquivo.ler(busca) == sample_search_html
+
+    def test_buscas_simultaneas_da_mesma_pagina(self, criar_scraper):
+        """Testa que corrotinas pedindo a mesma página fazem uma única requisição"""
+        transporte = TransporteFalso(HTML_ANUNCIO)
+        scraper = criar_scraper(transporte)
+
+        async def cenario():
+            return await asyncio.gather(*(scraper.scrape_as_html_async(ANUNCIO) for _ in range(3)))
+
+        assert asyncio.run(cenario()) == [HTML_ANUNCIO] * 3
+        assert transporte.chamadas == 1
+
+    def test_rate_limit_repete_com_asyncio_sleep(self, criar_scraper):
+        """Testa que o retry por rate limit espera com asyncio.sleep, e não time.sleep"""
+        transporte = TransporteFalso(HTML_ANUNCIO, erros=[Exception("Rate Limit Exceeded: retry after 3s")])
+        scraper = criar_scraper(transporte, limitador=LimitadorRequisicoes(requisicoes_por_minuto=600))
+
+        with patch('src.web_scraping.time.sleep') as mock_sleep, \
+             patch.object(scraper, '_espera_rate_limit', return_value=0) as mock_espera:
+            html = asyncio.run(scraper.scrape_as_html_async(ANUNCIO))
+
+        assert html == HTML_ANUNCIO
+        assert transporte.chamadas == 2
+        assert "retry after 3s" in str(mock_espera.call_args[0][0])
+        mock_sleep.assert_not_called()
+
+    def test_espera_rate_limit(self, scraper):
+        """Testa o tempo de espera lido da mensagem do Firecrawl, com jitter e backoff sem a dica"""
+        with patch('src.utils.rate_limit.random.uniform', side_effect=lambda a, b: b):
+            assert scraper._espera_rate_limit(Exception("Rate Limit Exceeded: retry after 7s")) == 9 * 1.25
+            assert scraper._espera_rate_limit(Exception("Rate Limit Exceeded"), 3) == 20 * 1.25
+        assert 9 <= scraper._espera_rate_limit(Exception("Rate Limit Exceeded: retry after 7s")) <= 9 * 1.25
+
+    def test_firecrawl_usa_cliente_assincrono(self, mock_firecrawl_app):
+        """Testa que o transporte do Firecrawl usa o AsyncFirecrawlApp"""
+        from src.web_scraping import AsyncFirecrawlScraper
+
+        with patch('src.web_scraping.AsyncFirecrawlApp') as mock_async_app:
+            mock_async_app.return_value.scrape = AsyncMock(return_value=MagicMock(html=HTML_ANUNCIO))
+            scraper = AsyncFirecrawlScraper(api_key="test_key", cache=False, historico=False,
+                                            transportes={'anuncio': 'firecrawl'})
+
+        assert asyncio.run(scraper.scrape_as_html_async(ANUNCIO)) == HTML_ANUNCIO
+        mock_async_app.return_value.scrape.assert_awaited_once_with(ANUNCIO)
+        mock_firecrawl_app.scrape.assert_not_called()
+
+    def test_links_da_busca_pelo_servidor_local(self, criar_scraper, servidor_local):
+        """Testa a coleta assíncrona de links com o transporte HTTP"""
+        transporte = TransporteHTTP(timeout=5)
+        try:
+            scraper = criar_scraper(transporte)
+            links = asyncio.run(scraper.get_listing_links_async(f"{servidor_local.base_url}/listings/search?Manufacturer=PIPER"))
+        finally:
+            transporte.fechar()
+
+        assert links == [
+            "https://www.controller.com/listing/piper-archer-123?print=1",
+            "https://www.controller.com/listing/cessna-172-456?print=1",
+        ]
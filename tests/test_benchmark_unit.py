@@ -0,0 +1,26 @@
+import pytest
+from benchmarks import bench_extracao
+
+class TestBenchmarkExtracao:
+    """Testes unitários para o benchmark offline"""
+    
+    def test_comparar_detecta_regressao(self):
+        """Testa que piora além da tolerância é apontada, nos dois sentidos"""
+        baseline = {'filter_html_data': {'p50_ms': 10.0}, 'anuncios_por_segundo': 100.0}
+        
+        assert bench_extracao.comparar({'filter_html_data': {'p50_ms': 11.0}, 'anuncios_por_segundo': 90.0}, baseline) == []
+        regressoes = bench_extracao.comparar({'filter_html_data': {'p50_ms': 14.0}, 'anuncios_por_segundo': 60.0}, baseline)
+        
+        assert len(regressoes) == 2
+        assert regressoes[0].startswith('filter_html_data.p50_ms')
+    
+    @pytest.mark.slow
+    def test_executa_sobre_o_corpus(self):
+        """Testa uma rodada curta sobre o corpus versionado, sem rede"""
+        relatorio = bench_extracao.executar(bench_extracao.carregar_corpus(), repeticoes=1)
+        
+        assert relatorio['corpus']['anuncio'] > 0
+        assert relatorio['filter_html_data']['n'] == relatorio['corpus']['anuncio']
+        assert relatorio['links_por_busca'] == 28 * relatorio['corpus']['busca']
+        assert relatorio['anuncios_por_segundo'] > 0
+        assert relatorio['pico_memoria_mb'] > 0
@@ -0,0 +1,198 @@
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch
+from src.utils.cache_buscas import CacheBuscas, ColetaIncompleta, SingleFlight
+
+BUSCA = "https://www.controller.com/listings/search?Manufacturer=PIPER&Model=SENECA%20V"
+
+class TestCacheBuscas:
+    """Testes unitários para o cache de buscas e o single-flight"""
+    
+    def test_busca_repetida_vem_do_cache(self):
+        """Testa que a mesma busca (URL canônica) não refaz a coleta"""
+        cache = CacheBuscas(ttl=60)
+        chamadas = []
+        
+        def produzir():
+            chamadas.append(1)
+            yield from ['a', 'b']
+        
+        assert list(cache.iterar(BUSCA, produzir)) == ['a', 'b']
+        assert list(cache.iterar("https://WWW.controller.com/listings/search/?Model=SENECA%20V&Manufacturer=PIPER", produzir)) == ['a', 'b']
+        assert len(chamadas) == 1
+        assert cache.estatisticas()['hits'] == 1
+    
+    def test_cache_expira(self):
+        """Testa o TTL das buscas em cache"""
+        cache = CacheBuscas(ttl=60)
+        
+        with patch('src.utils.cache_buscas.time.time', side_effect=[100.0, 200.0, 200.0]):
+            list(cache.iterar(BUSCA, lambda: iter(['a'])))
+            assert list(cache.iterar(BUSCA, lambda: iter(['b']))) == ['b']
+        
+        assert cache.estatisticas()['misses'] == 2
+    
+    def test_buscas_simultaneas_compartilham_a_coleta(self):
+        """Testa que uma busca em andamento é compartilhada em vez de repetida"""
+        cache = CacheBuscas(ttl=60)
+        liberar = threading.Event()
+        chamadas = []
+        
+        def produzir():
+            chamadas.append(1)
+            yield 'a'
+            liberar.wait(5)
+            yield 'b'
+        
+        primeira = cache.iterar(BUSCA, produzir)
+        assert next(primeira) == 'a'
+        segunda = cache.iterar(BUSCA, produzir)
+        assert next(segunda) == 'a'
+        liberar.set()
+        
+        assert list(primeira) == ['b']
+        assert list(segunda) == ['b']
+        assert len(chamadas) == 1
+        assert cache.estatisticas()['coalescidas'] == 1
+    
+    def test_erro_nao_fica_em_cache(self):
+        """Testa que a exceção chega a quem consome e a busca não é guardada"""
+        cache = CacheBuscas(ttl=60)
+        
+        def produzir():
+            yield 'a'
+            raise RuntimeError("falhou")
+        
+        with pytest.raises(RuntimeError):
+            list(cache.iterar(BUSCA, produzir))
+        assert list(cache.iterar(BUSCA, lambda: iter(['c']))) == ['c']
+    
+    def test_coleta_incompleta_nao_fica_em_cache(self):
+        """Testa que os links de uma coleta com página falha chegam, mas não são guardados"""
+        cache = CacheBuscas(ttl=60)
+        
+        def produzir():
+            yield 'a'
+            raise ColetaIncompleta("1 de 2 páginas da busca falharam")
+        
+        assert list(cache.iterar(BUSCA, produzir)) == ['a']
+        assert list(cache.iterar(BUSCA, lambda: iter(['b']))) == ['b']
+        assert cache.estatisticas()['misses'] == 2
+    
+    def test_entradas_vencidas_saem_ao_guardar_outra(self):
+        """Testa que buscas variadas não acumulam entradas vencidas no cache"""
+        cache = CacheBuscas(ttl=60)
+        
+        with patch('src.utils.cache_buscas.time.time', side_effect=[100.0, 130.0, 200.0]):
+            list(cache.iterar(BUSCA, lambda: iter(['a'])))
+            list(cache.iterar(BUSCA + "&Page=2", lambda: iter(['b'])))
+            list(cache.iterar(BUSCA + "&Page=3", lambda: iter(['c'])))
+        
+        assert len(cache._entradas) == 1
+    
+    def test_single_flight(self):
+        """Testa que chamadas simultâneas da mesma chave executam a função uma vez"""
+        voos = SingleFlight()
+        liberar = threading.Event()
+        chamadas = []
+        
+        def buscar():
+            chamadas.append(1)
+            liberar.wait(5)
+            return "<html></html>"
+        
+        resultados = []
+        threads = [threading.Thread(target=lambda: resultados.append(voos.executar('x', buscar))) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        while voos.coalescidas < 2:
+            pass
+        liberar.set()
+        for thread in threads:
+            thread.join(5)
+        
+        assert resultados == ["<html></html>"] * 3
+        assert len(chamadas) == 1
+    
+    def test_single_flight_async(self):
+        """Testa que corrotinas simultâneas da mesma chave executam a corrotina uma vez"""
+        voos = SingleFlight()
+        chamadas = []
+        
+        async def buscar():
+            chamadas.append(1)
+            await asyncio.sleep(0.05)
+            return "<html></html>"
+        
+        async def cenario():
+            return await asyncio.gather(*(voos.executar_async('x', buscar) for _ in range(3)))
+        
+        assert asyncio.run(cenario()) == ["<html></html>"] * 3
+        assert len(chamadas) == 1
+        assert voos.coalescidas == 2
+    
+    def test_single_flight_lider_cancelado(self):
+        """Testa que o cancelamento do líder não chega a quem espera: o próximo busca de novo"""
+        voos = SingleFlight()
+        chamadas = []
+        
+        async def buscar():
+            chamadas.append(1)
+            await asyncio.sleep(0.05)
+            return "<html></html>"
+        
+        async def cenario():
+            lider = asyncio.create_task(voos.executar_async('x', buscar))
+            await asyncio.sleep(0)
+            seguidor = asyncio.create_task(voos.executar_async('x', buscar))
+            outro = asyncio.create_task(voos.executar_async('x', buscar))
+            await asyncio.sleep(0.01)
+            lider.cancel()
+            outro.cancel()
+            return await seguidor, lider.cancelled(), outro.cancelled()
+        
+        assert asyncio.run(cenario()) == ("<html></html>", True, True)
+        assert len(chamadas) == 2
+        assert voos._em_voo == {}
+    
+    def test_busca_async_compartilhada_e_em_cache(self):
+        """Testa a coleta assíncrona: simultâneas juntadas, repetidas servidas do cache"""
+        cache = CacheBuscas(ttl=60)
+        chamadas = []
+        
+        async def produzir():
+            chamadas.append(1)
+            for link in ['a', 'b']:
+                await asyncio.sleep(0.01)
+                yield link
+        
+        async def coletar():
+            return [link async for link in cache.iterar_async(BUSCA, produzir)]
+        
+        async def cenario():
+            simultaneas = await asyncio.gather(coletar(), coletar())
+            return simultaneas + [await coletar()]
+        
+        assert asyncio.run(cenario()) == [['a', 'b']] * 3
+        assert len(chamadas) == 1
+        assert cache.estatisticas() == {'hits': 1, 'misses': 1, 'coalescidas': 1, 'entradas': 1, 'em_andamento': 0}
+    
+    def test_busca_async_junta_com_thread(self):
+        """Testa que uma busca síncrona (thread) recebe os links da coleta assíncrona em andamento"""
+        cache = CacheBuscas(ttl=60)
+        
+        async def produzir():
+            yield 'a'
+            await asyncio.sleep(0.1)
+            yield 'b'
+        
+        async def cenario():
+            iterador = cache.iterar_async(BUSCA, produzir)
+            primeiro = await iterador.__anext__()
+            da_thread = asyncio.ensure_future(asyncio.to_thread(lambda: list(cache.iterar(BUSCA, lambda: iter(["x"])))))
+            resto = [link async for link in iterador]
+            return [primeiro] + resto, await da_thread
+        
+        assert asyncio.run(cenario()) == (['a', 'b'], ['a', 'b'])
+        assert cache.estatisticas()['coalescidas'] == 1
@@ -0,0 +1,66 @@
+import pytest
+from unittest.mock import patch
+from src.utils.cache_html import CacheHTML, normalizar_url, tipo_pagina
+
+@pytest.fixture
+def cache(tmp_path):
+    """Cache de HTML em diretório temporário"""
+    return CacheHTML(str(tmp_path / "html_cache.sqlite3"))
+
+class TestCacheHTML:
+    """Testes unitários para o cache de HTML em disco"""
+    
+    def test_normalizar_url(self):
+        """Testa que variações da mesma URL geram a mesma chave"""
+        a = normalizar_url("HTTPS://WWW.Controller.com/listings/search/?Model=SENECA&Manufacturer=PIPER#topo")
+        b = normalizar_url("https://www.controller.com/listings/search?Manufacturer=PIPER&Model=SENECA")
+        
+        assert a == b
+    
+    def test_tipo_pagina(self):
+        """Testa a classificação por tipo de página"""
+        assert tipo_pagina("https://www.controller.com/listings/search?Manufacturer=PIPER") == 'busca'
+        assert tipo_pagina("https://www.controller.com/listing/for-sale/237079783/x?print=1") == 'anuncio'
+        assert tipo_pagina("https://www.controller.com/about") == 'outro'
+    
+    def test_hit_e_miss(self, cache):
+        """Testa leitura após escrita e os contadores"""
+        url = "https://www.controller.com/listing/piper-archer-123?print=1"
+        
+        assert cache.obter(url) is None
+        cache.guardar(url, "<html>Anúncio</html>")
+        
+        assert cache.obter(url) == "<html>Anúncio</html>"
+        stats = cache.estatisticas()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['entradas'] == 1
+    
+    def test_ttl_por_tipo(self, tmp_path):
+        """Testa que páginas de busca expiram antes das de anúncio"""
+        cache = CacheHTML(str(tmp_path / "c.sqlite3"), ttl={'busca': 60, 'anuncio': 3600})
+        busca = "https://www.controller.com/listings/search?Manufacturer=PIPER"
+        anuncio = "https://www.controller.com/listing/piper-archer-123?print=1"
+        
+        with patch('src.utils.cache_html.time.time', return_value=1000.0):
+            cache.guardar(busca, "<html>busca</html>")
+            cache.guardar(anuncio, "<html>anuncio</html>")
+        
+        with patch('src.utils.cache_html.time.time', return_value=1000.0 + 120):
+            assert cache.obter(busca) is None
+            assert cache.obter(anuncio) == "<html>anuncio</html>"
+    
+    def test_despejo_lru_por_tamanho(self, cache):
+        """Testa que a entrada acessada há mais tempo sai quando o limite é excedido"""
+        with patch('src.utils.cache_html.time.time', side_effect=[1.0, 2.0, 3.0, 4.0, 5.0, 5.0, 5.0]):
+            cache.guardar("https://www.controller.com/listing/a", "<html>a</html>")
+            cache.guardar("https://www.controller.com/listing/b", "<html>b</html>")
+            # Acessar "a" torna "b" a entrada mais antiga
+            cache.obter("https://www.controller.com/listing/a")
+            cache.tamanho_maximo = cache.estatisticas()['tamanho_bytes']
+            cache.guardar("https://www.controller.com/listing/c", "<html>c</html>")
+            
+            assert cache.obter("https://www.controller.com/listing/b") is None
+            assert cache.obter("https://www.controller.com/listing/a") == "<html>a</html>"
+            assert cache.obter("https://www.controller.com/listing/c") == "<html>c</html>"
+        assert cache.estatisticas()['despejos'] == 1
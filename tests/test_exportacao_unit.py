@@ -0,0 +1,82 @@
+import csv
+import json
+import pytest
+from tests.conftest import anuncio_fake
+from src.utils.extracao import StatusMotor
+from src.utils.exportacao import NOMES_COLUNAS, Exportador, ExportadorCSV, ExportadorNDJSON, criar_exportador, linha
+
+def registro(n=0, **campos):
+    dados = anuncio_fake(f"https://www.controller.com/listing/{n}?print=1")
+    dados.update(campos)
+    return dados
+
+class TestExportacao:
+    """Testes dos exportadores Parquet, CSV e NDJSON"""
+
+    def test_linha_plana_e_tipada(self):
+        """Testa que as horas dos motores viram colunas e o status vira texto"""
+        valores = linha(registro(motor_1_horas={'horas': 500.0, 'status': StatusMotor.SMOH}))
+
+        assert tuple(valores) == NOMES_COLUNAS
+        assert valores['motor_1_horas'] == 500.0
+        assert valores['motor_1_status'] == 'SMOH' and type(valores['motor_1_status']) is str
+        assert valores['motor_2_horas'] is None and valores['motor_2_status'] is None
+        assert valores['ano'] == 2012
+
+    def test_ndjson_grava_cada_linha_ao_escrever(self, tmp_path):
+        """Testa que a linha já está no disco antes de o exportador ser fechado"""
+        caminho = tmp_path / "anuncios.ndjson"
+        exportador = ExportadorNDJSON(str(caminho))
+
+        exportador.escrever(registro(0))
+        parcial = caminho.read_text(encoding='utf-8').splitlines()
+        exportador.escrever(registro(1))
+        exportador.fechar()
+        exportador.fechar()
+
+        assert len(parcial) == 1
+        linhas = [json.loads(texto) for texto in caminho.read_text(encoding='utf-8').splitlines()]
+        assert [l['url'] for l in linhas] == [registro(n)['url'] for n in range(2)]
+        assert linhas[0]['preco'] == 695000.0 and linhas[0]['motor_2_tbo'] is None
+
+    def test_csv_com_cabecalho_e_vazios(self, tmp_path):
+        """Testa o CSV: cabeçalho de COLUNAS e ausentes como célula vazia"""
+        caminho = tmp_path / "anuncios.csv"
+        with ExportadorCSV(str(caminho)) as exportador:
+            exportador.escrever_todos([registro(0), registro(1, ano=None)])
+
+        with open(caminho, encoding='utf-8', newline='') as f:
+            linhas = list(csv.DictReader(f))
+
+        assert tuple(linhas[0]) == NOMES_COLUNAS
+        assert linhas[0]['ano'] == '2012' and linhas[1]['ano'] == ''
+        assert linhas[0]['motor_2_left'] == ''
+
+    def test_parquet_com_tipos(self, tmp_path):
+        """Testa o Parquet: colunas tipadas e um row group a cada `tamanho_grupo` linhas"""
+        pq = pytest.importorskip('pyarrow.parquet')
+        from src.utils.exportacao import ExportadorParquet
+
+        caminho = tmp_path / "anuncios.parquet"
+        with ExportadorParquet(str(caminho), tamanho_grupo=2) as exportador:
+            exportador.escrever_todos([registro(n, ano=None if n == 2 else 2012) for n in range(3)])
+
+        arquivo = pq.ParquetFile(str(caminho))
+        tabela = arquivo.read()
+        assert arquivo.num_row_groups == 2
+        assert str(tabela.schema.field('ano').type) == 'int64'
+        assert str(tabela.schema.field('preco').type) == 'double'
+        assert tabela.column('ano').to_pylist() == [2012, 2012, None]
+
+    def test_criar_exportador(self, tmp_path):
+        """Testa o arquivo novo por exportação e o formato desconhecido"""
+        with criar_exportador('ndjson', str(tmp_path / "exportacoes")) as primeiro, \
+             criar_exportador('ndjson', str(tmp_path / "exportacoes")) as segundo:
+            pass
+
+        assert primeiro.caminho != segundo.caminho
+        assert primeiro.caminho.endswith('.ndjson')
+        with pytest.raises(ValueError):
+            criar_exportador('xlsx', str(tmp_path))
+        with pytest.raises(TypeError):
+            Exportador(str(tmp_path / "abstrato"))
@@ -0,0 +1,80 @@
+from bs4 import BeautifulSoup
+from src.utils.engine import engine_left_time
+from src.utils.extracao import (
+    SELETORES, primeiros_elementos, CONTACT_PATTERNS, _primeiro_match,
+    extrair_dados, normalizar_registro, preco_e_moeda,
+)
+
+class TestMotorExtracao:
+    """Testes unitários para o motor de extração"""
+    
+    def test_primeiros_elementos_igual_select_one(self, sample_html_content):
+        """Testa que a passada única encontra o mesmo elemento que select_one"""
+        html = sample_html_content + """
+            <span class="subtitle">Sub</span>
+            <div class="x-cost y">Call for price</div>
+            <a href="https://maps.google.com/?q=Orlando">Orlando</a>
+            <a href="https://www.google.com/maps/search/Orlando">Orlando, FL</a>
+        """
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        encontrados = primeiros_elementos(soup)
+        
+        for seletor in SELETORES:
+            assert encontrados.get(seletor) is soup.select_one(seletor), seletor
+    
+    def test_contato_ultimo_padrao_vence(self):
+        """Testa que a ordem invertida reproduz o 'último padrão que casa'"""
+        html = "<p>Contact: Ralph Severin<br/></p>"
+        
+        match = _primeiro_match(CONTACT_PATTERNS, html)
+        
+        assert match.group(1).strip() == "Ralph Severin"
+    
+    def test_monomotor_sem_motor_2(self):
+        """Testa que anúncio com um único motor deixa os campos do motor 2 nulos"""
+        html = """<html><h1>1979 CESSNA 172 SKYHAWK</h1><div class="price">USD $85,000</div>
+            <p>Total Time: 3,200</p><p>Engine 1 Time: 1,200 SMOH</p><p>Engine 1 TBO: 2,000</p></html>"""
+        
+        dados = extrair_dados("https://www.controller.com/listing/1", BeautifulSoup(html, 'html.parser'), html)
+        
+        assert (dados['preco'], dados['moeda'], dados['ano']) == (85000.0, 'USD', 1979)
+        assert dados['motor_1_horas'] == {'horas': 1200.0, 'status': 'SMOH'}
+        assert dados['motor_1_left'] == 800.0
+        assert dados['motor_2_horas'] is None and dados['motor_2_left'] is None
+        assert dados['vendedor'] is None
+    
+    def test_tbo_de_referencia_fica_a_parte(self):
+        """Testa que o TBO nominal do modelo do motor não vira TBO do anúncio nem horas restantes"""
+        html = """<html><h1>1998 PIPER SENECA</h1><p>Engine 1 Time: 900 SMOH</p>
+            <p>Upgraded with a Lycoming TIO-540-AE2A conversion kit</p></html>"""
+        
+        dados = extrair_dados("https://www.controller.com/listing/1", BeautifulSoup(html, 'html.parser'), html)
+        
+        assert dados['motor_tbo_referencia'] == 1800.0
+        assert dados['motor_1_tbo'] is None and dados['motor_1_left'] is None
+    
+    def test_preco_e_moeda(self):
+        """Testa a separação do valor e da moeda"""
+        assert preco_e_moeda('USD $695,000') == (695000.0, 'USD')
+        assert preco_e_moeda('$85,000') == (85000.0, 'USD')
+        assert preco_e_moeda('Call for price') == (None, None)
+    
+    def test_normalizar_registro_antigo(self):
+        """Testa a conversão de um registro gravado antes da extração tipada"""
+        antigo = {'preco': 'USD $450,000', 'ano': '1998', 'horas_totais': '4200',
+                  'motor_1_horas': {'horas': '900', 'status': 'SNEW'}, 'motor_1_left': '900.00',
+                  'motor_2_left': 'Não encontrado', 'vendedor': 'Não encontrado'}
+        
+        dados = normalizar_registro(antigo)
+        
+        assert dados == {'preco': 450000.0, 'moeda': 'USD', 'ano': 1998, 'horas_totais': 4200.0,
+                         'motor_1_horas': {'horas': 900.0, 'status': 'SNEW'}, 'motor_1_left': 900.0,
+                         'motor_2_left': None, 'vendedor': None}
+        assert normalizar_registro(dados) == dados
+    
+    def test_engine_left_time_sem_dados(self):
+        """Testa que a ausência de horas ou TBO resulta em None"""
+        assert engine_left_time(None, 5) is None
+        assert engine_left_time(2000.0, None) is None
+        assert engine_left_time(2000.0, 1200.0) == 800.0
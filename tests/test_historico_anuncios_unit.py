@@ -0,0 +1,68 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from src.utils.historico_anuncios import HistoricoAnuncios, hash_conteudo
+from src.web_scraping import FirecrawlScraper
+
+URL = "https://www.controller.com/listing/piper-seneca-1?print=1"
+REGISTRO = {'url': URL, 'fabricante': 'PIPER', 'modelo': 'SENECA V', 'ano': 2012, 'motor_1_left': 1500.0}
+
+class TestHistoricoAnuncios:
+    """Testes unitários para o modo incremental (histórico de anúncios)"""
+    
+    @pytest.fixture
+    def scraper_incremental(self, mock_firecrawl_app, tmp_path):
+        def criar(intervalo):
+            historico = HistoricoAnuncios(str(tmp_path / "ledger.sqlite3"), intervalo_reverificacao=intervalo)
+            return FirecrawlScraper(api_key="test_key", historico=historico)
+        mock_firecrawl_app.scrape.return_value = MagicMock(html="<html>anuncio</html>")
+        return criar
+    
+    @patch('src.web_scraping.analisar_anuncio', return_value=(dict(REGISTRO), 0.0, 0.0))
+    def test_anuncio_recente_nao_e_buscado(self, mock_extrair, scraper_incremental, mock_firecrawl_app):
+        """Testa que um anúncio verificado dentro do intervalo não gasta requisição"""
+        scraper = scraper_incremental(3600)
+        
+        assert scraper.filter_html_data(URL) == REGISTRO
+        assert scraper.filter_html_data(URL) == REGISTRO
+        
+        mock_firecrawl_app.scrape.assert_called_once()
+        mock_extrair.assert_called_once()
+        assert scraper.historico.estatisticas()['reaproveitados'] == 1
+    
+    @patch('src.utils.rate_limit.time.sleep')
+    @patch('src.web_scraping.analisar_anuncio', return_value=(dict(REGISTRO), 0.0, 0.0))
+    def test_reverifica_e_nao_reprocessa_html_igual(self, mock_extrair, mock_sleep, scraper_incremental, mock_firecrawl_app):
+        """Testa que, vencido o intervalo, a página é buscada mas só reprocessada se mudou"""
+        scraper = scraper_incremental(0)
+        
+        scraper.filter_html_data(URL)
+        scraper.filter_html_data(URL)
+        assert mock_firecrawl_app.scrape.call_count == 2
+        mock_extrair.assert_called_once()
+        
+        mock_firecrawl_app.scrape.return_value = MagicMock(html="<html>preco novo</html>")
+        scraper.filter_html_data(URL)
+        assert mock_extrair.call_count == 2
+        
+        estatisticas = scraper.historico.estatisticas()
+        assert (estatisticas['inalterados'], estatisticas['alterados'], estatisticas['entradas']) == (1, 2, 1)
+    
+    def test_url_normalizada(self, tmp_path):
+        """Testa que variações da mesma URL caem na mesma entrada"""
+        historico = HistoricoAnuncios(str(tmp_path / "ledger.sqlite3"))
+        historico.guardar(URL, hash_conteudo("<html></html>"), REGISTRO)
+        
+        assert historico.recente("https://WWW.controller.com/listing/piper-seneca-1/?print=1") == REGISTRO
+    
+    def test_registro_antigo_convertido_na_leitura(self, tmp_path):
+        """Testa que registros gravados antes da extração tipada voltam com números e None"""
+        historico = HistoricoAnuncios(str(tmp_path / "ledger.sqlite3"))
+        antigo = {**REGISTRO, 'ano': '2012', 'preco': 'USD $695,000', 'motor_1_left': '1500.00',
+                  'motor_2_left': 'Não encontrado', 'motor_1_horas': {'horas': '500', 'status': 'SMOH'}}
+        historico.guardar(URL, hash_conteudo("<html></html>"), antigo)
+        
+        registro = historico.recente(URL)
+        
+        assert (registro['ano'], registro['preco'], registro['moeda']) == (2012, 695000.0, 'USD')
+        assert (registro['motor_1_left'], registro['motor_2_left']) == (1500.0, None)
+        assert registro['motor_1_horas'] == {'horas': 500.0, 'status': 'SMOH'}
@@ -0,0 +1,65 @@
+import pytest
+from src.utils.jobs import GerenciadorJobs, CONCLUIDO, ERRO
+
+class TestGerenciadorJobs:
+    """Testes unitários para os jobs em segundo plano"""
+    
+    @pytest.fixture
+    def gerenciador(self):
+        gerenciador = GerenciadorJobs(max_workers=1, max_finalizados=2)
+        yield gerenciador
+        gerenciador.desligar()
+    
+    def _esperar(self, gerenciador):
+        gerenciador._executor.submit(lambda: None).result(timeout=5)
+    
+    def test_job_concluido_com_progresso(self, gerenciador):
+        """Testa que o job roda em segundo plano e expõe progresso e resultados"""
+        def executar(progresso):
+            progresso['processados'] = 2
+            return [{'url': 'a'}, {'url': 'b'}]
+        
+        job_id = gerenciador.submeter(executar, {'processados': 0})
+        self._esperar(gerenciador)
+        job = gerenciador.obter(job_id)
+        
+        assert job['status'] == CONCLUIDO
+        assert job['progresso'] == {'processados': 2}
+        assert job['total_resultados'] == 2
+        assert gerenciador.resultados(job_id) == (CONCLUIDO, [{'url': 'a'}, {'url': 'b'}])
+    
+    def test_job_com_erro(self, gerenciador):
+        """Testa que exceções viram status de erro em vez de sumir"""
+        def executar(progresso):
+            raise RuntimeError("falhou")
+        
+        job_id = gerenciador.submeter(executar, {})
+        self._esperar(gerenciador)
+        job = gerenciador.obter(job_id)
+        
+        assert job['status'] == ERRO
+        assert job['erro'] == "falhou"
+        assert gerenciador.resultados(job_id) == (ERRO, None)
+    
+    def test_descarta_finalizados_antigos(self, gerenciador):
+        """Testa o limite de jobs finalizados guardados"""
+        ids = []
+        for _ in range(4):
+            ids.append(gerenciador.submeter(lambda progresso: [], {}))
+            self._esperar(gerenciador)
+        
+        assert gerenciador.obter(ids[0]) is None
+        assert gerenciador.obter(ids[-1]) is not None
+        assert gerenciador.obter('inexistente') is None
+    
+    def test_submeter_enquanto_jobs_terminam(self):
+        """Testa que job finalizado sempre tem finalizado_em, mesmo com submissões simultâneas"""
+        gerenciador = GerenciadorJobs(max_workers=4, max_finalizados=1)
+        try:
+            ids = [gerenciador.submeter(lambda progresso: [], {}) for _ in range(300)]
+            gerenciador.desligar()
+        finally:
+            gerenciador.desligar()
+        
+        retratos = [gerenciador.obter(job_id) for job_id in ids]
+        assert all(r['finalizado_em'] is not None for r in retratos if r and r['status'] == CONCLUIDO)
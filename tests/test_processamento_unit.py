@@ -0,0 +1,114 @@
+import pytest
+from unittest.mock import patch
+from bs4 import BeautifulSoup
+from src.utils.processamento import DESCARTADO, ExecutorParse, analisar_anuncio, analisar_busca, total_paginas
+from src.utils.ranking import atende
+
+URL = "https://www.controller.com/listing/piper-seneca-123?print=1"
+HTML = """<html><body><h1>2012 PIPER SENECA V</h1><div class="price">USD $695,000</div>
+    <p>Total Time: 2,596</p><p>Engine 1 Time: 500 SMOH</p><p>Engine 1 TBO: 1,800</p>
+    <p>Engine 2 Time: 450 SMOH</p><p>Engine 2 TBO: 1,800</p></body></html>"""
+
+def busca(**campos):
+    return {'year': None, 'price': None, 'engine_left_time_min': '0', 'engine_left_time_max': '1000000000', **campos}
+
+class TestExecutorParse:
+    """Testes do parse em processos separados"""
+    
+    @pytest.fixture(scope='class')
+    def executor(self):
+        executor = ExecutorParse(processos=2)
+        yield executor
+        executor.desligar()
+    
+    @pytest.mark.slow
+    def test_anuncio_no_pool_igual_ao_da_thread(self, executor):
+        """Testa que o resultado vindo de outro processo é o mesmo da execução local"""
+        local, _, _ = ExecutorParse(processos=0).executar(analisar_anuncio, URL, HTML)
+        remoto, duracao_parse, duracao_extracao = executor.executar(analisar_anuncio, URL, HTML)
+        
+        assert remoto == local
+        assert remoto['motor_2_left'] == 1350.0
+        assert duracao_parse > 0 and duracao_extracao > 0
+    
+    @pytest.mark.slow
+    def test_busca_no_pool(self, executor, sample_search_html):
+        """Testa a análise da página de busca devolvendo só dados simples"""
+        links, total, _ = executor.executar(analisar_busca, sample_search_html, True)
+        
+        assert links == [
+            "https://www.controller.com/listing/piper-archer-123?print=1",
+            "https://www.controller.com/listing/cessna-172-456?print=1",
+        ]
+        assert total == 1
+    
+    def test_total_paginas_pelo_contador(self):
+        """Testa o total de páginas a partir do contador de anúncios"""
+        soup = BeautifulSoup("<div>1 - 28 of 133 Listings</div>", 'html.parser')
+        
+        assert total_paginas(soup, 28) == 5
+    
+    def test_sem_processos_roda_na_thread(self):
+        """Testa que com 0 processos nenhuma pool é criada"""
+        executor = ExecutorParse(processos=0)
+        
+        assert executor.executar(len, "abc") == 3
+        assert executor._pool is None
+    
+    def test_pool_recriado_apos_recarregar_referencias(self):
+        """Testa que os processos com os dados de referência antigos são trocados após a recarga"""
+        from src.utils import processamento
+        executor = ExecutorParse(processos=1)
+        try:
+            primeiro = executor._obter_pool()
+            assert executor._obter_pool() is primeiro
+            
+            processamento.registro.recarregar()
+            
+            assert executor._obter_pool() is not primeiro
+        finally:
+            executor.desligar()
+    
+    def test_pre_filtro_descarta_antes_do_parse(self):
+        """Testa que o anúncio fora de todas as buscas não chega ao BeautifulSoup"""
+        filtros = [
+            busca(engine_left_time_min='1500'),
+            busca(year={'min': '2015', 'max': None}),
+            busca(price={'min': None, 'max': '500000'}),
+        ]
+        # Sem elemento de preço, o preço do texto é o mesmo que a extração completa escolhe
+        html = HTML.replace('<div class="price">', '<div>')
+        
+        with patch('src.utils.processamento.BeautifulSoup') as mock_soup:
+            dados, duracao_parse, _ = analisar_anuncio(URL, html, filtros)
+        
+        assert dados == DESCARTADO
+        assert duracao_parse == 0.0
+        mock_soup.assert_not_called()
+    
+    def test_pre_filtro_nao_decide_o_preco_dos_seletores(self):
+        """Testa que o preço que depende dos seletores da página fica para o filtro completo"""
+        filtros = [busca(price={'min': None, 'max': '500000'})]
+        
+        dados, _, _ = analisar_anuncio(URL, HTML, filtros)
+        
+        assert dados != DESCARTADO and dados['preco'] == 695000.0
+    
+    def test_pre_filtro_igual_ao_filtro_completo_sem_preco(self):
+        """Testa "Call for price" com outros valores em dólar na página: aceito pelos dois filtros"""
+        html = HTML.replace('<div class="price">USD $695,000</div>', '<p>Call for price</p><p>Annual: $2,500</p>')
+        filtro = busca(price={'min': '600000', 'max': None})
+        
+        dados, _, _ = analisar_anuncio(URL, html, [filtro])
+        
+        assert dados != DESCARTADO and dados['preco'] is None
+        assert atende(dados, filtro)
+    
+    def test_pre_filtro_mantem_o_que_alguma_busca_aceita(self):
+        """Testa que basta uma busca do lote aceitar para o anúncio ser extraído por completo"""
+        filtros = [busca(engine_left_time_min='1500'), busca(price={'min': '600000', 'max': '700000'})]
+        
+        dados, _, _ = analisar_anuncio(URL, HTML, filtros)
+        
+        assert dados == analisar_anuncio(URL, HTML)[0]
+        assert dados['preco'] == 695000.0
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from tests.conftest import anuncio_fake
+from src.utils.ranking import tabela, mascara, top_k, selecionar, filtrar_e_ranquear, atende
+
+BUSCA = {
+    'manufacturer': 'piper', 'model': 'seneca', 'country': None,
+    'year': {'min': '2000', 'max': None}, 'price': {'min': None, 'max': '700000'},
+    'engine_left_time_min': '1000', 'engine_left_time_max': '1000000000',
+}
+
+def anuncio(n, **campos):
+    return {**anuncio_fake(f"https://www.controller.com/listing/{n}?print=1"), **campos}
+
+class TestRanking:
+    """Testes do filtro e ranking colunar de anúncios"""
+    
+    def test_metricas_derivadas(self):
+        """Testa motor_restante, preço por hora restante e vida do motor"""
+        df = tabela([
+            anuncio(1, preco=600000.0, motor_1_left=1500.0, motor_2_left=1000.0, motor_1_tbo=2000.0, motor_2_tbo=2000.0),
+            anuncio(2, motor_1_left=None, motor_1_tbo=None),
+        ])
+        
+        assert df['motor_restante'].tolist()[0] == 1000.0
+        assert df['preco_por_hora_restante'].tolist()[0] == 600.0
+        assert df['vida_motor'].tolist()[0] == 0.625
+        assert np.isnan(df.loc[1, ['motor_restante', 'preco_por_hora_restante', 'vida_motor']].to_numpy(dtype=float)).all()
+    
+    def test_mascara_todas_as_restricoes(self):
+        """Testa fabricante, modelo, ano, preço e horas do motor avaliados juntos"""
+        registros = [
+            anuncio(1),
+            anuncio(2, fabricante='CESSNA'),
+            anuncio(3, ano=1995),
+            anuncio(4, preco=750000.0),
+            anuncio(5, motor_1_left=900.0),
+            anuncio(6, preco=None, ano=None),
+            anuncio(7, motor_1_left=None),
+        ]
+        
+        assert mascara(tabela(registros), BUSCA).tolist() == [True, False, False, False, False, True, False]
+        assert [atende(r, BUSCA) for r in registros] == [True, False, False, False, False, True, False]
+    
+    def test_pais_e_modelo_ficam_com_o_site(self):
+        """Testa que país e modelo não são conferidos de novo sobre o texto extraído"""
+        df = tabela([anuncio(1), anuncio(2, localizacao='Dallas, TX', modelo='PA-34-220T')])
+        
+        assert mascara(df, {'country': 'United States', 'model': 'SENECA'}).tolist() == [True, True]
+    
+    def test_fabricante_pelo_nome_canonico(self):
+        """Testa o apelido do fabricante na busca contra o nome canônico extraído"""
+        df = tabela([anuncio(1, fabricante='BEECHCRAFT'), anuncio(2), anuncio(3, fabricante=None)])
+        
+        assert mascara(df, {'manufacturer': 'Beech'}).tolist() == [True, False, True]
+    
+    def test_top_k(self):
+        """Testa a seleção parcial dos k melhores, com NaN por último"""
+        valores = np.array([5.0, np.nan, 1.0, 3.0, 1.0])
+        
+        assert top_k(valores, 'x').tolist() == [2, 4, 3, 0, 1]
+        assert top_k(valores, '-x', limite=2).tolist() == [0, 3]
+        assert top_k(valores, 'x', limite=0).tolist() == []
+    
+    def test_filtrar_e_ranquear(self):
+        """Testa o ranking pelo menor preço por hora restante do motor"""
+        registros = [
+            anuncio(1, preco=600000.0, motor_1_left=1200.0),
+            anuncio(2, preco=300000.0, motor_1_left=1500.0),
+            anuncio(3, preco=500000.0, motor_1_left=2000.0),
+            anuncio(4, preco=100000.0, motor_1_left=100.0),
+        ]
+        busca = {**BUSCA, 'ordenar': 'preco_por_hora_restante', 'limite': 2}
+        
+        assert [r['url'][-9:] for r in filtrar_e_ranquear(registros, busca)] == ['2?print=1', '3?print=1']
+        assert filtrar_e_ranquear([], busca) == []
+    
+    def test_selecionar_subconjunto(self):
+        """Testa a filtragem de só algumas linhas de uma tabela compartilhada"""
+        df = tabela([anuncio(1), anuncio(2, motor_1_left=100.0), anuncio(3)])
+        
+        assert selecionar(df, BUSCA, [2, 1]).tolist() == [2]
+        with pytest.raises(ValueError):
+            selecionar(df, {'ordenar': 'registro'})
+    
+    def test_lote_grande(self):
+        """Testa o ranking de milhares de anúncios de uma vez"""
+        rng = np.random.default_rng(0)
+        precos = rng.uniform(50000, 900000, 5000)
+        registros = [anuncio(i, preco=float(p)) for i, p in enumerate(precos)]
+        
+        melhores = filtrar_e_ranquear(registros, {'ordenar': '-preco', 'limite': 10})
+        
+        assert [r['preco'] for r in melhores] == sorted(precos, reverse=True)[:10]
@@ -0,0 +1,176 @@
+import pytest
+from unittest.mock import patch
+from src.utils.rate_limit import (
+    CircuitoAberto, ControladorTaxa, Disjuntor, LimitadorRequisicoes, e_rate_limit, retry_after,
+)
+
+class TestLimitadorRequisicoes:
+    """Testes unitários para o token bucket de requisições"""
+    
+    def test_primeira_requisicao_sem_espera(self):
+        """Testa que o balde começa cheio"""
+        limitador = LimitadorRequisicoes(requisicoes_por_minuto=10)
+        
+        assert limitador.reservar() == 0
+    
+    def test_espera_apenas_o_necessario(self):
+        """Testa que a espera corresponde ao tempo de reposição do token"""
+        limitador = LimitadorRequisicoes(requisicoes_por_minuto=10)
+        
+        with patch('src.utils.rate_limit.time.time', side_effect=[100.0, 100.0, 103.0]):
+            assert limitador.reservar() == 0
+            assert limitador.reservar() == pytest.approx(6.0)
+            # 3 segundos depois ainda faltam 9s: um token em dívida e outro a repor
+            assert limitador.reservar() == pytest.approx(9.0)
+    
+    def test_capacidade_permite_rajada(self):
+        """Testa rajada limitada pela capacidade do balde"""
+        limitador = LimitadorRequisicoes(requisicoes_por_minuto=60, capacidade=3)
+        
+        with patch('src.utils.rate_limit.time.time', return_value=50.0):
+            esperas = [limitador.reservar() for _ in range(4)]
+        
+        assert esperas[:3] == [0, 0, 0]
+        assert esperas[3] == pytest.approx(1.0)
+    
+    def test_estado_sqlite_compartilhado(self, tmp_path):
+        """Testa que limitadores no mesmo arquivo dividem o orçamento (workers/containers)"""
+        caminho = str(tmp_path / "rate_limit.sqlite3")
+        worker_a = LimitadorRequisicoes(requisicoes_por_minuto=10, caminho_estado=caminho)
+        worker_b = LimitadorRequisicoes(requisicoes_por_minuto=10, caminho_estado=caminho)
+        
+        with patch('src.utils.rate_limit.time.time', return_value=200.0):
+            assert worker_a.reservar() == 0
+            assert worker_b.reservar() == pytest.approx(6.0)
+    
+    def test_estado_sqlite_sobrevive_reinicio(self, tmp_path):
+        """Testa que o saldo persiste entre instâncias (reinício do container)"""
+        caminho = str(tmp_path / "rate_limit.sqlite3")
+        
+        with patch('src.utils.rate_limit.time.time', return_value=300.0):
+            LimitadorRequisicoes(requisicoes_por_minuto=10, caminho_estado=caminho).reservar()
+            reiniciado = LimitadorRequisicoes(requisicoes_por_minuto=10, caminho_estado=caminho)
+            
+            assert reiniciado.reservar() == pytest.approx(6.0)
+            
+            reiniciado.reset()
+            assert reiniciado.reservar() == 0
+    
+    @patch('src.utils.rate_limit.time.sleep')
+    def test_aguardar_dorme_o_tempo_reservado(self, mock_sleep):
+        """Testa que aguardar dorme somente quando há espera"""
+        limitador = LimitadorRequisicoes(requisicoes_por_minuto=30)
+        
+        limitador.aguardar()
+        mock_sleep.assert_not_called()
+        
+        limitador.aguardar()
+        mock_sleep.assert_called_once()
+        assert mock_sleep.call_args[0][0] == pytest.approx(2.0, abs=0.1)
+
+class RespostaFalsa:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+class ErroHTTP(Exception):
+    def __init__(self, resposta):
+        super().__init__(f"Client error '{resposta.status_code}'")
+        self.response = resposta
+
+class TestControladorTaxa:
+    """Testes do ritmo adaptativo (AIMD), das retentativas e do circuit breaker"""
+    
+    def test_aimd_reduz_pela_metade_e_recupera_aos_poucos(self):
+        """Testa a redução multiplicativa no rate limit e o aumento aditivo até o ritmo configurado"""
+        limitador = LimitadorRequisicoes(requisicoes_por_minuto=10)
+        controle = ControladorTaxa(limitador, incremento=1, minimo=2)
+        
+        controle.registrar_rate_limit(Exception("Rate Limit Exceeded"))
+        assert limitador.requisicoes_por_minuto == 5
+        assert limitador.taxa == pytest.approx(5 / 60)
+        for _ in range(3):
+            controle.registrar_rate_limit(Exception("Rate Limit Exceeded"))
+        assert limitador.requisicoes_por_minuto == 2
+        
+        for _ in range(20):
+            controle.registrar_sucesso()
+        assert limitador.requisicoes_por_minuto == 10
+    
+    def test_espera_limitada_e_com_jitter(self):
+        """Testa o backoff exponencial com teto e o acréscimo aleatório"""
+        controle = ControladorTaxa(LimitadorRequisicoes(), espera_base=5, espera_maxima=30, jitter=0.5)
+        erro = Exception("Rate Limit Exceeded")
+        
+        with patch('src.utils.rate_limit.random.uniform', return_value=0):
+            assert [controle.espera(erro, n) for n in range(1, 6)] == [5, 10, 20, 30, 30]
+        assert 30 <= controle.espera(erro, 10) <= 45
+        assert controle.pode_repetir(4) and not controle.pode_repetir(5)
+    
+    def test_retry_after_do_cabecalho_http(self):
+        """Testa o 429 do transporte HTTP e a dica Retry-After do cabeçalho"""
+        controle = ControladorTaxa(LimitadorRequisicoes(), jitter=0)
+        
+        assert e_rate_limit(ErroHTTP(RespostaFalsa(429, {'retry-after': '12'})))
+        assert not e_rate_limit(ErroHTTP(RespostaFalsa(500)))
+        assert retry_after(ErroHTTP(RespostaFalsa(429, {'retry-after': 'Wed, 21 Oct 2026 07:28:00 GMT'}))) is None
+        assert controle.espera(ErroHTTP(RespostaFalsa(429, {'retry-after': '12'}))) == 14
+    
+    def test_retry_after_limitado_pela_espera_maxima(self):
+        """Testa que um Retry-After enorme não passa de espera_maxima, na espera e no disjuntor"""
+        controle = ControladorTaxa(LimitadorRequisicoes(), espera_maxima=30, jitter=0,
+                                   disjuntor=Disjuntor(limiar=1, tempo_aberto=10))
+        erro = ErroHTTP(RespostaFalsa(429, {'retry-after': '86400'}))
+        
+        assert controle.espera(erro) == 30
+        with patch('src.utils.rate_limit.time.monotonic', return_value=100.0):
+            controle.registrar_rate_limit(erro)
+        with patch('src.utils.rate_limit.time.monotonic', return_value=130.0):
+            controle.verificar()
+    
+    def test_sondagem_sem_resposta_nao_fecha_o_circuito(self):
+        """Testa que timeout na sondagem reabre o circuito e que uma resposta HTTP de erro o fecha"""
+        controle = ControladorTaxa(LimitadorRequisicoes(), disjuntor=Disjuntor(limiar=1, tempo_aberto=30))
+        
+        with patch('src.utils.rate_limit.time.monotonic', return_value=100.0):
+            controle.registrar_rate_limit(Exception("Rate Limit Exceeded"))
+        with patch('src.utils.rate_limit.time.monotonic', return_value=131.0):
+            controle.verificar()
+            controle.registrar_erro(TimeoutError("timed out"))
+            with pytest.raises(CircuitoAberto):
+                controle.verificar()
+        with patch('src.utils.rate_limit.time.monotonic', return_value=162.0):
+            controle.verificar()
+            controle.registrar_erro(ErroHTTP(RespostaFalsa(500)))
+        
+        assert not controle.disjuntor.aberto
+    
+    def test_disjuntor_abre_sonda_e_fecha(self):
+        """Testa o circuito: abre no limiar, libera uma sondagem após o tempo e reabre se ela falhar"""
+        disjuntor = Disjuntor(limiar=2, tempo_aberto=30)
+        
+        with patch('src.utils.rate_limit.time.monotonic', return_value=100.0):
+            disjuntor.falha()
+            disjuntor.verificar()
+            disjuntor.falha(espera=45)
+            with pytest.raises(CircuitoAberto):
+                disjuntor.verificar()
+        
+        with patch('src.utils.rate_limit.time.monotonic', return_value=140.0):
+            # O retry-after do servidor (45s) vale mais que o tempo_aberto
+            with pytest.raises(CircuitoAberto):
+                disjuntor.verificar()
+        
+        with patch('src.utils.rate_limit.time.monotonic', return_value=146.0):
+            disjuntor.verificar()
+            with pytest.raises(CircuitoAberto):
+                disjuntor.verificar()
+            disjuntor.falha()
+        
+        with patch('src.utils.rate_limit.time.monotonic', return_value=177.0):
+            disjuntor.verificar()
+            disjuntor.sucesso()
+            disjuntor.verificar()
+        
+        assert not disjuntor.aberto
+        assert disjuntor.recusadas == 3
@@ -0,0 +1,51 @@
+import json
+import pytest
+from src.utils.referencias import RegistroReferencias, registro
+
+class TestRegistroReferencias:
+    """Testes unitários para os dados de referência"""
+    
+    def test_pais_sem_acento_e_caixa(self):
+        """Testa o índice de países insensível a acentos, caixa e separadores"""
+        assert registro.codigo_pais("França") == "58"
+        assert registro.codigo_pais("  Nova Zelândia ") == "119"
+        assert registro.codigo_pais("united-states") == "178"
+        assert registro.codigo_pais("Atlântida") is None
+    
+    @pytest.mark.parametrize("titulo,esperado", [
+        ("2012 PIPER SENECA V", ("PIPER", "SENECA V")),
+        ("1978 Bellanca Super Decathlon", ("BELLANCA", "SUPER DECATHLON")),
+        ("2015 Bell 407GX", ("BELL", "407GX")),
+        ("2008 Beech King Air C90GT", ("BEECHCRAFT", "KING AIR C90GT")),
+        ("2019 Airbus Helicopters H125", ("AIRBUS HELICOPTERS", "H125")),
+        ("Hangar with lakeside view", None),
+    ])
+    def test_fabricante_no_titulo(self, titulo, esperado):
+        """Testa o casamento de fabricantes (nome mais longo, palavra inteira, apelidos)"""
+        encontrado = registro.encontrar_fabricante(titulo)
+        if esperado is None:
+            assert encontrado is None
+        else:
+            nome, fim = encontrado
+            assert (nome, ' '.join(titulo.upper()[fim:].split()[:3])) == esperado
+    
+    def test_tbo_motor(self):
+        """Testa o TBO de referência pelo modelo do motor"""
+        assert registro.tbo_motor("Engines: Lycoming TIO-540-AE2A") == 1800
+        assert registro.tbo_motor("Engine: Continental IO-360-ES") == 1500
+        assert registro.tbo_motor("Engine: IO-360") is None
+        assert registro.tbo_motor("PT6A-42 engines") == 3600
+        assert registro.tbo_motor("Sem motor informado") is None
+    
+    def test_recarregar_sem_reiniciar(self, tmp_path):
+        """Testa que os arquivos editados valem após recarregar"""
+        (tmp_path / "paises.json").write_text(json.dumps({"brasil": "23"}), encoding='utf-8')
+        (tmp_path / "fabricantes.json").write_text(json.dumps({"fabricantes": ["PIPER"]}), encoding='utf-8')
+        local = RegistroReferencias(str(tmp_path))
+        
+        assert local.codigo_pais("Japão") is None
+        (tmp_path / "paises.json").write_text(json.dumps({"brasil": "23", "japao": "84"}), encoding='utf-8')
+        resumo = local.recarregar()
+        
+        assert local.codigo_pais("Japão") == "84"
+        assert resumo == {'paises': 2, 'fabricantes': 1, 'modelos_motor': 0}
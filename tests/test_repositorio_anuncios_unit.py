@@ -0,0 +1,73 @@
+import json
+import pytest
+from tests.conftest import anuncio_fake
+from src.utils.extracao import normalizar_registro
+from src.utils.repositorio_anuncios import RepositorioAnuncios, colunas
+
+def anuncio(n, modelo='BARON 58', preco=450000.0, ano=1998, horas=4200.0, motor_1=900.0, motor_2=1100.0):
+    dados = anuncio_fake(f"https://www.controller.com/listing/{n}?print=1", motor_1_left=motor_1,
+                         titulo=f"{ano} BEECHCRAFT {modelo}")
+    dados.update({'fabricante': 'BEECHCRAFT', 'modelo': modelo, 'preco': preco, 'ano': ano,
+                  'horas_totais': horas, 'motor_2_left': motor_2})
+    return dados
+
+class TestRepositorioAnuncios:
+    """Testes do repositório SQLite de anúncios"""
+    
+    @pytest.fixture
+    def repositorio(self, tmp_path):
+        return RepositorioAnuncios(str(tmp_path / "anuncios.sqlite3"))
+    
+    def test_colunas_numericas(self):
+        """Testa as colunas indexadas a partir do registro tipado"""
+        c = colunas(anuncio(1))
+        
+        assert c['preco'] == 450000.0
+        assert c['moeda'] == 'USD'
+        assert c['ano'] == 1998
+        assert c['horas_totais'] == 4200.0
+        assert c['motor_restante'] == 900.0
+        
+        sem_dados = colunas(anuncio(2, preco=None, motor_1=None, motor_2=None))
+        assert sem_dados['preco'] is None and sem_dados['motor_restante'] is None
+    
+    def test_consulta_por_faixas(self, repositorio):
+        """Testa a consulta 'Barons abaixo de $500k com mais de 800 h restantes'"""
+        repositorio.guardar([
+            anuncio(1),
+            anuncio(2, preco=650000.0),
+            anuncio(3, motor_1=300.0),
+            anuncio(4, modelo='BONANZA A36'),
+            anuncio(5, preco=380000.0, motor_2=850.0),
+        ])
+        
+        encontrados = repositorio.consultar(modelo='baron', preco_max=500000, motor_restante_min=800, ordenar='preco')
+        
+        assert [d['url'][-9:] for d in encontrados] == ['5?print=1', '1?print=1']
+    
+    def test_url_repetida_atualiza(self, repositorio):
+        """Testa que a extração mais recente da mesma URL substitui a anterior"""
+        repositorio.guardar(anuncio(1))
+        repositorio.guardar(anuncio(1, preco=420000.0))
+        
+        assert repositorio.estatisticas()['entradas'] == 1
+        assert repositorio.consultar()[0]['preco'] == 420000.0
+    
+    def test_ordenacao_invalida(self, repositorio):
+        """Testa que só colunas conhecidas entram no ORDER BY"""
+        with pytest.raises(ValueError):
+            repositorio.consultar(ordenar='registro; DROP TABLE anuncios')
+    
+    def test_importar_json_antigos(self, repositorio, tmp_path):
+        """Testa a importação dos arquivos de scraped_data/resultados (campos ainda em texto)"""
+        diretorio = tmp_path / "resultados"
+        diretorio.mkdir()
+        antigo = {**anuncio(1), 'preco': 'USD $450,000', 'ano': '1998', 'horas_totais': '4200',
+                  'motor_1_left': '900.00', 'motor_2_left': 'Não encontrado'}
+        (diretorio / "resultados_BEECHCRAFT_BARON_20240101_000000.json").write_text(
+            json.dumps([antigo, anuncio(2)]), encoding='utf-8'
+        )
+        
+        assert repositorio.importar_json(str(diretorio)) == 2
+        assert len(repositorio.consultar(ano_min=1990, ano_max=2000)) == 2
+        assert repositorio.consultar(motor_restante_max=900)[0] == normalizar_registro(antigo)
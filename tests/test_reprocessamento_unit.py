@@ -0,0 +1,62 @@
+import pytest
+from src.utils.arquivo_paginas import ArquivoPaginas
+from src.utils.historico_anuncios import HistoricoAnuncios, hash_conteudo
+from src.utils.repositorio_anuncios import RepositorioAnuncios
+from src.utils.reprocessamento import reprocessar
+
+ANUNCIO = "https://www.controller.com/listing/piper-seneca-123?print=1"
+HTML_ANUNCIO = """<html><body><h1>2012 PIPER SENECA V</h1><div class="price">USD $695,000</div>
+    <p>Total Time: 2,596</p><p>Engine 1 Time: 500 SMOH</p><p>Engine 1 TBO: 1,800</p>
+    <p>Engine 2 Time: 450 SMOH</p><p>Engine 2 TBO: 1,800</p></body></html>"""
+BUSCA = "https://www.controller.com/listings/search?Manufacturer=PIPER"
+
+class TestReprocessamento:
+    """Testes do reprocessamento offline do arquivo de páginas"""
+    
+    @pytest.fixture
+    def arquivo(self, tmp_path, sample_search_html):
+        arquivo = ArquivoPaginas(str(tmp_path / "arquivo"))
+        arquivo.guardar(ANUNCIO, "<html>versão antiga</html>")
+        arquivo.guardar(ANUNCIO, HTML_ANUNCIO)
+        arquivo.guardar(BUSCA, sample_search_html)
+        return arquivo
+    
+    def test_grava_registros_novos(self, arquivo, tmp_path):
+        """Testa que só a versão mais recente é reprocessada e vai para o repositório"""
+        repositorio = RepositorioAnuncios(str(tmp_path / "anuncios.sqlite3"))
+        
+        resumo = reprocessar(arquivo, repositorio=repositorio, processos=0)
+        
+        assert (resumo['paginas'], resumo['anuncios'], resumo['buscas'], resumo['falhas']) == (2, 1, 1, 0)
+        assert resumo['gravados'] == 1
+        assert resumo['links'] == 2 and resumo['links_sem_pagina'] == 2
+        assert repositorio.consultar()[0]['motor_2_left'] == 1350.0
+    
+    def test_atualiza_historico_do_mesmo_html(self, arquivo, tmp_path):
+        """Testa que o histórico recebe o registro novo só se ainda aponta para o mesmo HTML"""
+        historico = HistoricoAnuncios(str(tmp_path / "ledger.sqlite3"))
+        historico.guardar(ANUNCIO, hash_conteudo(HTML_ANUNCIO), {'url': ANUNCIO, 'motor_2_left': None})
+        
+        resumo = reprocessar(arquivo, historico=historico, processos=0)
+        
+        assert resumo['historico_atualizado'] == 1
+        assert historico.inalterado(ANUNCIO, hash_conteudo(HTML_ANUNCIO))['motor_2_left'] == 1350.0
+        assert not historico.reprocessado(ANUNCIO, hash_conteudo("<html>outra</html>"), {})
+    
+    @pytest.mark.slow
+    def test_em_varios_processos(self, arquivo, tmp_path):
+        """Testa que o pool de processos produz o mesmo resultado da execução local"""
+        local = RepositorioAnuncios(str(tmp_path / "local.sqlite3"))
+        paralelo = RepositorioAnuncios(str(tmp_path / "paralelo.sqlite3"))
+        
+        reprocessar(arquivo, repositorio=local, processos=0)
+        resumo = reprocessar(arquivo, repositorio=paralelo, processos=2)
+        
+        assert resumo['falhas'] == 0
+        assert paralelo.consultar() == local.consultar()
+    
+    def test_arquivo_vazio(self, tmp_path):
+        """Testa o reprocessamento sem páginas arquivadas"""
+        resumo = reprocessar(ArquivoPaginas(str(tmp_path / "vazio")), processos=2)
+        
+        assert resumo['paginas'] == 0 and resumo['falhas'] == 0
@@ -17,13 +17,13 @@ class TestFirecrawlScraperIntegration:
 
         assert result is not None
         assert result['titulo'] == "2012 PIPER SENECA V"
-        assert result['preco'] == "USD $695,000"
+        assert (result['preco'], result['moeda']) == (695000.0, 'USD')
         assert result['localizacao'] == "Cham, Zug, Switzerland"
-        assert result['horas_totais'] == "2596"
-        assert result['motor_1_horas'] == {'horas': '219', 'status': 'SNEW'}
-        assert result['motor_1_tbo'] == "2000"
-        assert result['motor_2_horas'] == {'horas': '219', 'status': 'SNEW'}
-        assert result['motor_2_tbo'] == "2000"
+        assert result['horas_totais'] == 2596.0
+        assert result['motor_1_horas'] == {'horas': 219.0, 'status': 'SNEW'}
+        assert result['motor_1_tbo'] == 2000.0
+        assert result['motor_2_horas'] == {'horas': 219.0, 'status': 'SNEW'}
+        assert result['motor_2_tbo'] == 2000.0
         assert result['telefone'] == "+41 79 446 91 84"
         assert result['vendedor'] == "Ralph Severin"
         assert result['descricao'] != 'Não encontrado'
@@ -38,11 +38,11 @@ class TestFirecrawlScraperIntegration:
             
             assert result is not None
             assert result['titulo'] == "Piper PA-28-181 Archer LX"
-            assert result['preco'] == "USD $150,000"
+            assert (result['preco'], result['moeda']) == (150000.0, 'USD')
             assert result['localizacao'] == "Orlando, FL"
-            assert result['horas_totais'] == "2500"
-            assert result['motor_1_horas'] == "1500"
-            assert result['motor_1_tbo'] == "2000"
+            assert result['horas_totais'] == 2500.0
+            assert result['motor_1_horas'] == {'horas': 1500.0, 'status': 'Desconhecido'}
+            assert result['motor_1_tbo'] == 2000.0
             assert result['vendedor'] == "Aircraft Sales Inc."
             assert result['telefone'] == "(123) 456-7890"
             assert "beautiful aircraft" in result['descricao']
@@ -78,12 +78,12 @@ class TestFirecrawlScraperIntegration:
             result = scraper.filter_html_data("https://www.controller.com/listing/test")
             
             assert result['titulo'] == "1979 Cessna 172 Skyhawk"
-            assert "85000" in result['preco'] or "$85,000" in result['preco']
+            assert result['preco'] == 85000.0
             assert "Dallas" in result['localizacao']
-            assert result['ano'] == "1979"
+            assert result['ano'] == 1979
             assert result['fabricante'] == "CESSNA"
             assert "172" in result['modelo']
-            assert result['horas_totais'] == "3200"
+            assert result['horas_totais'] == 3200.0
     
     @pytest.mark.integration
     def test_full_workflow(self, scraper, sample_search_html, sample_html_content):
@@ -108,7 +108,7 @@ class TestFirecrawlScraperIntegration:
             assert 'Piper' in result['titulo']
     
     @pytest.mark.integration
-    @patch('src.web_scraping.BeautifulSoup')
+    @patch('src.utils.processamento.BeautifulSoup')
     def test_filter_html_data_parsing_error(self, mock_soup, scraper):
         """Testa tratamento de erro na análise HTML"""
         mock_soup.side_effect = Exception("HTML parsing failed")
@@ -1,8 +1,9 @@
 import pytest
 from unittest.mock import Mock, patch, MagicMock
-from bs4 import BeautifulSoup
 import time
 from src.web_scraping import FirecrawlScraper
+from src.utils.rate_limit import ControladorTaxa, Disjuntor, LimitadorRequisicoes
+from src.utils.arquivo_paginas import ArquivoPaginas
 
 class TestFirecrawlScraperUnit:
     """Testes unitários para FirecrawlScraper"""
@@ -37,45 +38,30 @@ class TestFirecrawlScraperUnit:
             
             assert url is None
     
-    def test_rate_limit_delay(self, scraper):
+    @patch('src.web_scraping.time.sleep')
+    def test_rate_limit_delay(self, mock_sleep, scraper):
         """Testa o delay entre requisições"""
-        start_time = time.time()
-        
-        scraper._rate_limit_delay()
+        # Primeira requisição usa o orçamento livre, sem espera
+        assert scraper._rate_limit_delay() == 0
+        mock_sleep.assert_not_called()
         
-        end_time = time.time()
-        elapsed = end_time - start_time
+        # A seguinte espera o intervalo de 60/FIRECRAWL_RPM segundos
+        espera = scraper._rate_limit_delay()
         
-        # Verifica que houve um delay (pelo menos 6 segundos)
-        assert elapsed >= 6.0
+        assert espera == pytest.approx(scraper.limitador.intervalo, abs=0.5)
+        mock_sleep.assert_called_once()
     
-    def test_generate_custom_filename_html(self, scraper):
-        """Testa geração de nome de arquivo HTML"""
-        url = "https://www.controller.com/listings/search?Country=US&sort=price&keywords=cessna+172"
-        filename = scraper._generate_custom_filename(url, 'html')
+    @patch('src.web_scraping.time.sleep')
+    def test_rate_limit_shared_between_instances(self, mock_sleep, mock_firecrawl_app):
+        """Testa que instâncias diferentes dividem o mesmo orçamento"""
+        primeiro = FirecrawlScraper(api_key="test_key")
+        segundo = FirecrawlScraper(api_key="test_key")
         
-        assert filename.startswith("controller_com_")
-        assert filename.endswith(".html")
-        assert "US" in filename
-        assert "price" in filename
-        assert "cessna_172" in filename
-    
-    def test_generate_custom_filename_markdown(self, scraper):
-        """Testa geração de nome de arquivo Markdown"""
-        url = "https://www.controller.com/listings/search"
-        filename = scraper._generate_custom_filename(url, 'md')
+        primeiro._rate_limit_delay()
+        espera = segundo._rate_limit_delay()
         
-        assert filename.endswith(".md")
-    
-    def test_generate_custom_filename_exception(self, scraper):
-        """Testa geração de nome com exceção"""
-        with patch('src.web_scraping.urlparse') as mock_parse:
-            mock_parse.side_effect = Exception("Parse failed")
-            
-            filename = scraper._generate_custom_filename("invalid_url", 'html')
-            
-            assert filename.startswith("fallback_")
-            assert filename.endswith(".html")
+        assert espera > 0
+        assert primeiro.limitador is segundo.limitador
     
     def test_markdown_to_html_conversion(self, scraper):
         """Testa conversão de markdown para HTML"""
@@ -86,24 +72,6 @@ class TestFirecrawlScraperUnit:
         assert "<strong>Bold</strong>" in html
         assert "<em>italic</em>" in html
     
-    def test_format_html_pretty(self, scraper):
-        """Testa formatação de HTML"""
-        ugly_html = "<html><body><div>test</div></body></html>"
-        pretty_html = scraper._format_html(ugly_html)
-        
-        # BeautifulSoup adiciona quebras de linha na formatação
-        assert "\n" in pretty_html
-        assert "test" in pretty_html
-    
-    def test_format_html_exception(self, scraper):
-        """Testa formatação de HTML com exceção"""
-        with patch('src.web_scraping.BeautifulSoup') as mock_soup:
-            mock_soup.side_effect = Exception("Parse error")
-            
-            result = scraper._format_html("<html>test</html>")
-            
-            assert result == "<html>test</html>"
-    
     @patch('src.web_scraping.time.sleep')
     def test_scrape_as_html_success(self, mock_sleep, scraper, mock_firecrawl_app):
         """Testa scraping HTML bem-sucedido"""
@@ -115,7 +83,8 @@ class TestFirecrawlScraperUnit:
         result = scraper.scrape_as_html("https://example.com")
         
         assert result == "<html>Test content</html>"
-        mock_sleep.assert_called_once()
+        # Orçamento livre: a primeira requisição não precisa esperar
+        mock_sleep.assert_not_called()
     
     @patch('src.web_scraping.time.sleep')
     def test_scrape_as_html_with_markdown(self, mock_sleep, scraper, mock_firecrawl_app):
@@ -142,6 +111,34 @@ class TestFirecrawlScraperUnit:
         assert result == "<html>Success</html>"
         assert mock_sleep.call_count == 2  # Delay inicial + retry
     
+    @patch('src.web_scraping.time.sleep')
+    def test_scrape_as_html_rate_limit_persistente(self, mock_sleep, mock_firecrawl_app):
+        """Testa que o rate limit contínuo desiste após o máximo de tentativas, sem recursão"""
+        mock_firecrawl_app.scrape.side_effect = Exception("Rate Limit Exceeded")
+        limitador = LimitadorRequisicoes(requisicoes_por_minuto=60)
+        scraper = FirecrawlScraper(api_key="test_key", cache=False, historico=False, limitador=limitador,
+                                   controle=ControladorTaxa(limitador, max_tentativas=3, disjuntor=Disjuntor(limiar=10)))
+        
+        assert scraper.scrape_as_html("https://example.com") is None
+        assert mock_firecrawl_app.scrape.call_count == 3
+        # Ritmo reduzido pela metade a cada rate limit
+        assert limitador.requisicoes_por_minuto == 7.5
+    
+    @patch('src.web_scraping.time.sleep')
+    def test_circuito_aberto_falha_na_hora_para_todos(self, mock_sleep, mock_firecrawl_app):
+        """Testa que o circuito aberto por um scraper recusa as requisições dos outros sem gastar cota"""
+        mock_firecrawl_app.scrape.side_effect = Exception("Rate Limit Exceeded: retry after 1s")
+        limitador = LimitadorRequisicoes(requisicoes_por_minuto=60)
+        controle = ControladorTaxa(limitador, max_tentativas=5, disjuntor=Disjuntor(limiar=2, tempo_aberto=60))
+        criar = lambda: FirecrawlScraper(api_key="test_key", cache=False, historico=False,
+                                         limitador=limitador, controle=controle)
+        
+        assert criar().scrape_as_html("https://example.com/1") is None
+        assert criar().scrape_as_html("https://example.com/2") is None
+        
+        assert mock_firecrawl_app.scrape.call_count == 2
+        assert controle.disjuntor.recusadas == 2
+    
     @patch('src.web_scraping.time.sleep')
     def test_scrape_as_html_save_to_file(self, mock_sleep, scraper, mock_firecrawl_app, tmp_path):
         """Testa scraping com salvamento em arquivo"""
@@ -149,16 +146,11 @@ class TestFirecrawlScraperUnit:
         mock_result.html = "<html>Test content</html>"
         mock_firecrawl_app.scrape.return_value = mock_result
         
-        output_dir = tmp_path / "html_files"
-        result = scraper.scrape_as_html(
-            "https://example.com", 
-            save_to_file=True, 
-            output_dir=str(output_dir)
-        )
+        scraper.arquivo = ArquivoPaginas(str(tmp_path / "arquivo"))
+        result = scraper.scrape_as_html("https://example.com", save_to_file=True)
         
         assert result == "<html>Test content</html>"
-        assert output_dir.exists()
-        assert any(output_dir.iterdir())  # Verifica que arquivos foram criados
+        assert scraper.arquivo.ler("https://example.com") == "<html>Test content</html>"
     
     def test_get_listing_links_success(self, scraper, sample_search_html):
         """Testa extração de links de listagem"""
@@ -187,4 +179,68 @@ class TestFirecrawlScraperUnit:
             
             links = scraper.get_listing_links("https://www.controller.com/search")
             
-            assert links == []
\ No newline at end of file
+            assert links == []
+    
+    @patch('src.web_scraping.time.sleep')
+    def test_scrape_as_html_cache_hit(self, mock_sleep, mock_firecrawl_app, tmp_path):
+        """Testa que a segunda busca da mesma página vem do cache, sem Firecrawl"""
+        from src.utils.cache_html import CacheHTML
+        cache = CacheHTML(str(tmp_path / "html_cache.sqlite3"))
+        scraper = FirecrawlScraper(api_key="test_key", cache=cache)
+        mock_firecrawl_app.scrape.return_value = MagicMock(html="<html>Cached</html>")
+        
+        primeiro = scraper.scrape_as_html("https://www.controller.com/listing/x?print=1")
+        segundo = scraper.scrape_as_html("https://www.controller.com/listing/x/?print=1")
+        
+        assert primeiro == segundo == "<html>Cached</html>"
+        mock_firecrawl_app.scrape.assert_called_once()
+        assert cache.estatisticas()['hits'] == 1
+    
+    def test_get_listing_links_paginacao(self, scraper):
+        """Testa que todas as páginas da busca são lidas e os links deduplicados"""
+        def pagina(links, paginacao=''):
+            anchors = ''.join(f'<a href="/listing/{l}" class="list-listing-title-link">{l}</a>' for l in links)
+            return f"<html><body>{anchors}{paginacao}</body></html>"
+        
+        paginacao = '<a href="/listings/search?Manufacturer=CESSNA&page=2">2</a><a href="/listings/search?Manufacturer=CESSNA&page=3">3</a>'
+        paginas = {
+            "https://www.controller.com/listings/search?Manufacturer=CESSNA": pagina(['a-1', 'b-2'], paginacao),
+            "https://www.controller.com/listings/search?Manufacturer=CESSNA&page=2": pagina(['c-3', 'b-2']),
+            "https://www.controller.com/listings/search?Manufacturer=CESSNA&page=3": pagina(['d-4']),
+        }
+        
+        with patch.object(scraper, 'scrape_as_html', side_effect=lambda url, *args: paginas[url]):
+            links = scraper.get_listing_links("https://www.controller.com/listings/search?Manufacturer=CESSNA")
+        
+        assert sorted(links) == [f"https://www.controller.com/listing/{l}?print=1" for l in ['a-1', 'b-2', 'c-3', 'd-4']]
+    
+    def test_build_page_url(self, scraper):
+        """Testa a troca do parâmetro de página mantendo a codificação da busca"""
+        url = "https://www.controller.com/listings/search?Manufacturer=PIPER&Year=2011%2A2012&page=2"
+        
+        assert scraper._build_page_url(url, 3) == "https://www.controller.com/listings/search?Manufacturer=PIPER&Year=2011%2A2012&page=3"
+    
+    def test_filter_html_data_conta_falha_de_extracao(self, scraper):
+        """Testa o contador de falhas de extração exposto em /metrics"""
+        from prometheus_client import REGISTRY
+        antes = REGISTRY.get_sample_value('scraper_falhas_extracao_total', {'motivo': 'sem_html'}) or 0
+        
+        with patch.object(scraper, 'scrape_as_html', return_value=None):
+            assert scraper.filter_html_data("https://www.controller.com/listing/x?print=1") is None
+        
+        assert REGISTRY.get_sample_value('scraper_falhas_extracao_total', {'motivo': 'sem_html'}) == antes + 1
+    
+    def test_pagina_sem_dados_nao_vira_registro(self, mock_firecrawl_app, tmp_path):
+        """Testa que uma página de bloqueio é falha de extração e não entra no histórico"""
+        from prometheus_client import REGISTRY
+        from src.utils.historico_anuncios import HistoricoAnuncios
+        url = "https://www.controller.com/listing/bloqueado?print=1"
+        historico = HistoricoAnuncios(str(tmp_path / "ledger.sqlite3"))
+        scraper = FirecrawlScraper(api_key="test_key", cache=False, historico=historico)
+        antes = REGISTRY.get_sample_value('scraper_falhas_extracao_total', {'motivo': 'sem_dados'}) or 0
+        
+        with patch.object(scraper, 'scrape_as_html', return_value="<html><body>Access denied</body></html>"):
+            assert scraper.filter_html_data(url) is None
+        
+        assert historico.recente(url) is None
+        assert REGISTRY.get_sample_value('scraper_falhas_extracao_total', {'motivo': 'sem_dados'}) == antes + 1
@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import patch
+from openpyxl import load_workbook
+from tests.conftest import anuncio_fake
+from src import sheets
+from src.sheets import COLUNAS_AERONAVES, COLUNAS_HISTORICO, COLUNAS_PESQUISA
+
+PESQUISA = {'manufacturer': 'PIPER', 'model': 'SENECA', 'country': '',
+            'year': {'min': '2010', 'max': None}, 'price': {'min': None, 'max': '800000'}}
+
+def anuncios(quantidade, inicio=0):
+    for n in range(inicio, inicio + quantidade):
+        yield anuncio_fake(f"https://www.controller.com/listing/{n}?print=1")
+
+class TestSheets:
+    """Testes da exportação em streaming para Excel"""
+
+    @pytest.fixture(autouse=True)
+    def diretorio(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        return tmp_path
+
+    def test_exporta_pesquisa_e_aeronaves(self):
+        """Testa o layout da aba: pesquisa, linha vazia e tabela das aeronaves"""
+        caminho = sheets.exportar_para_google_sheets(PESQUISA, anuncios(3))
+
+        ws = load_workbook(caminho)['Dados Consolidados']
+        linhas = list(ws.iter_rows(values_only=True))
+
+        assert linhas[0][:len(COLUNAS_PESQUISA)] == COLUNAS_PESQUISA
+        assert linhas[1][:4] == ('PIPER', 'SENECA', None, '2010')
+        assert all(valor is None for valor in linhas[2])
+        assert linhas[3] == COLUNAS_AERONAVES
+        assert len(linhas) == 7
+        assert linhas[4][2] == 695000.0 and linhas[4][9] == 500.0
+        assert ws['A1'].font.b and ws['A4'].font.b and not ws['A5'].font.b
+
+    def test_largura_medida_durante_a_escrita(self):
+        """Testa que a largura de cada coluna acompanha o maior conteúdo"""
+        caminho = sheets.exportar_para_google_sheets(PESQUISA, anuncios(2))
+
+        ws = load_workbook(caminho)['Dados Consolidados']
+
+        assert ws.column_dimensions['A'].width == len("https://www.controller.com/listing/0?print=1") + 2
+        assert ws.column_dimensions['K'].width == len('Motor 1 Status') + 2
+
+    def test_historico_acrescenta_sem_carregar_a_planilha(self):
+        """Testa que cada execução vai para o fim do histórico, lido só em modo read-only"""
+        sheets.acrescentar_ao_historico(PESQUISA, anuncios(2))
+
+        with patch('src.sheets.load_workbook', wraps=load_workbook) as mock_load:
+            caminho = sheets.acrescentar_ao_historico({**PESQUISA, 'model': 'ARCHER'}, anuncios(3, inicio=2))
+
+        mock_load.assert_called_once_with(caminho, read_only=True)
+        ws = load_workbook(caminho)['Histórico']
+        linhas = list(ws.iter_rows(values_only=True))
+        assert linhas[0] == COLUNAS_HISTORICO
+        assert [linha[2] for linha in linhas[1:]] == [
+            f"https://www.controller.com/listing/{n}?print=1" for n in range(5)
+        ]
+        assert '"ARCHER"' in linhas[-1][1] and '"SENECA"' in linhas[1][1]
+        assert ws['A1'].font.b
+
+    def test_falha_na_escrita_preserva_o_historico(self, diretorio):
+        """Testa que o arquivo anterior continua intacto se a exportação falhar no meio"""
+        caminho = sheets.acrescentar_ao_historico(PESQUISA, anuncios(1))
+        original = (diretorio / caminho).read_bytes()
+
+        def quebrado():
+            yield from anuncios(1)
+            raise RuntimeError("falha no meio")
+
+        with pytest.raises(RuntimeError):
+            sheets.acrescentar_ao_historico(PESQUISA, quebrado())
+
+        assert (diretorio / caminho).read_bytes() == original
+        assert sorted(p.name for p in (diretorio / 'planilhas').iterdir()) == ['historico_aeronaves.xlsx']
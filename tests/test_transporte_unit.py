@@ -0,0 +1,56 @@
+import asyncio
+import httpx
+import pytest
+from src.utils.transporte import TransporteHTTP, transportes_configurados
+from src.web_scraping import FirecrawlScraper
+
+class TestTransporte:
+    """Testes dos transportes de busca contra um servidor local"""
+    
+    @pytest.fixture
+    def transporte(self):
+        transporte = TransporteHTTP(timeout=5)
+        yield transporte
+        transporte.fechar()
+    
+    def test_http_reaproveita_conexao(self, transporte, servidor_local):
+        """Testa que buscas seguidas usam a mesma conexão (keep-alive do pool)"""
+        for _ in range(3):
+            pagina = transporte.buscar(f"{servidor_local.base_url}/listing/piper-archer-123?print=1")
+            assert "Piper PA-28-181 Archer LX" in pagina.html
+        
+        assert len(servidor_local.conexoes) == 3
+        assert len(set(servidor_local.conexoes)) == 1
+    
+    def test_http_async(self, transporte, servidor_local):
+        """Testa a busca a partir de código assíncrono"""
+        async def buscar_varias():
+            urls = [f"{servidor_local.base_url}/listing/{i}" for i in range(5)]
+            return await asyncio.gather(*(transporte.buscar_async(url) for url in urls))
+        
+        paginas = asyncio.run(buscar_varias())
+        
+        assert all(pagina.status == 200 for pagina in paginas)
+    
+    def test_http_erro_de_status(self, transporte, servidor_local):
+        """Testa que respostas de erro viram exceção (tratada pelo scraper)"""
+        with pytest.raises(httpx.HTTPStatusError):
+            transporte.buscar(f"{servidor_local.base_url}/nao-existe")
+    
+    def test_transporte_por_tipo_de_pagina(self, transporte, servidor_local, mock_firecrawl_app, monkeypatch):
+        """Testa anúncios pelo HTTP direto e o resto pelo Firecrawl, sem gastar cota nos anúncios"""
+        monkeypatch.setenv('FETCH_TRANSPORT', 'firecrawl')
+        monkeypatch.setenv('FETCH_TRANSPORT_ANUNCIO', 'http')
+        assert transportes_configurados() == {'busca': 'firecrawl', 'anuncio': 'http', 'outro': 'firecrawl'}
+        
+        scraper = FirecrawlScraper(api_key="test_key", transportes={'anuncio': transporte})
+        html = scraper.scrape_as_html(f"{servidor_local.base_url}/listing/piper-archer-123?print=1")
+        
+        assert "Archer" in html
+        assert scraper.transportes['busca'].nome == 'firecrawl'
+        mock_firecrawl_app.scrape.assert_not_called()
+    
+    def test_transporte_desconhecido(self, mock_firecrawl_app):
+        """Testa a validação do nome do transporte"""
+        with pytest.raises(ValueError):
+            FirecrawlScraper(api_key="test_key", transportes={'busca': 'ftp'})